@@ -0,0 +1,86 @@
+"""Synthetic event-storm benchmark driving IndexUpdateHandler directly."""
+import os
+import random
+import time
+from typing import Dict, List
+from watchdog.events import FileCreatedEvent, FileModifiedEvent, FileDeletedEvent, DirModifiedEvent
+from backend.config.config import Config
+from backend.indexer.file_watcher import IndexUpdateHandler
+from backend.benchmarks.synthetic import synthetic_files
+
+
+def _legacy_is_duplicate(recent_events: Dict, event_key: str, debounce_seconds: float) -> Dict:
+    """The previous debounce: rebuilds the whole dict on every event (for comparison)."""
+    current_time = time.time()
+    if event_key in recent_events and current_time - recent_events[event_key] < debounce_seconds:
+        return recent_events
+    recent_events[event_key] = current_time
+    return {k: v for k, v in recent_events.items() if current_time - v < debounce_seconds * 2}
+
+
+def _build_storm(events: int, distinct_paths: int, seed: int) -> List:
+    """Build a mix of create/modify/delete events, plus directory noise."""
+    rng = random.Random(seed)
+    paths = [f['path'] for f in synthetic_files(distinct_paths, seed=seed)]
+    storm = []
+    for _ in range(events):
+        path = paths[rng.randrange(distinct_paths)]
+        roll = rng.random()
+        if roll < 0.4:
+            storm.append(FileCreatedEvent(path))
+        elif roll < 0.8:
+            storm.append(FileModifiedEvent(path))
+        elif roll < 0.95:
+            storm.append(FileDeletedEvent(path))
+        else:
+            storm.append(DirModifiedEvent(os.path.dirname(path)))
+    return storm
+
+
+def run_event_storm_benchmark(events: int = 100000, distinct_paths: int = 20000,
+                              legacy_events: int = 5000, seed: int = 11) -> Dict:
+    """
+    Feed a synthetic event storm straight into the handler.
+    
+    Args:
+        events: Number of events in the storm
+        distinct_paths: Number of distinct file paths the events touch
+        legacy_events: Events to run through the old debounce for comparison
+            (it is quadratic, so keep this small)
+        seed: Random seed
+        
+    Returns:
+        Throughput and per-event cost for the handler and the legacy debounce
+    """
+    storm = _build_storm(events, distinct_paths, seed)
+    delivered = [0]
+    
+    def callback(*args):
+        delivered[0] += 1
+    
+    handler = IndexUpdateHandler(callback, callback, callback, callback, Config.EXCLUDED_DIRS, verbose=False)
+    
+    start = time.perf_counter()
+    for event in storm:
+        handler.dispatch(event)
+    elapsed = time.perf_counter() - start
+    
+    result = {
+        'events': events,
+        'delivered': delivered[0],
+        'seconds': elapsed,
+        'events_per_sec': events / elapsed if elapsed else 0,
+        'per_event_us': elapsed / events * 1e6,
+        'tracked_keys': len(handler.recent_events)
+    }
+    
+    if legacy_events:
+        recent = {}
+        start = time.perf_counter()
+        for event in storm[:legacy_events]:
+            recent = _legacy_is_duplicate(recent, f"{event.event_type}:{event.src_path}", handler.debounce_seconds)
+        legacy_elapsed = time.perf_counter() - start
+        result['legacy_events'] = legacy_events
+        result['legacy_per_event_us'] = legacy_elapsed / legacy_events * 1e6
+    
+    return result
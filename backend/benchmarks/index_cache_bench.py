@@ -0,0 +1,79 @@
+"""Micro-benchmark for applying watcher events to IndexCache."""
+import gc
+import random
+import time
+from typing import Dict, List
+from backend.search.cache import IndexCache
+from backend.benchmarks.synthetic import synthetic_files
+
+
+def run_index_cache_benchmark(sizes: List[int], events: int = 10000, seed: int = 7) -> List[Dict]:
+    """
+    Measure per-event cost of IndexCache add/update/remove at several index sizes.
+    
+    Each size gets a fresh cache loaded with synthetic files, then a mixed
+    stream of creates, modifies and deletes (roughly 40/40/20) is applied.
+    
+    Args:
+        sizes: Index sizes to measure
+        events: Number of events to apply per size
+        seed: Random seed for the event stream
+        
+    Returns:
+        One result dictionary per size
+    """
+    results = []
+    
+    for size in sizes:
+        cache = IndexCache()
+        cache.load(list(synthetic_files(size)))
+        rng = random.Random(seed)
+        paths = [path for path in cache.columns.iter_paths() if path is not None]
+        now = int(time.time())
+        timings = {'create': [], 'modify': [], 'delete': []}
+        
+        gc.collect()
+        for i in range(events):
+            roll = rng.random()
+            if roll < 0.4:
+                name = f"new_file_{i}.txt"
+                file = {'name': name, 'path': f"/bench/new/{name}", 'extension': '.txt', 'modified_time': now}
+                start = time.perf_counter()
+                cache.add_file(file)
+                timings['create'].append(time.perf_counter() - start)
+                paths.append(file['path'])
+            elif roll < 0.8:
+                path = paths[rng.randrange(len(paths))]
+                current = cache.get_file(path)
+                if current is None:
+                    continue
+                file = dict(current, modified_time=now)
+                start = time.perf_counter()
+                cache.update_file(path, file)
+                timings['modify'].append(time.perf_counter() - start)
+            else:
+                index = rng.randrange(len(paths))
+                path = paths[index]
+                paths[index] = paths[-1]
+                paths.pop()
+                start = time.perf_counter()
+                cache.remove_file(path)
+                timings['delete'].append(time.perf_counter() - start)
+        
+        all_times = sorted(t for op in timings.values() for t in op)
+        results.append({
+            'size': size,
+            'events': len(all_times),
+            'mean_us': sum(all_times) / len(all_times) * 1e6,
+            'p99_us': all_times[int(len(all_times) * 0.99)] * 1e6,
+            'per_op_us': {
+                op: (sum(times) / len(times) * 1e6 if times else 0.0)
+                for op, times in timings.items()
+            },
+            'tombstones': cache.tombstones
+        })
+        
+        del cache, paths
+        gc.collect()
+    
+    return results
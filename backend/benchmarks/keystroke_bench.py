@@ -0,0 +1,129 @@
+"""Keystroke-replay benchmark for search-as-you-type sessions."""
+import gc
+import random
+import time
+from typing import Dict, List, Tuple
+from backend.search.columns import FileColumns
+from backend.search.search_engine import SearchEngine
+from backend.benchmarks.synthetic import WORDS, synthetic_files
+
+# Characters a slipping finger tends to hit instead
+_NEIGHBOURS = 'qwertyuiopasdfghjklzxcvbnm'
+
+
+def typing_trace(rng: random.Random, typo_rate: float = 0.06, edit_rate: float = 0.1) -> List[Tuple[str, float]]:
+    """
+    Simulate typing one query into the search box.
+    
+    The target is one to three words, typed a character at a time with
+    human inter-key gaps. Typos are followed by a backspace, and some
+    traces end by going back to change a character mid-string.
+    
+    Args:
+        rng: Random source
+        typo_rate: Chance that a keystroke is a typo corrected right away
+        edit_rate: Chance of a final mid-string edit
+        
+    Returns:
+        List of (box contents, milliseconds until the next keystroke)
+    """
+    target = ' '.join(rng.choice(WORDS) for _ in range(rng.choice((1, 1, 2, 2, 3))))
+    trace = []
+    
+    def gap() -> float:
+        # Typing bursts with the odd pause to think
+        return rng.lognormvariate(4.9, 0.5) if rng.random() > 0.15 else rng.uniform(300, 900)
+    
+    text = ''
+    for char in target:
+        if rng.random() < typo_rate:
+            trace.append((text + rng.choice(_NEIGHBOURS), gap()))
+            trace.append((text, gap()))
+        text += char
+        trace.append((text, gap()))
+    
+    if rng.random() < edit_rate and len(text) > 3:
+        i = rng.randrange(1, len(text) - 1)
+        trace.append((text[:i] + rng.choice(_NEIGHBOURS) + text[i + 1:], gap()))
+    
+    return trace
+
+
+def debounced(trace: List[Tuple[str, float]], debounce_ms: float) -> List[str]:
+    """Get the queries a debounced search box would send for a trace."""
+    queries = [text for text, pause in trace[:-1] if pause >= debounce_ms]
+    queries.append(trace[-1][0])
+    return [query for query in queries if query.strip()]
+
+
+def run_keystroke_benchmark(count: int = 300000, traces: int = 200, debounce_ms: float = 150,
+                            seed: int = 11) -> Dict:
+    """
+    Replay typing traces with and without session prefix reuse.
+    
+    Both engines run without the query cache so every keystroke pays for
+    candidate selection and scoring; results are compared query by query.
+    
+    Args:
+        count: Number of synthetic files to index
+        traces: Number of typing traces to replay
+        debounce_ms: Idle time before the UI sends a query
+        seed: Random seed for traces
+        
+    Returns:
+        Timings for both modes plus reuse and mismatch counts
+    """
+    columns = FileColumns(list(synthetic_files(count)))
+    engine = SearchEngine.from_columns(columns, use_cache=False)
+    rng = random.Random(seed)
+    sessions = [debounced(typing_trace(rng), debounce_ms) for _ in range(traces)]
+    
+    timings = {'full': [], 'session': []}
+    mismatches = 0
+    
+    gc.collect()
+    for i, queries in enumerate(sessions):
+        for query in queries:
+            results = {}
+            # Alternate which mode goes first so neither always runs on warm caches
+            for mode in (('full', 'session') if i % 2 else ('session', 'full')):
+                start = time.perf_counter()
+                results[mode] = engine.search(query, session=str(i) if mode == 'session' else None)
+                timings[mode].append(time.perf_counter() - start)
+            
+            if [r.path for r in results['session']] != [r.path for r in results['full']]:
+                mismatches += 1
+    
+    # Candidate selection alone, where the reuse happens
+    selection = {'full': [], 'session': []}
+    index = engine.trigram_index
+    for queries in sessions:
+        previous = None
+        for query in (q.lower().strip() for q in queries):
+            start = time.perf_counter()
+            index.candidates(query)
+            selection['full'].append(time.perf_counter() - start)
+            
+            start = time.perf_counter()
+            previous = index.count_prefix(query, previous)
+            if previous is not None:
+                index.prefix_candidates(previous)
+            selection['session'].append(time.perf_counter() - start)
+    
+    def summarize(times: List[float]) -> Dict:
+        ordered = sorted(times)
+        return {
+            'total_ms': sum(ordered) * 1000,
+            'mean_ms': sum(ordered) / len(ordered) * 1000,
+            'p95_ms': ordered[int(len(ordered) * 0.95)] * 1000
+        }
+    
+    return {
+        'files': count,
+        'traces': traces,
+        'queries': len(timings['full']),
+        'search': {mode: summarize(times) for mode, times in timings.items()},
+        'selection': {mode: summarize(times) for mode, times in selection.items()},
+        'prefix_reuses': engine.prefix_reuses,
+        'mismatches': mismatches
+    }
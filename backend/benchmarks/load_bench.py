@@ -0,0 +1,132 @@
+"""Concurrent-client load test for the desktop UI's search API."""
+import http.client
+import json
+import random
+import threading
+import time
+from typing import Dict, List
+from urllib.parse import urlparse
+from backend.benchmarks.keystroke_bench import debounced, typing_trace
+
+ENDPOINTS = {
+    'search': '/api/search',
+    'stream': '/api/search/stream'
+}
+
+
+def _percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * fraction))]
+
+
+def _summary(latencies: List[float]) -> Dict:
+    """Latency distribution in milliseconds."""
+    latencies = sorted(latencies)
+    return {
+        'mean_ms': sum(latencies) / len(latencies) * 1000 if latencies else 0.0,
+        'p50_ms': _percentile(latencies, 0.50) * 1000,
+        'p90_ms': _percentile(latencies, 0.90) * 1000,
+        'p99_ms': _percentile(latencies, 0.99) * 1000,
+        'max_ms': latencies[-1] * 1000 if latencies else 0.0
+    }
+
+
+def run_load_benchmark(url: str, clients: int = 8, traces: int = 20, endpoint: str = 'search',
+                       debounce_ms: float = 150, think: bool = False, seed: int = 3) -> Dict:
+    """
+    Replay search-as-you-type sessions from concurrent clients.
+    
+    Each client owns a connection and a search session and sends the
+    debounced keystroke queries of its typing traces, like the search
+    box does. Clients send back to back unless think is set, in which
+    case they wait out the typing pauses between queries.
+    
+    Args:
+        url: Base URL of a running server (e.g. http://127.0.0.1:5000)
+        clients: Concurrent clients
+        traces: Typing traces per client
+        endpoint: 'search' (JSON page) or 'stream' (NDJSON tiers)
+        debounce_ms: UI debounce applied to the traces
+        think: Pace each client at human typing speed
+        seed: Random seed
+        
+    Returns:
+        Request counts, throughput and latency percentiles (plus time to
+        the first tier for the stream endpoint)
+    """
+    if endpoint not in ENDPOINTS:
+        raise ValueError(f"Unknown endpoint: {endpoint}")
+    target = urlparse(url)
+    path = ENDPOINTS[endpoint]
+    
+    latencies: List[float] = []
+    first_tier: List[float] = []
+    errors = []
+    lock = threading.Lock()
+    start_barrier = threading.Barrier(clients)
+    
+    def client(number: int):
+        rng = random.Random(seed * 1000 + number)
+        plan = []
+        for _ in range(traces):
+            trace = typing_trace(rng)
+            queries = debounced(trace, debounce_ms)
+            pause = sum(gap for _, gap in trace) / len(queries) / 1000 if think else 0.0
+            plan.extend((query, pause) for query in queries)
+        
+        connection = http.client.HTTPConnection(target.hostname, target.port or 80, timeout=60)
+        session = f"load-{number}"
+        start_barrier.wait()
+        
+        for query, pause in plan:
+            body = json.dumps({'query': query, 'session': session})
+            start = time.perf_counter()
+            try:
+                connection.request('POST', path, body, {'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                first = None
+                if endpoint == 'stream':
+                    # Time to the prefix tier, then drain the rest
+                    response.readline()
+                    first = time.perf_counter() - start
+                response.read()
+                elapsed = time.perf_counter() - start
+                if response.status != 200:
+                    raise RuntimeError(f"HTTP {response.status}")
+            except Exception as e:
+                connection.close()
+                with lock:
+                    errors.append(str(e))
+                continue
+            
+            with lock:
+                latencies.append(elapsed)
+                if first is not None:
+                    first_tier.append(first)
+            if pause:
+                time.sleep(pause)
+        
+        connection.close()
+    
+    threads = [threading.Thread(target=client, args=(n,), name=f'LoadClient-{n}') for n in range(clients)]
+    wall = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - wall
+    
+    result = {
+        'clients': clients,
+        'endpoint': path,
+        'requests': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'throughput': len(latencies) / wall if wall else 0.0,
+        'latency': _summary(latencies)
+    }
+    if endpoint == 'stream':
+        result['first_tier'] = _summary(first_tier)
+    return result
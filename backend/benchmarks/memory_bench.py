@@ -0,0 +1,106 @@
+"""Memory benchmark for in-memory index representations."""
+import gc
+import tracemalloc
+from typing import Callable, Dict
+from backend.database.database import FileMetadata
+from backend.search.columns import FileColumns
+from backend.search.search_engine import SearchResult
+from backend.benchmarks.synthetic import synthetic_files
+
+# Records measured per class when comparing __dict__ and __slots__ layouts
+RECORD_SAMPLE = 10000
+
+
+class _DictFileMetadata:
+    """FileMetadata as it was before __slots__."""
+    
+    def __init__(self, name: str, path: str, extension: str, modified_time: int, size: int = 0):
+        self.name = name
+        self.path = path
+        self.extension = extension
+        self.modified_time = modified_time
+        self.size = size
+
+
+class _DictSearchResult:
+    """SearchResult as it was before __slots__."""
+    
+    def __init__(self, name: str, path: str, extension: str, modified_time: int, score: float, size: int = 0):
+        self.name = name
+        self.path = path
+        self.extension = extension
+        self.modified_time = modified_time
+        self.score = score
+        self.size = size
+
+
+def _retained(build: Callable[[], object]) -> int:
+    """Bytes still allocated by build()'s result once it returns."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = build()
+        gc.collect()
+        size, _ = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    del result
+    gc.collect()
+    return size
+
+
+def _per_record(cls, *args) -> int:
+    """Average bytes per instance of a record class (field values excluded)."""
+    return round(_retained(lambda: [cls(*args) for _ in range(RECORD_SAMPLE)]) / RECORD_SAMPLE)
+
+
+def run_memory_benchmark(count: int = 1000000, seed: int = 42) -> Dict:
+    """
+    Measure the index held as per-file dicts against FileColumns.
+    
+    Both representations are built straight from the synthetic generator,
+    so every string they keep (names, paths, extensions) is counted.
+    
+    Args:
+        count: Number of synthetic files
+        seed: Random seed for the synthetic index
+        
+    Returns:
+        Bytes and bytes per file for each representation, plus per-record
+        sizes of the __dict__ and __slots__ versions of the record classes
+    """
+    dict_bytes = _retained(lambda: list(synthetic_files(count, seed)))
+    shape = {}
+    
+    def build_columns():
+        rows = [
+            (f['name'], f['path'], f['extension'], f['modified_time'], f['size'])
+            for f in synthetic_files(count, seed)
+        ]
+        columns = FileColumns.from_rows(rows)
+        del rows
+        shape['directories'] = len(columns.directories)
+        return columns
+    
+    columns_bytes = _retained(build_columns)
+    
+    record = ('report.pdf', '/home/user/report.pdf', '.pdf', 0)
+    records = {
+        'FileMetadata': {
+            'dict': _per_record(_DictFileMetadata, *record),
+            'slots': _per_record(FileMetadata, *record)
+        },
+        'SearchResult': {
+            'dict': _per_record(_DictSearchResult, *record, 90.0),
+            'slots': _per_record(SearchResult, *record, 90.0)
+        }
+    }
+    
+    return {
+        'files': count,
+        'directories': shape['directories'],
+        'dict_rows': {'bytes': dict_bytes, 'bytes_per_file': dict_bytes / count},
+        'columns': {'bytes': columns_bytes, 'bytes_per_file': columns_bytes / count},
+        'saved_pct': (1 - columns_bytes / dict_bytes) * 100 if dict_bytes else 0.0,
+        'records': records
+    }
@@ -0,0 +1,73 @@
+"""Scaling benchmark for sharded parallel search."""
+import gc
+import time
+from typing import Dict
+from backend.search.columns import FileColumns
+from backend.search.search_engine import SearchEngine
+from backend.search import sharded
+from backend.benchmarks.synthetic import synthetic_files
+
+# Short queries scan every name; longer ones score a trigram candidate set
+QUERIES = ['rep', 'bud', 'photo', 'report', 'meeting notes', 'invoice final', 'proj2024 data']
+
+
+def run_parallel_search_benchmark(count: int, max_workers: int, iterations: int = 3) -> Dict:
+    """
+    Time the query mix on 1 (sequential) to max_workers threads.
+    
+    Sharding is forced on for every query (threshold 0) so each worker
+    count sees the same work; results are checked against the sequential
+    ranking.
+    
+    Args:
+        count: Number of synthetic files to index
+        max_workers: Largest thread count to measure
+        iterations: Runs of the query mix per configuration
+        
+    Returns:
+        Query count and one timing entry per thread count
+    """
+    if not sharded.available():
+        raise RuntimeError("Sharded search requires numpy")
+    
+    engine = SearchEngine.from_columns(FileColumns(list(synthetic_files(count))), use_cache=False)
+    engine.parallel_min_names = 0
+    
+    def run() -> Dict:
+        times = []
+        results = {}
+        for _ in range(iterations):
+            for query in QUERIES:
+                start = time.perf_counter()
+                results[query] = [(r.path, r.score) for r in engine.search(query)]
+                times.append(time.perf_counter() - start)
+        times.sort()
+        return {
+            'mean_ms': sum(times) / len(times) * 1000,
+            'p50_ms': times[len(times) // 2] * 1000,
+            'max_ms': times[-1] * 1000,
+            'results': results
+        }
+    
+    gc.collect()
+    engine.search_workers = 1
+    baseline = run()
+    expected = baseline.pop('results')
+    
+    scaling = []
+    for workers in range(1, max_workers + 1):
+        # One worker is the sequential path; more shard the scoring
+        engine.search_workers = workers
+        timing = run() if workers > 1 else dict(baseline, results=expected)
+        
+        results = timing.pop('results')
+        timing['workers'] = workers
+        timing['speedup'] = baseline['mean_ms'] / timing['mean_ms']
+        timing['mismatches'] = sum(results[query] != expected[query] for query in QUERIES)
+        scaling.append(timing)
+    
+    return {
+        'files': count,
+        'queries': len(QUERIES) * iterations,
+        'scaling': scaling
+    }
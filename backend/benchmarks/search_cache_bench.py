@@ -0,0 +1,151 @@
+"""Trace-driven hit-rate benchmark for the search result cache."""
+import random
+from typing import Dict, List
+from backend.search.cache import SearchCache
+from backend.search.search_engine import SearchResult
+from backend.benchmarks.keystroke_bench import debounced, typing_trace
+from backend.benchmarks.synthetic import ROOT, WORDS
+
+# Matches desktop-ui/static/search-history.js
+HISTORY_SIZE = 20
+
+
+class _FifoSearchCache:
+    """The previous SearchCache policy: a lookup never reorders, the oldest insert is evicted."""
+    
+    def __init__(self, cache_size: int):
+        self.cache_size = cache_size
+        self.query_cache = {}
+        self.cache_hits = 0
+        self.cache_misses = 0
+    
+    def get(self, query: str):
+        normalized_query = query.lower().strip()
+        if normalized_query in self.query_cache:
+            self.cache_hits += 1
+            return self.query_cache[normalized_query]
+        self.cache_misses += 1
+        return None
+    
+    def set(self, query: str, results: List):
+        normalized_query = query.lower().strip()
+        if len(self.query_cache) >= self.cache_size:
+            del self.query_cache[next(iter(self.query_cache))]
+        self.query_cache[normalized_query] = results
+
+
+def history_trace(searches: int, seed: int = 5, popular: int = 200) -> List[str]:
+    """
+    Generate the queries a user session sends to /api/search.
+    
+    Each search is one of: picking a recent search from the history
+    dropdown (biased to the top), typing one of a few hundred habitual
+    queries (Zipf-distributed), or typing something new. Typed searches
+    send their debounced keystroke prefixes too.
+    
+    Args:
+        searches: Number of searches (the trace holds more queries)
+        seed: Random seed
+        popular: Number of habitual queries
+        
+    Returns:
+        Queries in the order they are sent
+    """
+    rng = random.Random(seed)
+    habitual = [' '.join(rng.sample(WORDS, rng.choice((1, 2)))) for _ in range(popular)]
+    weights = [1 / (rank + 1) for rank in range(popular)]
+    history: List[str] = []
+    queries = []
+    
+    for _ in range(searches):
+        roll = rng.random()
+        if history and roll < 0.3:
+            # History dropdown click sends the full query at once
+            query = history[min(int(rng.expovariate(0.4)), len(history) - 1)]
+            queries.append(query)
+        else:
+            sent = debounced(typing_trace(rng), 150)
+            if roll < 0.65:
+                # Retype a habitual query instead of the trace's target
+                target = rng.choices(habitual, weights)[0]
+                sent = [target[:len(q)] for q in sent if len(q) < len(target)] + [target]
+            queries.extend(sent)
+            query = sent[-1]
+        
+        # Deduplicate and keep the most recent first, like SearchHistory.addSearch
+        if query in history:
+            history.remove(query)
+        history.insert(0, query)
+        del history[HISTORY_SIZE:]
+    
+    return queries
+
+
+def _results_for(query: str) -> List[SearchResult]:
+    """Build a result list shaped like a real one (short queries fill the page)."""
+    count = max(3, 50 - 3 * len(query))
+    return [
+        SearchResult(
+            name=f"{query}_{i}.txt",
+            path=f"{ROOT}/{query}/folder{i}/{query}_{i}.txt",
+            extension='.txt',
+            modified_time=0,
+            score=90.0
+        )
+        for i in range(count)
+    ]
+
+
+def run_search_cache_benchmark(capacities: List[int], searches: int = 20000, seed: int = 5) -> Dict:
+    """
+    Replay one history trace through the old FIFO policy and the LRU cache.
+    
+    Args:
+        capacities: Entry limits to compare
+        searches: Number of searches in the trace
+        seed: Random seed
+        
+    Returns:
+        Trace size and per-capacity hit rates, evictions and bytes
+    """
+    queries = history_trace(searches, seed)
+    results = []
+    
+    for capacity in capacities:
+        fifo = _FifoSearchCache(capacity)
+        lru = SearchCache(capacity)
+        peak_bytes = 0
+        
+        for query in queries:
+            for cache in (fifo, lru):
+                if cache.get(query) is None:
+                    cache.set(query, _results_for(query.lower().strip()))
+            peak_bytes = max(peak_bytes, lru.bytes)
+        
+        stats = lru.get_stats()
+        results.append({
+            'capacity': capacity,
+            'fifo_hit_rate': fifo.cache_hits / len(queries) * 100,
+            'lru_hit_rate': stats['hit_rate'],
+            'evictions': stats['evictions'],
+            'peak_bytes': peak_bytes
+        })
+    
+    # Byte budget alone: the entry limit never binds, so memory decides what stays
+    budget = max(1, peak_bytes // 4)
+    bounded = SearchCache(len(queries), max_bytes=budget)
+    for query in queries:
+        if bounded.get(query) is None:
+            bounded.set(query, _results_for(query.lower().strip()))
+    
+    return {
+        'queries': len(queries),
+        'distinct': len(set(q.lower().strip() for q in queries)),
+        'capacities': results,
+        'byte_budget': {
+            'max_bytes': budget,
+            'entries': len(bounded.query_cache),
+            'hit_rate': bounded.get_stats()['hit_rate'],
+            'evictions': bounded.evictions
+        }
+    }
@@ -0,0 +1,45 @@
+"""Synthetic file index generation for benchmarks."""
+import os
+import random
+import time
+from typing import Dict, Iterator
+
+WORDS = [
+    'report', 'invoice', 'budget', 'photo', 'draft', 'notes', 'final', 'summary',
+    'proj2024', 'data', 'backup', 'readme', 'meeting', 'contract', 'resume', 'scan',
+    'holiday', 'export', 'design', 'minutes', 'slides', 'config', 'release', 'client'
+]
+ROOT = os.path.join(os.path.expanduser('~'), 'bench')
+EXTENSIONS = ['.pdf', '.docx', '.txt', '.xlsx', '.jpg', '.png', '.py', '.md', '.zip', '']
+
+
+def synthetic_files(count: int, seed: int = 42, directories: int = 5000) -> Iterator[Dict]:
+    """
+    Generate file dictionaries shaped like Database.get_all_files rows.
+    
+    Args:
+        count: Number of files to generate
+        seed: Random seed for reproducible names
+        directories: Number of distinct parent directories
+        
+    Yields:
+        File dictionaries
+    """
+    rng = random.Random(seed)
+    size_rng = random.Random(seed + 1)  # Separate stream so names don't depend on sizes
+    now = int(time.time())
+    dirs = [
+        os.path.join(ROOT, rng.choice(WORDS), f"{rng.choice(WORDS)}{i}")
+        for i in range(directories)
+    ]
+    
+    for i in range(count):
+        extension = rng.choice(EXTENSIONS)
+        name = f"{rng.choice(WORDS)}_{rng.choice(WORDS)}{i}{extension}"
+        yield {
+            'name': name,
+            'path': dirs[i % directories] + os.sep + name,
+            'extension': extension,
+            'modified_time': now - rng.randint(0, 3 * 365 * 86400),
+            'size': int(2 ** size_rng.uniform(6, 30))
+        }
@@ -4,7 +4,10 @@ import time
 from pathlib import Path
 from backend.database.database import Database
 from backend.indexer.indexer import FileIndexer
-from backend.search.search_engine import SearchEngine
+from backend.search.search_engine import SEARCH_MODES, SEARCH_TIERS, SearchEngine
+from backend.search.columns import FileColumns
+from backend.search.versions import IndexVersions
+from backend.search.filters import SearchFilters
 from backend.config.config import Config
 
 
@@ -17,24 +20,50 @@ def cli():
 @cli.command()
 @click.argument('directories', nargs=-1, type=click.Path(exists=True))
 @click.option('--clear', is_flag=True, help='Clear existing index before indexing')
-def index(directories, clear):
-    """Index one or more directories."""
+@click.option('--workers', default=Config.INDEX_WORKERS, show_default=True, help='Directory scanner threads')
+@click.option('--trust-dir-mtime', is_flag=True,
+              help='Skip stat() in directories unchanged since the last run (in-place edits are left to the watcher)')
+def index(directories, clear, workers, trust_dir_mtime):
+    """Index one or more directories.
+    
+    Without --clear, the scan is reconciled against the existing index and
+    only new, changed and vanished files are written.
+    """
     if not directories:
         directories = Config.DEFAULT_DIRECTORIES
         click.echo(f"No directories specified. Using defaults: {', '.join(directories)}")
     
     db = Database()
+    indexer = FileIndexer(workers=workers)
+    start_time = time.time()
     
-    if clear:
-        click.echo("Clearing existing index...")
-        db.clear_index()
+    if not clear:
+        from backend.indexer.reconcile import IndexReconciler
+        
+        with db.bulk_load():
+            reconciler = IndexReconciler(db, indexer, trust_dir_mtime=trust_dir_mtime)
+            counts = reconciler.reconcile(list(directories))
+        
+        elapsed = time.time() - start_time
+        scanned = counts['added'] + counts['updated'] + counts['unchanged']
+        rate = scanned / elapsed if elapsed > 0 else 0
+        
+        click.echo(f"\n✓ Reconciled {scanned:,} files in {elapsed:.2f} seconds ({rate:,.0f} files/sec)")
+        click.echo(f"  Added: {counts['added']:,}  Updated: {counts['updated']:,}  "
+                   f"Removed: {counts['removed']:,}  Unchanged: {counts['unchanged']:,}")
+        if trust_dir_mtime:
+            click.echo(f"  Directories trusted unchanged: {counts['skipped_dirs']:,}")
+        click.echo(f"  Database: {db.db_path}")
+        _write_snapshot(db)
+        db.close()
+        return
     
-    indexer = FileIndexer()
+    click.echo("Clearing existing index...")
+    db.clear_index()
     total_indexed = 0
     
-    start_time = time.time()
-    
-    with click.progressbar(
+    # A cleared table is loaded without secondary indexes, which are rebuilt once at the end
+    with db.bulk_load(defer_indexes=True), click.progressbar(
         indexer.index_directories(list(directories)),
         label='Indexing files',
         item_show_func=lambda x: f"{total_indexed} files indexed" if x else ""
@@ -44,32 +73,66 @@ def index(directories, clear):
             total_indexed += inserted
     
     elapsed = time.time() - start_time
+    rate = total_indexed / elapsed if elapsed > 0 else 0
     
-    click.echo(f"\n✓ Indexed {total_indexed} files in {elapsed:.2f} seconds")
+    click.echo(f"\n✓ Indexed {total_indexed} files in {elapsed:.2f} seconds ({rate:,.0f} rows/sec)")
     click.echo(f"  Database: {db.db_path}")
+    _write_snapshot(db)
     
     db.close()
 
 
+def _write_snapshot(db: Database):
+    """Refresh the startup snapshot so the next service start is warm."""
+    from backend.search.snapshot_file import SnapshotFile
+    
+    start_time = time.time()
+    columns = FileColumns.from_rows(db.get_all_file_rows())
+    try:
+        SnapshotFile(Config.SNAPSHOT_PATH).write(columns, db.get_fingerprint())
+    except OSError as e:
+        click.echo(f"  Snapshot not written: {e}")
+        return
+    click.echo(f"  Snapshot: {Config.SNAPSHOT_PATH} ({(time.time() - start_time) * 1000:.0f}ms)")
+
+
 @cli.command()
 @click.argument('query')
 @click.option('--limit', default=10, help='Maximum number of results')
-def search(query, limit):
+@click.option('--ext', multiple=True, help='Only files with this extension (repeatable)')
+@click.option('--min-size', type=int, help='Minimum file size in bytes')
+@click.option('--max-size', type=int, help='Maximum file size in bytes')
+@click.option('--days', type=int, help='Only files modified in the last N days')
+@click.option('--under', help='Only files under this directory')
+@click.option('--mode', type=click.Choice(SEARCH_MODES), default='name',
+              help="'path' lets query words match directory names too")
+def search(query, limit, ext, min_size, max_size, days, under, mode):
     """Search for files by name."""
+    try:
+        filters = SearchFilters.from_dict({
+            'extensions': list(ext) or None,
+            'min_size': min_size,
+            'max_size': max_size,
+            'modified_after': time.time() - days * 86400 if days else None,
+            'directory': under
+        })
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    
     db = Database()
     
     # Load index
-    files = db.get_all_files()
+    rows = db.get_all_file_rows()
     
-    if not files:
+    if not rows:
         click.echo("No files indexed. Run 'index' command first.")
         db.close()
         return
     
     # Perform search
     start_time = time.time()
-    engine = SearchEngine(files)
-    results = engine.search(query)
+    engine = SearchEngine.from_columns(FileColumns.from_rows(rows))
+    results = engine.search(query, filters, mode=mode)
     elapsed = (time.time() - start_time) * 1000  # Convert to ms
     
     # Display results
@@ -93,18 +156,33 @@ def stats():
     click.echo(f"\n📊 Index Statistics")
     click.echo(f"   Database: {db.db_path}")
     click.echo(f"   Total files: {file_count:,}")
+    click.echo(f"   Directories: {db.get_directory_count():,}")
     
     if file_count > 0:
         # Get some sample data
-        files = db.get_all_files()
+        columns = FileColumns.from_rows(db.get_all_file_rows())
         extensions = {}
-        for f in files:
-            ext = f['extension'] or 'no extension'
+        for ext in columns.extensions:
+            ext = ext or 'no extension'
             extensions[ext] = extensions.get(ext, 0) + 1
         
         click.echo(f"\n   Top file types:")
         for ext, count in sorted(extensions.items(), key=lambda x: x[1], reverse=True)[:5]:
             click.echo(f"     {ext}: {count:,}")
+        
+        # In-memory footprint of the search index, as the service holds it:
+        # a published engine plus the standby copy updates are applied to
+        versions = IndexVersions(SearchEngine.from_columns(columns, use_cache=False))
+        pair = versions.get_memory_stats()
+        memory = pair['published']
+        click.echo(f"\n   Search index memory:")
+        click.echo(f"     Columns: {memory['total_bytes'] / 1024 / 1024:.1f} MB ({memory['bytes_per_file']:.0f} bytes/file, "
+                   f"{memory['directory_count']:,} directories)")
+        for column, size in memory['columns'].items():
+            click.echo(f"       {column}: {size / file_count:.0f} bytes/file")
+        click.echo(f"     Trigram index: {memory['trigram_bytes'] / 1024 / 1024:.1f} MB ({memory.get('trigram_bytes_per_file', 0):.0f} bytes/file)")
+        click.echo(f"     Standby copy: {pair['standby_bytes'] / 1024 / 1024:.1f} MB (copied in {versions.clone_ms:.0f}ms; strings are shared)")
+        click.echo(f"     Total: {pair['total_bytes'] / 1024 / 1024:.1f} MB")
     
     db.close()
 
@@ -113,27 +191,39 @@ def stats():
 @click.argument('query')
 @click.option('--iterations', default=100, help='Number of search iterations')
 def benchmark(query, iterations):
-    """Benchmark search performance."""
+    """Benchmark search performance, broken down by search tier."""
     db = Database()
-    files = db.get_all_files()
+    rows = db.get_all_file_rows()
     
-    if not files:
+    if not rows:
         click.echo("No files indexed. Run 'index' command first.")
         db.close()
         return
     
-    engine = SearchEngine(files)
+    # Uncached, so every iteration runs the tiers
+    engine = SearchEngine.from_columns(FileColumns.from_rows(rows), use_cache=False)
+    
+    def run(tiered):
+        engine.tiered = tiered
+        times = []
+        tier_times = {tier: [] for tier in SEARCH_TIERS}
+        for _ in range(iterations):
+            start = time.time()
+            engine.search(query)
+            times.append((time.time() - start) * 1000)
+            if tiered:
+                for tier, stats in engine.last_tiers.items():
+                    tier_times[tier].append(stats['ms'])
+        times.sort()
+        return times, tier_times
     
     click.echo(f"Running {iterations} searches for '{query}'...")
+    engine.search(query)  # Build the lazily built indexes first
+    times, tier_times = run(True)
+    tiers = engine.last_tiers or {}
+    candidates = engine.last_candidate_count
+    fuzzy_times, _ = run(False)
     
-    times = []
-    for _ in range(iterations):
-        start = time.time()
-        engine.search(query)
-        elapsed = (time.time() - start) * 1000
-        times.append(elapsed)
-    
-    times.sort()
     avg = sum(times) / len(times)
     p50 = times[len(times) // 2]
     p95 = times[int(len(times) * 0.95)]
@@ -147,6 +237,26 @@ def benchmark(query, iterations):
     click.echo(f"   Min: {min(times):.2f}ms")
     click.echo(f"   Max: {max(times):.2f}ms")
     
+    click.echo(f"\n🪜 By tier:")
+    for tier in SEARCH_TIERS:
+        if tier not in tiers:
+            click.echo(f"   {tier.capitalize():<10} skipped (earlier tiers filled {engine.max_results} results)")
+            continue
+        ms = sorted(tier_times[tier])
+        click.echo(
+            f"   {tier.capitalize():<10} {tiers[tier]['hits']:>7,} hits   "
+            f"avg {sum(ms) / len(ms):.2f}ms   p95 {ms[int(len(ms) * 0.95)]:.2f}ms"
+        )
+    fuzzy_p50 = fuzzy_times[len(fuzzy_times) // 2]
+    fuzzy_p95 = fuzzy_times[int(len(fuzzy_times) * 0.95)]
+    click.echo(f"   Fuzzy only (no tiers): p50 {fuzzy_p50:.2f}ms, p95 {fuzzy_p95:.2f}ms")
+    
+    if candidates is not None:
+        pct = candidates / len(rows) * 100
+        click.echo(f"\n🔎 Candidate set: {candidates:,} of {len(rows):,} files ({pct:.1f}%)")
+        if 'fuzzy' in tiers and engine.trigram_index.candidates(query.lower().strip()) is None:
+            click.echo(f"   Query too short for trigram narrowing (full scan)")
+    
     if p95 < 100:
         click.echo(f"\n✓ Performance target met! (p95 < 100ms)")
     else:
@@ -194,6 +304,147 @@ def watch(directories):
         click.echo(f"✓ Stopped")
 
 
+@cli.group()
+def bench():
+    """Micro-benchmarks for index internals."""
+    pass
+
+
+@bench.command('index-cache')
+@click.option('--sizes', default='100000,1000000,5000000', help='Comma-separated index sizes')
+@click.option('--events', default=10000, help='Events to apply per size')
+def bench_index_cache(sizes, events):
+    """Measure watcher event-apply cost on IndexCache."""
+    from backend.benchmarks.index_cache_bench import run_index_cache_benchmark
+    
+    sizes = [int(s) for s in sizes.split(',') if s.strip()]
+    click.echo(f"Applying {events:,} mixed events at {len(sizes)} index sizes...\n")
+    
+    for result in run_index_cache_benchmark(sizes, events):
+        per_op = result['per_op_us']
+        click.echo(f"   {result['size']:>10,} files: mean {result['mean_us']:.2f}µs, p99 {result['p99_us']:.2f}µs "
+                   f"(create {per_op['create']:.2f}µs, modify {per_op['modify']:.2f}µs, delete {per_op['delete']:.2f}µs)")
+
+
+@bench.command('event-storm')
+@click.option('--events', default=100000, help='Number of synthetic events')
+@click.option('--paths', default=20000, help='Distinct paths the events touch')
+@click.option('--legacy-events', default=5000, help='Events to run through the old debounce (0 to skip)')
+def bench_event_storm(events, paths, legacy_events):
+    """Drive the watcher event handler with a synthetic event storm."""
+    from backend.benchmarks.event_storm_bench import run_event_storm_benchmark
+    
+    click.echo(f"Dispatching {events:,} events over {paths:,} paths...")
+    result = run_event_storm_benchmark(events, paths, legacy_events)
+    
+    click.echo(f"\n⚡ Handler: {result['events_per_sec']:,.0f} events/sec ({result['per_event_us']:.2f}µs/event)")
+    click.echo(f"   Delivered to callbacks: {result['delivered']:,}")
+    click.echo(f"   Debounce keys tracked: {result['tracked_keys']:,}")
+    if 'legacy_per_event_us' in result:
+        click.echo(f"   Legacy debounce ({result['legacy_events']:,} events): {result['legacy_per_event_us']:.2f}µs/event")
+
+
+@bench.command('memory')
+@click.option('--files', 'count', default=1000000, help='Number of synthetic files')
+def bench_memory(count):
+    """Compare index memory as per-file dicts vs compact columns."""
+    from backend.benchmarks.memory_bench import run_memory_benchmark
+    
+    click.echo(f"Measuring index representations at {count:,} synthetic files...\n")
+    result = run_memory_benchmark(count)
+    
+    for label, key in (('List[Dict] rows', 'dict_rows'), ('FileColumns', 'columns')):
+        stats = result[key]
+        click.echo(f"   {label:<16} {stats['bytes'] / 1024 / 1024:8.1f} MB  ({stats['bytes_per_file']:.0f} bytes/file)")
+    click.echo(f"   Saved: {result['saved_pct']:.1f}% ({result['directories']:,} interned directories)")
+    
+    click.echo(f"\n   Per-record objects:")
+    for name, sizes in result['records'].items():
+        click.echo(f"     {name}: {sizes['dict']} bytes with __dict__, {sizes['slots']} bytes with __slots__")
+
+
+@bench.command('keystrokes')
+@click.option('--files', 'count', default=300000, help='Number of synthetic files')
+@click.option('--traces', default=200, help='Typing traces to replay')
+@click.option('--debounce', default=150.0, help='UI debounce in milliseconds')
+def bench_keystrokes(count, traces, debounce):
+    """Replay search-as-you-type traces with and without prefix reuse."""
+    from backend.benchmarks.keystroke_bench import run_keystroke_benchmark
+    
+    click.echo(f"Replaying {traces} typing traces over {count:,} synthetic files...")
+    result = run_keystroke_benchmark(count, traces, debounce)
+    
+    click.echo(f"\n⚡ {result['queries']:,} debounced queries, {result['prefix_reuses']:,} narrowed from the previous one")
+    for label, key in (('Search', 'search'), ('Candidate selection', 'selection')):
+        full, session = result[key]['full'], result[key]['session']
+        click.echo(f"   {label}:")
+        click.echo(f"     full:    mean {full['mean_ms']:.2f}ms, p95 {full['p95_ms']:.2f}ms, total {full['total_ms']:.0f}ms")
+        click.echo(f"     session: mean {session['mean_ms']:.2f}ms, p95 {session['p95_ms']:.2f}ms, total {session['total_ms']:.0f}ms")
+    click.echo(f"   Result mismatches: {result['mismatches']}")
+
+
+@bench.command('search-cache')
+@click.option('--capacities', default='50,100,250,1000', help='Comma-separated cache entry limits')
+@click.option('--searches', default=20000, help='Searches in the replayed trace')
+def bench_search_cache(capacities, searches):
+    """Compare query cache hit rates: old FIFO policy vs LRU."""
+    from backend.benchmarks.search_cache_bench import run_search_cache_benchmark
+    
+    capacities = sorted(int(c) for c in capacities.split(',') if c.strip())
+    result = run_search_cache_benchmark(capacities, searches)
+    click.echo(f"Replayed {result['queries']:,} queries ({result['distinct']:,} distinct) from {searches:,} searches\n")
+    
+    for entry in result['capacities']:
+        click.echo(f"   {entry['capacity']:>6,} entries: FIFO {entry['fifo_hit_rate']:5.1f}%  LRU {entry['lru_hit_rate']:5.1f}%  "
+                   f"({entry['evictions']:,} evictions, peak {entry['peak_bytes'] / 1024:,.0f} KB)")
+    
+    budget = result['byte_budget']
+    click.echo(f"\n   LRU with a {budget['max_bytes'] / 1024:,.0f} KB budget: {budget['hit_rate']:.1f}% "
+               f"({budget['entries']:,} entries kept, {budget['evictions']:,} evictions)")
+
+
+@bench.command('parallel-search')
+@click.option('--files', 'count', default=2000000, help='Number of synthetic files')
+@click.option('--max-workers', default=Config.SEARCH_WORKERS, help='Largest thread count to measure')
+@click.option('--iterations', default=3, help='Runs of the query mix per thread count')
+def bench_parallel_search(count, max_workers, iterations):
+    """Measure sharded search scaling from 1 to N threads."""
+    from backend.benchmarks.parallel_search_bench import run_parallel_search_benchmark
+    
+    click.echo(f"Searching {count:,} synthetic files with 1 to {max_workers} threads...")
+    try:
+        result = run_parallel_search_benchmark(count, max_workers, iterations)
+    except RuntimeError as e:
+        click.echo(f"  {e}")
+        return
+    
+    click.echo(f"\n⚡ {result['queries']} searches per thread count:")
+    for entry in result['scaling']:
+        click.echo(f"   {entry['workers']:>2} threads: mean {entry['mean_ms']:7.1f}ms, p50 {entry['p50_ms']:7.1f}ms, "
+                   f"max {entry['max_ms']:7.1f}ms  ({entry['speedup']:.2f}x, {entry['mismatches']} mismatched queries)")
+
+
+@bench.command('load')
+@click.option('--url', default=f'http://{Config.SERVER_HOST}:5000', help='Base URL of a running desktop UI server')
+@click.option('--clients', default='1,4,16', help='Comma-separated concurrent client counts')
+@click.option('--traces', default=20, help='Typing traces per client')
+@click.option('--endpoint', type=click.Choice(['search', 'stream']), default='search', help='Search API to load')
+@click.option('--think', is_flag=True, help='Pause between queries at typing speed instead of sending back to back')
+def bench_load(url, clients, traces, endpoint, think):
+    """Load /api/search on a running server with concurrent typing clients."""
+    from backend.benchmarks.load_bench import run_load_benchmark
+    
+    for count in sorted(int(c) for c in clients.split(',') if c.strip()):
+        result = run_load_benchmark(url, count, traces, endpoint, think=think)
+        latency = result['latency']
+        click.echo(f"   {count:>3} clients: {result['requests']:,} requests, {result['throughput']:.0f} req/s, "
+                   f"p50 {latency['p50_ms']:.1f}ms, p99 {latency['p99_ms']:.1f}ms, max {latency['max_ms']:.1f}ms"
+                   + (f", {result['errors']} errors ({result['first_error']})" if result['errors'] else ''))
+        if 'first_tier' in result:
+            first = result['first_tier']
+            click.echo(f"               first tier: p50 {first['p50_ms']:.1f}ms, p99 {first['p99_ms']:.1f}ms")
+
+
 if __name__ == '__main__':
     cli()
 
@@ -8,6 +8,9 @@ class Config:
     
     # Database
     DB_PATH = Path.home() / ".fast-search" / "index.db"
+    SNAPSHOT_PATH = Path.home() / ".fast-search" / "index.snapshot"
+    DB_READERS = 4  # Read-only connections shared by the service's threads
+    DB_WRITE_BATCH = 64  # Queued write calls committed in one transaction
     
     # Indexing
     DEFAULT_DIRECTORIES: List[str] = [
@@ -34,10 +37,33 @@ class Config:
     # Search
     MAX_RESULTS = 50
     FUZZY_THRESHOLD = 60  # Minimum match score (0-100)
+    TIERED_SEARCH = True  # Rank exact prefix, then substring hits ahead of fuzzy matches
+    TRIGRAM_MIN_QUERY_LENGTH = 4  # Shorter queries fall back to a full scan
+    TRIGRAM_MIN_OVERLAP = 0.25  # Fraction of query trigrams a candidate must share
+    SEARCH_SESSIONS = 16  # Sessions whose last query's candidates are kept for reuse
+    SEARCH_WORKERS = min(8, os.cpu_count() or 1)  # Threads for sharded scoring (needs numpy)
+    PARALLEL_SEARCH_MIN_NAMES = 250000  # Names to score before a search is sharded
+    RANKED_LIST_DEPTH = 1000  # Results ranked up front for paging
+    RANKED_LISTS_CACHED = 32  # Ranked lists kept for paging, least recently used dropped
     
     # Performance
     BATCH_SIZE = 1000  # Files to insert at once
+    INDEX_WORKERS = min(8, os.cpu_count() or 1)  # Directory scanner threads
     CACHE_SIZE = 1000  # Number of queries to cache
+    CACHE_MAX_BYTES = 32 * 1024 * 1024  # Estimated bytes of cached results (0 for no limit)
+    CACHE_TTL_SECONDS = 0  # Lifetime of a cached query (0 to keep until evicted)
+    
+    # Desktop UI server
+    SERVER_HOST = '127.0.0.1'
+    SERVER_THREADS = 8  # Request threads (waitress); the werkzeug fallback starts one per request
+    
+    # Background indexing jobs
+    INDEX_JOB_HISTORY = 20  # Finished jobs kept for progress queries
+    JOB_PROGRESS_INTERVAL = 0.5  # Seconds between streamed progress updates
+    
+    # File watching
+    WATCHER_COALESCE_SECONDS = 0.5  # Window for coalescing events per path
+    WATCHER_MAX_BATCH = 5000  # Pending paths that force an early apply
     
     @classmethod
     def ensure_db_directory(cls):
@@ -1,7 +1,9 @@
 """Database operations for file indexing."""
+import os
 import sqlite3
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
 from backend.config.config import Config
 
@@ -9,82 +11,327 @@ from backend.config.config import Config
 class FileMetadata:
     """File metadata structure."""
     
-    def __init__(self, name: str, path: str, extension: str, modified_time: int):
+    __slots__ = ('name', 'path', 'extension', 'modified_time', 'size')
+    
+    def __init__(self, name: str, path: str, extension: str, modified_time: int, size: int = 0):
         self.name = name
         self.path = path
         self.extension = extension
         self.modified_time = modified_time
+        self.size = size
     
     def to_dict(self) -> Dict:
         return {
             'name': self.name,
             'path': self.path,
             'extension': self.extension,
-            'modified_time': self.modified_time
+            'modified_time': self.modified_time,
+            'size': self.size
         }
 
 
+# Characters that end a directory prefix in a stored path
+_SEPARATORS = '/\\' if os.sep == '\\' else '/'
+
+
+def split_path(path: str) -> Tuple[str, str]:
+    """
+    Split a path into its directory prefix (with trailing separator) and tail.
+    
+    Unlike os.path.split, prefix + tail always reproduces the path exactly.
+    
+    Args:
+        path: Full file path
+        
+    Returns:
+        Tuple of (directory prefix, final component)
+    """
+    cut = max(path.rfind(sep) for sep in _SEPARATORS) + 1
+    return path[:cut], path[cut:]
+
+
+def file_extension(name: str) -> str:
+    """
+    Get a file name's lowercased extension, as stored in the index.
+    
+    Follows Path.suffix: a leading dot (".bashrc") or trailing dot ("foo.")
+    is not an extension. The indexer and the watcher both use this, so a
+    file gets the same extension however it was indexed.
+    
+    Args:
+        name: File name
+        
+    Returns:
+        Extension with its dot, or '' if there is none
+    """
+    dot = name.rfind('.')
+    if 0 < dot < len(name) - 1:
+        return name[dot:].lower()
+    return ''
+
+
+def prefix_bounds(directory: str) -> Tuple[str, str]:
+    """
+    Get the [low, high) path range covering everything under a directory.
+    
+    Comparing against the range (rather than LIKE 'dir%') uses the path
+    index and does not match sibling directories sharing a name prefix.
+    Stored directory prefixes end in a separator, so the range also
+    covers the directory's own row in the directories table.
+    
+    The range compares case-sensitively, unlike LIKE, so the directory
+    must be spelled as it was indexed (the watched roots are stored as
+    configured). On case-insensitive file systems a differently cased
+    spelling matches nothing rather than the tree.
+    
+    Args:
+        directory: Directory path
+        
+    Returns:
+        Tuple of (inclusive lower bound, exclusive upper bound)
+    """
+    prefix = directory.rstrip('\\/') + os.sep
+    return prefix, prefix[:-1] + chr(ord(os.sep) + 1)
+
+
 class Database:
-    """SQLite database manager for file index."""
+    """
+    SQLite database manager for file index.
+    
+    Paths are not stored per file: each distinct directory prefix (with its
+    trailing separator) is a row in `directories`, and a file row holds the
+    id of its directory plus its name, so path = directories.path || name.
+    """
+    
+    # Secondary indexes; the UNIQUE constraint on (dir_id, name) already provides the path lookup index
+    SECONDARY_INDEXES = {
+        'idx_name': "CREATE INDEX IF NOT EXISTS idx_name ON files(name)",
+        'idx_modified': "CREATE INDEX IF NOT EXISTS idx_modified ON files(modified_time DESC)",
+    }
     
-    def __init__(self, db_path: Optional[Path] = None):
+    DIRECTORIES_DDL = """
+        CREATE TABLE IF NOT EXISTS directories (
+            id INTEGER PRIMARY KEY,
+            path TEXT UNIQUE NOT NULL
+        )
+    """
+    
+    FILES_DDL = """
+        CREATE TABLE IF NOT EXISTS files (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dir_id INTEGER NOT NULL REFERENCES directories(id),
+            name TEXT NOT NULL,
+            extension TEXT,
+            modified_time INTEGER,
+            size INTEGER,
+            created_at INTEGER DEFAULT (strftime('%s', 'now')),
+            UNIQUE (dir_id, name)
+        )
+    """
+    
+    # Parameters: (directory prefix, name, extension, modified_time, size)
+    INSERT_FILE = """
+        INSERT OR REPLACE INTO files (dir_id, name, extension, modified_time, size)
+        VALUES ((SELECT id FROM directories WHERE path = ?), ?, ?, ?, ?)
+    """
+    
+    # Matches a file by (directory prefix, name)
+    WHERE_PATH = "dir_id = (SELECT id FROM directories WHERE path = ?) AND name = ?"
+    
+    SELECT_FILES = """
+        SELECT f.name, d.path || f.name AS path, f.extension, f.modified_time, f.size
+        FROM files f JOIN directories d ON d.id = f.dir_id
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None, check_same_thread: bool = True, read_only: bool = False):
+        """
+        Open the database.
+        
+        Args:
+            db_path: Database file (defaults to Config.DB_PATH)
+            check_same_thread: Restrict the connection to the creating thread
+            read_only: Open a read-only connection to an existing database,
+                skipping schema setup
+        """
         self.db_path = db_path or Config.DB_PATH
+        self.check_same_thread = check_same_thread
+        self.read_only = read_only
+        # Set while a SharedDatabase writer batches calls into one transaction
+        self.savepoint: Optional[str] = None
         Config.ensure_db_directory()
         self.conn = None
-        self._initialize_db()
+        if read_only:
+            self.conn = sqlite3.connect(f"{Path(self.db_path).as_uri()}?mode=ro", uri=True,
+                                        check_same_thread=check_same_thread)
+            self.conn.row_factory = sqlite3.Row
+        else:
+            self._initialize_db()
     
     def _initialize_db(self):
         """Create database and tables if they don't exist."""
-        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn = sqlite3.connect(str(self.db_path), check_same_thread=self.check_same_thread)
         self.conn.row_factory = sqlite3.Row
         
         cursor = self.conn.cursor()
+        cursor.execute(self.DIRECTORIES_DDL)
+        self._migrate_path_column(cursor)
+        cursor.execute(self.FILES_DDL)
+        
+        # Sizes were added after the first release; older rows stay NULL until re-indexed
+        if 'size' not in [row[1] for row in cursor.execute("PRAGMA table_info(files)")]:
+            cursor.execute("ALTER TABLE files ADD COLUMN size INTEGER")
+        
+        # Directory mtimes from the last reconcile, for skipping unchanged directories
         cursor.execute("""
-            CREATE TABLE IF NOT EXISTS files (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
-                path TEXT UNIQUE NOT NULL,
-                extension TEXT,
-                modified_time INTEGER,
-                created_at INTEGER DEFAULT (strftime('%s', 'now'))
+            CREATE TABLE IF NOT EXISTS scanned_dirs (
+                path TEXT PRIMARY KEY,
+                mtime INTEGER NOT NULL
             )
         """)
         
+        # One-row write counter, bumped by every write to files, for the fingerprint
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS file_changes (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                counter INTEGER NOT NULL
+            )
+        """)
+        cursor.execute("INSERT OR IGNORE INTO file_changes (id, counter) VALUES (0, 0)")
+        
         # Create indexes for faster queries
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_name ON files(name)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_path ON files(path)")
-        cursor.execute("CREATE INDEX IF NOT EXISTS idx_modified ON files(modified_time DESC)")
+        for ddl in self.SECONDARY_INDEXES.values():
+            cursor.execute(ddl)
+        
+        # idx_path indexed the old path column; drop it from older databases
+        cursor.execute("DROP INDEX IF EXISTS idx_path")
         
         self.conn.commit()
     
+    def _migrate_path_column(self, cursor: sqlite3.Cursor):
+        """Move a files table with a full path column onto directory ids, in one transaction."""
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(files)")]
+        if 'path' not in columns:
+            return
+        
+        print("[Database] Migrating files table to directory ids...")
+        cursor.execute("BEGIN")
+        try:
+            # Indexes follow the renamed table and are dropped with it
+            cursor.execute("ALTER TABLE files RENAME TO files_old")
+            cursor.execute(self.FILES_DDL)
+            
+            read = self.conn.cursor()
+            read.row_factory = None
+            read.execute("SELECT id, path, extension, modified_time, created_at FROM files_old ORDER BY id")
+            migrated = 0
+            while True:
+                rows = read.fetchmany(Config.BATCH_SIZE)
+                if not rows:
+                    break
+                split_rows = [(row[0], *split_path(row[1]), *row[2:]) for row in rows]
+                cursor.executemany("INSERT OR IGNORE INTO directories (path) VALUES (?)",
+                                   {(row[1],) for row in split_rows})
+                cursor.executemany("""
+                    INSERT INTO files (id, dir_id, name, extension, modified_time, created_at)
+                    VALUES (?, (SELECT id FROM directories WHERE path = ?), ?, ?, ?, ?)
+                """, split_rows)
+                migrated += len(rows)
+            
+            cursor.execute("DROP TABLE files_old")
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        print(f"[Database] Migrated {migrated} files")
+    
+    def _commit(self):
+        """Commit a write, unless it is part of a batched transaction."""
+        if self.savepoint is None:
+            self.conn.commit()
+    
+    def _count_change(self):
+        """Bump the write counter in the current transaction (own cursor, so rowcounts survive)."""
+        self.conn.execute("UPDATE file_changes SET counter = counter + 1")
+    
+    def _rollback(self):
+        """Undo a failed write: back to its savepoint when batched, else the whole transaction."""
+        if self.savepoint is None:
+            self.conn.rollback()
+        else:
+            self.conn.execute(f"ROLLBACK TO {self.savepoint}")
+    
+    def _upsert_rows(self, cursor: sqlite3.Cursor, files: List[FileMetadata]) -> List[Tuple]:
+        """Register the files' directories and build rows for INSERT_FILE."""
+        rows = [(*split_path(f.path), f.extension, f.modified_time, f.size) for f in files]
+        cursor.executemany("INSERT OR IGNORE INTO directories (path) VALUES (?)", {(row[0],) for row in rows})
+        return rows
+    
+    @contextmanager
+    def bulk_load(self, defer_indexes: bool = False):
+        """
+        Tune the connection for a large batch of inserts.
+        
+        Switches to WAL with synchronous=OFF for the duration, and optionally
+        drops the secondary indexes so they are built once at the end instead
+        of maintained row by row (only worth it when loading into an empty table).
+        
+        Args:
+            defer_indexes: Drop secondary indexes during the load
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=OFF")
+        if defer_indexes:
+            for name in self.SECONDARY_INDEXES:
+                cursor.execute(f"DROP INDEX IF EXISTS {name}")
+            self.conn.commit()
+        
+        try:
+            yield self
+        finally:
+            if defer_indexes:
+                for ddl in self.SECONDARY_INDEXES.values():
+                    cursor.execute(ddl)
+                self.conn.commit()
+            cursor.execute("PRAGMA synchronous=NORMAL")
+    
     def insert_files(self, files: List[FileMetadata]) -> int:
-        """Batch insert files into database."""
+        """Batch insert files into database in one transaction."""
         cursor = self.conn.cursor()
-        inserted = 0
         
+        try:
+            rows = self._upsert_rows(cursor, files)
+            cursor.executemany(self.INSERT_FILE, rows)
+            self._count_change()
+            self._commit()
+            return len(rows)
+        except sqlite3.Error:
+            self._rollback()
+        
+        # Fall back to row-by-row so one bad row doesn't lose the batch
+        inserted = 0
         for file in files:
             try:
-                cursor.execute("""
-                    INSERT OR REPLACE INTO files (name, path, extension, modified_time)
-                    VALUES (?, ?, ?, ?)
-                """, (file.name, file.path, file.extension, file.modified_time))
+                cursor.executemany(self.INSERT_FILE, self._upsert_rows(cursor, [file]))
                 inserted += 1
             except sqlite3.Error as e:
                 print(f"Error inserting {file.path}: {e}")
         
-        self.conn.commit()
+        self._count_change()
+        self._commit()
         return inserted
     
     def update_file(self, path: str, metadata: FileMetadata) -> bool:
-        """Update a single file's metadata."""
+        """Update a single file's metadata (the name is part of the path)."""
         cursor = self.conn.cursor()
         try:
-            cursor.execute("""
+            cursor.execute(f"""
                 UPDATE files 
-                SET name = ?, extension = ?, modified_time = ?
-                WHERE path = ?
-            """, (metadata.name, metadata.extension, metadata.modified_time, path))
-            self.conn.commit()
+                SET extension = ?, modified_time = ?, size = ?
+                WHERE {self.WHERE_PATH}
+            """, (metadata.extension, metadata.modified_time, metadata.size, *split_path(path)))
+            self._count_change()
+            self._commit()
             return cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error updating {path}: {e}")
@@ -94,30 +341,226 @@ class Database:
         """Remove a file from the index."""
         cursor = self.conn.cursor()
         try:
-            cursor.execute("DELETE FROM files WHERE path = ?", (path,))
-            self.conn.commit()
+            cursor.execute(f"DELETE FROM files WHERE {self.WHERE_PATH}", split_path(path))
+            self._count_change()
+            self._commit()
             return cursor.rowcount > 0
         except sqlite3.Error as e:
             print(f"Error deleting {path}: {e}")
             return False
     
+    def apply_changes(self, upserts: List[FileMetadata], deleted_paths: List[str]) -> Tuple[int, int]:
+        """
+        Apply a batch of inserts/updates and deletes in one transaction.
+        
+        Args:
+            upserts: Files to insert or replace
+            deleted_paths: Paths to remove
+            
+        Returns:
+            Tuple of (rows upserted, rows deleted)
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.INSERT_FILE, self._upsert_rows(cursor, upserts))
+            upserted = len(upserts)
+            
+            cursor.executemany(f"DELETE FROM files WHERE {self.WHERE_PATH}", map(split_path, deleted_paths))
+            deleted = cursor.rowcount if deleted_paths else 0
+            
+            self._count_change()
+            self._commit()
+            return upserted, deleted
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error applying batch of {len(upserts) + len(deleted_paths)} changes: {e}")
+            return 0, 0
+    
+    def apply_diff(self, added: List[FileMetadata], updated: List[FileMetadata], removed: List[str]) -> bool:
+        """
+        Write a reconcile diff in one transaction.
+        
+        Changed rows are updated in place so their row ids survive; only new
+        rows are inserted and only vanished rows are deleted.
+        
+        Args:
+            added: New files
+            updated: Files whose metadata changed
+            removed: Paths that no longer exist
+            
+        Returns:
+            True if the diff was committed
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.executemany(self.INSERT_FILE, self._upsert_rows(cursor, added))
+            cursor.executemany(f"""
+                UPDATE files SET extension = ?, modified_time = ?, size = ?
+                WHERE {self.WHERE_PATH}
+            """, [(f.extension, f.modified_time, f.size, *split_path(f.path)) for f in updated])
+            cursor.executemany(f"DELETE FROM files WHERE {self.WHERE_PATH}", map(split_path, removed))
+            self._count_change()
+            self._commit()
+            return True
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error applying diff ({len(added)} added, {len(updated)} updated, {len(removed)} removed): {e}")
+            return False
+    
+    def get_tree_files(self, directory: str) -> List[Tuple[str, str, str, int, Optional[int]]]:
+        """
+        Get every file under a directory as (name, path, extension, modified_time, size) tuples.
+        
+        Uses a range on the directories path index, so only the subtree's
+        directory rows and their files are visited.
+        """
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute(self.SELECT_FILES + " WHERE d.path >= ? AND d.path < ? ORDER BY f.id", (low, high))
+        return cursor.fetchall()
+    
+    def count_tree(self, directory: str) -> int:
+        """Count the files under a directory."""
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*) FROM files WHERE dir_id IN (
+                SELECT id FROM directories WHERE path >= ? AND path < ?
+            )
+        """, (low, high))
+        return cursor.fetchone()[0]
+    
+    def get_file_mtimes(self, directory: str) -> Dict[str, int]:
+        """Get path -> modified_time for every file under a directory."""
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT d.path || f.name, f.modified_time
+            FROM directories d JOIN files f ON f.dir_id = d.id
+            WHERE d.path >= ? AND d.path < ?
+        """, (low, high))
+        return dict(cursor.fetchall())
+    
+    def get_file_stats(self, directory: str) -> Dict[str, Tuple[int, Optional[int]]]:
+        """Get path -> (modified_time, size) for every file under a directory."""
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("""
+            SELECT d.path || f.name, f.modified_time, f.size
+            FROM directories d JOIN files f ON f.dir_id = d.id
+            WHERE d.path >= ? AND d.path < ?
+        """, (low, high))
+        return {path: (mtime, size) for path, mtime, size in cursor}
+    
+    def get_dir_mtimes(self, directory: str) -> Dict[str, int]:
+        """Get path -> mtime recorded for a directory and its subdirectories."""
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "SELECT path, mtime FROM scanned_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (directory, low, high)
+        )
+        return dict(cursor.fetchall())
+    
+    def replace_dir_mtimes(self, directory: str, dir_mtimes: Dict[str, int]):
+        """Replace the recorded directory mtimes for a directory tree."""
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        cursor.execute(
+            "DELETE FROM scanned_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+            (directory, low, high)
+        )
+        cursor.executemany("INSERT OR REPLACE INTO scanned_dirs (path, mtime) VALUES (?, ?)", dir_mtimes.items())
+        self._commit()
+    
     def get_all_files(self) -> List[Dict]:
         """Retrieve all indexed files."""
         cursor = self.conn.cursor()
-        cursor.execute("SELECT name, path, extension, modified_time FROM files")
+        cursor.execute(self.SELECT_FILES)
         return [dict(row) for row in cursor.fetchall()]
     
+    def get_all_file_rows(self) -> List[Tuple[str, str, str, int, Optional[int]]]:
+        """Retrieve all indexed files as (name, path, extension, modified_time, size) tuples."""
+        cursor = self.conn.cursor()
+        cursor.row_factory = None  # Plain tuples, no sqlite3.Row per file
+        cursor.execute(self.SELECT_FILES + " ORDER BY f.id")
+        return cursor.fetchall()
+    
+    def get_fingerprint(self) -> Dict[str, int]:
+        """
+        Get a cheap summary of the files table for detecting changes.
+        
+        Row count, mtime sum and highest row id move on any insert, replace,
+        delete or mtime update; the write counter also moves on updates that
+        only change a size or extension.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT COUNT(*), COALESCE(SUM(modified_time), 0), COALESCE(MAX(id), 0),
+                   (SELECT counter FROM file_changes)
+            FROM files
+        """)
+        count, mtime_sum, max_id, changes = cursor.fetchone()
+        return {'count': count, 'mtime_sum': mtime_sum, 'max_id': max_id, 'changes': changes}
+    
     def get_file_count(self) -> int:
         """Get total number of indexed files."""
         cursor = self.conn.cursor()
         cursor.execute("SELECT COUNT(*) FROM files")
         return cursor.fetchone()[0]
     
+    def get_directory_count(self) -> int:
+        """Get number of distinct directories holding indexed files."""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) FROM directories")
+        return cursor.fetchone()[0]
+    
+    def delete_tree(self, directory: str) -> int:
+        """
+        Remove every file under a directory, using the directories path index.
+        
+        Every directories row in the range goes too, including rows whose
+        files were already deleted one by one, so no orphaned prefixes are
+        left behind.
+        
+        Args:
+            directory: Root of the tree to remove
+            
+        Returns:
+            Number of files deleted
+        """
+        low, high = prefix_bounds(directory)
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                DELETE FROM files WHERE dir_id IN (
+                    SELECT id FROM directories WHERE path >= ? AND path < ?
+                )
+            """, (low, high))
+            deleted = cursor.rowcount
+            cursor.execute("DELETE FROM directories WHERE path >= ? AND path < ?", (low, high))
+            cursor.execute(
+                "DELETE FROM scanned_dirs WHERE path = ? OR (path >= ? AND path < ?)",
+                (directory, low, high)
+            )
+            self._count_change()
+            self._commit()
+            return deleted
+        except sqlite3.Error as e:
+            self._rollback()
+            print(f"Error deleting {directory}: {e}")
+            return 0
+    
     def clear_index(self):
         """Clear all files from the index."""
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM files")
-        self.conn.commit()
+        cursor.execute("DELETE FROM directories")
+        cursor.execute("DELETE FROM scanned_dirs")
+        self._count_change()
+        self._commit()
     
     def close(self):
         """Close database connection."""
@@ -0,0 +1,212 @@
+"""Single-writer, pooled-reader access to the index database for multithreaded callers."""
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Optional
+from backend.database.database import Database
+from backend.config.config import Config
+
+# Database methods that write, run on the writer thread
+WRITE_METHODS = frozenset({
+    'insert_files', 'update_file', 'delete_file', 'apply_changes', 'apply_diff',
+    'replace_dir_mtimes', 'delete_tree', 'clear_index'
+})
+
+# Database methods that only read, run on a pooled read-only connection
+READ_METHODS = frozenset({
+    'get_tree_files', 'count_tree', 'get_file_mtimes', 'get_file_stats', 'get_dir_mtimes',
+    'get_all_files', 'get_all_file_rows', 'get_fingerprint', 'get_file_count', 'get_directory_count'
+})
+
+
+class SharedDatabase:
+    """
+    Thread-safe front for Database, with one writer and a pool of readers.
+    
+    A dedicated writer thread owns the only read-write connection (in WAL
+    mode) and drains a queue of write calls, running up to
+    Config.DB_WRITE_BATCH queued calls in one transaction, each under its
+    own savepoint so a failing call is rolled back alone. Callers block
+    until their write has committed. Reads run on a pool of read-only
+    connections, which WAL lets proceed while the writer commits.
+    
+    Database's read and write methods are available under the same names,
+    so a SharedDatabase can stand in for a Database (IndexReconciler takes
+    either).
+    """
+    
+    def __init__(self, db_path: Optional[Path] = None, readers: int = Config.DB_READERS,
+                 write_batch: int = Config.DB_WRITE_BATCH):
+        """
+        Open the writer connection and start the writer thread.
+        
+        Args:
+            db_path: Database file (defaults to Config.DB_PATH)
+            readers: Most read-only connections to open
+            write_batch: Most queued write calls per transaction
+        """
+        # Runs the schema setup and migrations, once
+        self.writer = Database(db_path, check_same_thread=False)
+        self.writer.conn.execute("PRAGMA journal_mode=WAL")
+        self.writer.conn.execute("PRAGMA synchronous=NORMAL")
+        self.db_path = self.writer.db_path
+        self.write_batch = max(1, write_batch)
+        
+        self.readers = max(1, readers)
+        self.idle: queue.LifoQueue = queue.LifoQueue()
+        self.opened = 0
+        self.pool_lock = threading.Lock()
+        
+        self.writes: queue.Queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run_writer, name='DatabaseWriter', daemon=True)
+        self.thread.start()
+        self.closed = False
+        
+        # Statistics
+        self.transactions = 0
+        self.writes_applied = 0
+        self.max_batch = 0
+        self.total_commit_ms = 0.0
+    
+    def write(self, method: str, *args):
+        """
+        Run a Database write method on the writer thread and wait for its commit.
+        
+        Returns:
+            What the method returned
+        """
+        if self.closed:
+            raise RuntimeError("Database is closed")
+        future: Future = Future()
+        self.writes.put((method, args, future))
+        return future.result()
+    
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only Database from the pool."""
+        try:
+            db = self.idle.get_nowait()
+        except queue.Empty:
+            db = None
+            with self.pool_lock:
+                if self.opened < self.readers:
+                    self.opened += 1
+                    db = Database(self.db_path, check_same_thread=False, read_only=True)
+            if db is None:
+                db = self.idle.get()
+        try:
+            yield db
+        finally:
+            self.idle.put(db)
+    
+    def __getattr__(self, name: str):
+        if name in WRITE_METHODS:
+            return lambda *args: self.write(name, *args)
+        if name in READ_METHODS:
+            def read(*args):
+                with self.reader() as db:
+                    return getattr(db, name)(*args)
+            return read
+        raise AttributeError(name)
+    
+    def _run_writer(self):
+        """Drain the write queue, one transaction per batch of calls."""
+        while True:
+            item = self.writes.get()
+            if item is None:
+                return
+            
+            batch = [item]
+            stop = False
+            while len(batch) < self.write_batch:
+                try:
+                    item = self.writes.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            
+            self._apply(batch)
+            if stop:
+                return
+    
+    def _apply(self, batch):
+        """Run a batch of write calls in one transaction, resolving each call's future after the commit."""
+        db = self.writer
+        conn = db.conn
+        outcomes = []
+        start = time.perf_counter()
+        
+        # Releasing an outermost savepoint would commit it on its own, so the
+        # batch's savepoints nest inside one explicit transaction
+        try:
+            conn.execute("BEGIN")
+        except sqlite3.Error as e:
+            for _, _, future in batch:
+                future.set_exception(e)
+            return
+        
+        for method, args, future in batch:
+            db.savepoint = 'write_call'
+            try:
+                conn.execute("SAVEPOINT write_call")
+                try:
+                    outcomes.append((future, getattr(db, method)(*args), None))
+                except Exception as e:
+                    conn.execute("ROLLBACK TO write_call")
+                    outcomes.append((future, None, e))
+                conn.execute("RELEASE write_call")
+            except sqlite3.Error as e:
+                outcomes.append((future, None, e))
+            finally:
+                db.savepoint = None
+        
+        try:
+            conn.commit()
+        except sqlite3.Error as e:
+            conn.rollback()
+            outcomes = [(future, None, error or e) for future, _, error in outcomes]
+        
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        self.transactions += 1
+        self.writes_applied += len(batch)
+        self.max_batch = max(self.max_batch, len(batch))
+        self.total_commit_ms += elapsed_ms
+        
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+    
+    def get_stats(self) -> Dict:
+        """Get writer and pool statistics."""
+        return {
+            'write_queue': self.writes.qsize(),
+            'transactions': self.transactions,
+            'writes': self.writes_applied,
+            'max_batch': self.max_batch,
+            'avg_transaction_ms': round(self.total_commit_ms / self.transactions, 2) if self.transactions else 0,
+            'readers_open': self.opened,
+            'readers_idle': self.idle.qsize()
+        }
+    
+    def close(self):
+        """Apply queued writes, stop the writer and close every connection."""
+        if self.closed:
+            return
+        self.closed = True
+        self.writes.put(None)
+        self.thread.join()
+        self.writer.close()
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
@@ -0,0 +1,182 @@
+"""Coalescing queue between the file watcher and the search service."""
+import threading
+import time
+from typing import Callable, Dict, Optional
+from backend.config.config import Config
+
+
+CREATED = 'created'
+MODIFIED = 'modified'
+DELETED = 'deleted'
+
+# (pending op, new op) -> net op. A create followed by a delete still
+# deletes: the create may have replaced a file the index already holds.
+_COALESCE = {
+    (CREATED, CREATED): CREATED,
+    (CREATED, MODIFIED): CREATED,
+    (CREATED, DELETED): DELETED,
+    (MODIFIED, CREATED): MODIFIED,
+    (MODIFIED, MODIFIED): MODIFIED,
+    (MODIFIED, DELETED): DELETED,
+    (DELETED, CREATED): MODIFIED,
+    (DELETED, MODIFIED): MODIFIED,
+    (DELETED, DELETED): DELETED,
+}
+
+
+class EventQueue:
+    """
+    Coalesce file system events per path and apply them in batches.
+    
+    Events collected during a window are reduced to one net operation per
+    path (repeated modifies collapse, a delete wins over earlier events) and
+    handed to the apply callback as a single {path: op} batch on a worker
+    thread. A batch whose apply fails is merged back into the pending
+    events and retried on the next window.
+    """
+    
+    def __init__(self,
+                 apply_batch: Callable[[Dict[str, str]], None],
+                 window_seconds: float = Config.WATCHER_COALESCE_SECONDS,
+                 max_batch: int = Config.WATCHER_MAX_BATCH):
+        """
+        Initialize the queue.
+        
+        Args:
+            apply_batch: Called with {path: op} for each coalesced batch
+            window_seconds: How long to collect events before applying
+            max_batch: Pending paths that trigger an early apply
+        """
+        self.apply_batch = apply_batch
+        self.window_seconds = window_seconds
+        self.max_batch = max_batch
+        
+        self.pending: Dict[str, str] = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.running = False
+        
+        # Statistics
+        self.events_received = 0
+        self.events_applied = 0
+        self.batches_applied = 0
+        self.last_apply_ms = 0.0
+        self.total_apply_ms = 0.0
+        self.max_apply_ms = 0.0
+    
+    def _push(self, path: str, op: str):
+        """Merge an event into the pending batch."""
+        with self.lock:
+            self.events_received += 1
+            previous = self.pending.get(path)
+            self.pending[path] = op if previous is None else _COALESCE[(previous, op)]
+            depth = len(self.pending)
+        
+        if depth == 1 or depth >= self.max_batch:
+            self.wakeup.set()
+    
+    def created(self, path: str):
+        """Queue a file creation."""
+        self._push(path, CREATED)
+    
+    def modified(self, path: str):
+        """Queue a file modification."""
+        self._push(path, MODIFIED)
+    
+    def deleted(self, path: str):
+        """Queue a file deletion."""
+        self._push(path, DELETED)
+    
+    def moved(self, src_path: str, dest_path: str):
+        """Queue a move as a delete of the source and a create of the destination."""
+        self._push(src_path, DELETED)
+        self._push(dest_path, CREATED)
+    
+    def start(self):
+        """Start the apply thread."""
+        if self.running:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='EventQueue', daemon=True)
+        self.thread.start()
+    
+    def stop(self):
+        """Stop the apply thread after flushing pending events."""
+        if not self.running:
+            return
+        self.running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join()
+        self.flush()
+    
+    def _run(self):
+        """Wait for events, let the window fill, then apply."""
+        while self.running:
+            self.wakeup.wait()
+            self.wakeup.clear()
+            if not self.running:
+                break
+            
+            # Collect events for the window unless the batch is already full
+            deadline = time.time() + self.window_seconds
+            while self.running and len(self.pending) < self.max_batch:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self.wakeup.wait(remaining)
+                self.wakeup.clear()
+            
+            self.flush()
+    
+    def flush(self):
+        """Apply all pending events now."""
+        with self.lock:
+            batch = self.pending
+            self.pending = {}
+        
+        if not batch:
+            return
+        
+        start = time.perf_counter()
+        try:
+            self.apply_batch(batch)
+        except Exception as e:
+            print(f"[Queue] Error applying batch of {len(batch)} events, requeueing: {e}")
+            self._requeue(batch)
+            return
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        self.events_applied += len(batch)
+        self.batches_applied += 1
+        self.last_apply_ms = elapsed_ms
+        self.total_apply_ms += elapsed_ms
+        self.max_apply_ms = max(self.max_apply_ms, elapsed_ms)
+    
+    def _requeue(self, batch: Dict[str, str]):
+        """Merge a failed batch back under the events that arrived since."""
+        with self.lock:
+            merged = dict(batch)
+            for path, op in self.pending.items():
+                previous = merged.get(path)
+                merged[path] = op if previous is None else _COALESCE[(previous, op)]
+            self.pending = merged
+        
+        # Retry after the next window even if no new events arrive
+        self.wakeup.set()
+    
+    def get_stats(self) -> Dict:
+        """Get queue statistics."""
+        avg_apply = self.total_apply_ms / self.batches_applied if self.batches_applied else 0
+        
+        return {
+            'depth': len(self.pending),
+            'events_received': self.events_received,
+            'events_applied': self.events_applied,
+            'batches_applied': self.batches_applied,
+            'last_apply_ms': round(self.last_apply_ms, 2),
+            'avg_apply_ms': round(avg_apply, 2),
+            'max_apply_ms': round(self.max_apply_ms, 2),
+            'window_seconds': self.window_seconds
+        }
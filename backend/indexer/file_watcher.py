@@ -1,12 +1,29 @@
 """File system watcher for incremental index updates."""
+import re
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Callable, Set
+from typing import Callable, Iterable, Pattern, Set
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler, FileSystemEvent
 from backend.database.database import FileMetadata
 
 
+def compile_exclusion_pattern(excluded_dirs: Iterable[str]) -> Pattern:
+    """
+    Compile a matcher for paths containing an excluded or hidden component.
+    
+    Args:
+        excluded_dirs: Directory names to exclude
+        
+    Returns:
+        Pattern whose search() matches if any path component is excluded
+    """
+    names = '|'.join(re.escape(name) for name in sorted(excluded_dirs))
+    alternatives = rf'\.[^\\/]*|{names}' if names else r'\.[^\\/]*'
+    return re.compile(rf'(?:^|[\\/])(?:{alternatives})(?:[\\/]|$)')
+
+
 class IndexUpdateHandler(FileSystemEventHandler):
     """Handle file system events and update index."""
     
@@ -15,98 +32,103 @@ class IndexUpdateHandler(FileSystemEventHandler):
                  on_modified: Callable[[str], None],
                  on_deleted: Callable[[str], None],
                  on_moved: Callable[[str, str], None],
-                 excluded_dirs: Set[str]):
+                 excluded_dirs: Set[str],
+                 verbose: bool = True):
         self.on_created_callback = on_created
         self.on_modified_callback = on_modified
         self.on_deleted_callback = on_deleted
         self.on_moved_callback = on_moved
         self.excluded_dirs = excluded_dirs
+        self.excluded_pattern = compile_exclusion_pattern(excluded_dirs)
+        self.verbose = verbose
         
-        # Debouncing: track recent events to avoid duplicates
-        self.recent_events = {}
+        # Debouncing: path -> (last op, time seen), oldest first, so expired
+        # entries are popped from the front in amortized O(1). Only a repeat
+        # of the same op is dropped; a different op replaces the entry.
+        self.recent_events: OrderedDict = OrderedDict()
         self.debounce_seconds = 0.5
     
-    def _should_skip(self, path: str) -> bool:
-        """Check if path should be skipped."""
-        path_obj = Path(path)
-        
+    def _should_skip(self, path: str, is_directory: bool = False) -> bool:
+        """Check if path should be skipped (no file system access)."""
         # Skip directories
-        if path_obj.is_dir():
+        if is_directory:
             return True
         
-        # Skip excluded directories
-        for part in path_obj.parts:
-            if part in self.excluded_dirs or part.startswith('.'):
-                return True
-        
-        return False
+        # Skip excluded and hidden directories
+        return self.excluded_pattern.search(path) is not None
     
-    def _is_duplicate_event(self, event_key: str) -> bool:
-        """Check if this is a duplicate event (debouncing)."""
-        current_time = time.time()
-        
-        if event_key in self.recent_events:
-            last_time = self.recent_events[event_key]
-            if current_time - last_time < self.debounce_seconds:
-                return True
-        
-        self.recent_events[event_key] = current_time
-        
-        # Clean up old events
-        self.recent_events = {
-            k: v for k, v in self.recent_events.items() 
-            if current_time - v < self.debounce_seconds * 2
-        }
+    def _is_duplicate_event(self, path: str, op: str) -> bool:
+        """Check if this repeats the last op seen for the path (debouncing)."""
+        current_time = time.monotonic()
+        recent = self.recent_events
+        
+        # Expire old events from the front; entries are kept in time order
+        expiry = current_time - self.debounce_seconds * 2
+        while recent:
+            oldest_path = next(iter(recent))
+            if recent[oldest_path][1] >= expiry:
+                break
+            del recent[oldest_path]
+        
+        last = recent.get(path)
+        if last is not None and last[0] == op and current_time - last[1] < self.debounce_seconds:
+            return True
         
+        recent[path] = (op, current_time)
+        recent.move_to_end(path)
         return False
     
     def on_created(self, event: FileSystemEvent):
         """Handle file creation."""
-        if self._should_skip(event.src_path):
+        if self._should_skip(event.src_path, event.is_directory):
             return
         
-        event_key = f"created:{event.src_path}"
-        if self._is_duplicate_event(event_key):
+        if self._is_duplicate_event(event.src_path, 'created'):
             return
         
-        print(f"[Watcher] File created: {event.src_path}")
+        if self.verbose:
+            print(f"[Watcher] File created: {event.src_path}")
         self.on_created_callback(event.src_path)
     
     def on_modified(self, event: FileSystemEvent):
         """Handle file modification."""
-        if self._should_skip(event.src_path):
+        if self._should_skip(event.src_path, event.is_directory):
             return
         
-        event_key = f"modified:{event.src_path}"
-        if self._is_duplicate_event(event_key):
+        if self._is_duplicate_event(event.src_path, 'modified'):
             return
         
-        print(f"[Watcher] File modified: {event.src_path}")
+        if self.verbose:
+            print(f"[Watcher] File modified: {event.src_path}")
         self.on_modified_callback(event.src_path)
     
     def on_deleted(self, event: FileSystemEvent):
         """Handle file deletion."""
-        if self._should_skip(event.src_path):
+        if self._should_skip(event.src_path, event.is_directory):
             return
         
-        event_key = f"deleted:{event.src_path}"
-        if self._is_duplicate_event(event_key):
+        if self._is_duplicate_event(event.src_path, 'deleted'):
             return
         
-        print(f"[Watcher] File deleted: {event.src_path}")
+        if self.verbose:
+            print(f"[Watcher] File deleted: {event.src_path}")
         self.on_deleted_callback(event.src_path)
     
     def on_moved(self, event: FileSystemEvent):
         """Handle file move/rename."""
         if hasattr(event, 'dest_path'):
-            if self._should_skip(event.src_path) and self._should_skip(event.dest_path):
+            if (self._should_skip(event.src_path, event.is_directory)
+                    and self._should_skip(event.dest_path, event.is_directory)):
                 return
             
-            event_key = f"moved:{event.src_path}:{event.dest_path}"
-            if self._is_duplicate_event(event_key):
+            if self._is_duplicate_event(event.src_path, f"moved:{event.dest_path}"):
                 return
             
-            print(f"[Watcher] File moved: {event.src_path} -> {event.dest_path}")
+            # The destination changed too, so its next event is never a repeat
+            self.recent_events.pop(event.dest_path, None)
+            
+            if self.verbose:
+                print(f"[Watcher] File moved: {event.src_path} -> {event.dest_path}")
             self.on_moved_callback(event.src_path, event.dest_path)
 
 
@@ -1,21 +1,198 @@
 """File system indexer."""
 import os
+import queue
+import threading
+from collections import deque
 from pathlib import Path
-from typing import List, Generator
-from backend.database.database import FileMetadata
+from typing import Callable, Dict, List, Generator, Optional, Tuple
+from backend.database.database import FileMetadata, file_extension
 from backend.config.config import Config
 
 
+class _WorkStealingScan:
+    """
+    Scan a directory tree on a pool of threads.
+    
+    Each worker owns a deque of directories: it pushes subdirectories it
+    discovers and pops from the same end (depth-first, cache friendly);
+    when its deque runs dry it steals from the opposite end of another
+    worker's deque, which hands over the largest unexplored subtrees.
+    If scan_dir raises, the workers wind down and the exception is
+    re-raised to the consumer.
+    """
+    
+    def __init__(self, scan_dir, workers: int):
+        self.scan_dir = scan_dir
+        self.workers = workers
+        self.deques = [deque() for _ in range(workers)]
+        self.pending = 0  # Directories queued or being scanned
+        self.condition = threading.Condition()
+        self.stopped = threading.Event()
+        self.error: Optional[Exception] = None  # First exception raised by scan_dir
+        self.results: queue.Queue = queue.Queue(maxsize=workers * 4)
+    
+    def _take(self, index: int) -> Optional[str]:
+        """Pop from our own deque, else steal from another worker."""
+        try:
+            return self.deques[index].pop()
+        except IndexError:
+            pass
+        
+        for offset in range(1, self.workers):
+            try:
+                return self.deques[(index + offset) % self.workers].popleft()
+            except IndexError:
+                continue
+        return None
+    
+    def _put(self, item) -> bool:
+        """Hand results to the consumer, giving up if the scan was stopped."""
+        while not self.stopped.is_set():
+            try:
+                self.results.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def _worker(self, index: int):
+        own = self.deques[index]
+        while not self.stopped.is_set() and self.error is None:
+            directory = self._take(index)
+            if directory is None:
+                with self.condition:
+                    if self.pending == 0:
+                        self.condition.notify_all()
+                        return
+                    self.condition.wait(0.05)
+                continue
+            
+            files, subdirs = [], []
+            try:
+                files, subdirs = self.scan_dir(directory)
+            except Exception as e:
+                if self.error is None:
+                    self.error = e
+            finally:
+                with self.condition:
+                    # Publish and count subdirectories atomically so a thief can't
+                    # finish one before it is counted
+                    own.extend(subdirs)
+                    self.pending += len(subdirs) - 1
+                    if subdirs or self.pending == 0 or self.error is not None:
+                        self.condition.notify_all()
+            
+            if self.error is not None:
+                return
+            if files and not self._put(files):
+                return
+    
+    def run(self, root: str) -> Generator[List[FileMetadata], None, None]:
+        """Scan the tree, yielding lists of files as directories complete."""
+        self.deques[0].append(root)
+        self.pending = 1
+        
+        threads = [
+            threading.Thread(target=self._worker, args=(i,), name=f'Scanner-{i}', daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        
+        def wait_for_workers():
+            for thread in threads:
+                thread.join()
+            self._put(None)
+        
+        threading.Thread(target=wait_for_workers, daemon=True).start()
+        
+        try:
+            while True:
+                files = self.results.get()
+                if files is None:
+                    break
+                yield files
+            if self.error is not None:
+                raise self.error
+        finally:
+            # Consumer stopped early (or finished): release blocked workers
+            self.stopped.set()
+
+
 class FileIndexer:
     """Recursively scan and index files."""
     
-    def __init__(self):
+    def __init__(self, workers: int = Config.INDEX_WORKERS):
+        """
+        Initialize the indexer.
+        
+        Args:
+            workers: Scanner threads per directory tree (1 scans inline)
+        """
         self.excluded_dirs = Config.EXCLUDED_DIRS
+        self.workers = max(1, workers)
     
     def _should_skip_directory(self, dir_name: str) -> bool:
         """Check if directory should be skipped."""
         return dir_name in self.excluded_dirs or dir_name.startswith('.')
     
+    def scan_single_directory(self, dir_path: str,
+                              known_stats: Optional[Dict[str, Tuple[int, Optional[int]]]] = None
+                              ) -> Tuple[List[FileMetadata], List[str]]:
+        """
+        List one directory with os.scandir, reusing DirEntry stat data.
+        
+        Args:
+            dir_path: Directory to list
+            known_stats: Previously recorded path -> (mtime, size) to use instead
+                of stat() for files already known (for directories trusted unchanged)
+                
+        Returns:
+            Tuple of (files in the directory, subdirectories to descend into)
+        """
+        files = []
+        subdirs = []
+        
+        try:
+            with os.scandir(dir_path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not self._should_skip_directory(entry.name):
+                                subdirs.append(entry.path)
+                            continue
+                        if entry.is_symlink() and entry.is_dir():
+                            # Links to directories are neither followed nor indexed, like os.walk
+                            continue
+                        
+                        known = known_stats.get(entry.path) if known_stats else None
+                        if known is not None and known[1] is not None:
+                            modified_time, size = known
+                        else:
+                            # Windows fills stat from the directory listing; elsewhere
+                            # this is the single stat call per file
+                            stat = entry.stat()
+                            modified_time, size = int(stat.st_mtime), stat.st_size
+                        
+                        files.append(FileMetadata(
+                            name=entry.name,
+                            path=entry.path,
+                            extension=file_extension(entry.name),
+                            modified_time=modified_time,
+                            size=size
+                        ))
+                    except FileNotFoundError:
+                        # Removed while scanning (race condition)
+                        continue
+                    except (PermissionError, OSError) as e:
+                        # Skip files we can't access
+                        print(f"Skipping {entry.name}: {e}")
+                        continue
+        except (PermissionError, OSError) as e:
+            print(f"Skipping directory {dir_path}: {e}")
+        
+        return files, subdirs
+    
     def scan_directory(self, root_path: str) -> Generator[FileMetadata, None, None]:
         """
         Recursively scan directory and yield file metadata.
@@ -36,33 +213,32 @@ class FileIndexer:
             print(f"Warning: Path is not a directory: {root_path}")
             return
         
-        for dirpath, dirnames, filenames in os.walk(root_path):
-            # Filter out excluded directories (modifies in-place)
-            dirnames[:] = [d for d in dirnames if not self._should_skip_directory(d)]
-            
-            for filename in filenames:
-                try:
-                    file_path = Path(dirpath) / filename
-                    
-                    # Skip if file doesn't exist (race condition)
-                    if not file_path.exists():
-                        continue
-                    
-                    # Get file metadata
-                    stat = file_path.stat()
-                    extension = file_path.suffix.lower() if file_path.suffix else ''
-                    
-                    yield FileMetadata(
-                        name=filename,
-                        path=str(file_path),
-                        extension=extension,
-                        modified_time=int(stat.st_mtime)
-                    )
-                    
-                except (PermissionError, OSError) as e:
-                    # Skip files we can't access
-                    print(f"Skipping {filename}: {e}")
-                    continue
+        for files in self.scan_tree(str(root_path)):
+            yield from files
+    
+    def scan_tree(self, root: str,
+                  scan_dir: Optional[Callable[[str], Tuple[List[FileMetadata], List[str]]]] = None
+                  ) -> Generator[List[FileMetadata], None, None]:
+        """
+        Yield per-directory file lists for a tree, in parallel if configured.
+        
+        Args:
+            root: Root directory (assumed to exist)
+            scan_dir: Replacement for the single-directory lister, which must
+                return (files, subdirectories) like scan_single_directory
+        """
+        scan_dir = scan_dir or self.scan_single_directory
+        
+        if self.workers > 1:
+            yield from _WorkStealingScan(scan_dir, self.workers).run(root)
+            return
+        
+        stack = [root]
+        while stack:
+            files, subdirs = scan_dir(stack.pop())
+            stack.extend(reversed(subdirs))
+            if files:
+                yield files
     
     def index_directories(self, directories: List[str], batch_size: int = Config.BATCH_SIZE) -> Generator[List[FileMetadata], None, None]:
         """
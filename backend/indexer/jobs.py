@@ -0,0 +1,231 @@
+"""Background indexing jobs with progress reporting and cancellation."""
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional
+from backend.config.config import Config
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+FINISHED = (DONE, FAILED, CANCELLED)
+
+
+class IndexJob:
+    """
+    One indexing request and its progress.
+    
+    The job runner reports scan counters through update(); readers take
+    to_dict() snapshots or block in wait() until something changes.
+    """
+    
+    def __init__(self, kind: str, directories: List[str]):
+        """
+        Initialize the job.
+        
+        Args:
+            kind: What the job does ('add' or 'reindex')
+            directories: Directory trees to index
+        """
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.directories = directories
+        self.state = QUEUED
+        self.error: Optional[str] = None
+        self.counts: Dict[str, int] = {}
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancel_event = threading.Event()
+        self.changed = threading.Condition()
+        self.version = 0  # Bumped on every change, for waiters
+    
+    def _touch(self):
+        """Wake waiters (caller holds changed)."""
+        self.version += 1
+        self.changed.notify_all()
+    
+    def start(self):
+        """Mark the job as running."""
+        with self.changed:
+            self.state = RUNNING
+            self.started_at = time.time()
+            self._touch()
+    
+    def update(self, counts: Dict[str, int]):
+        """Record the latest scan counters."""
+        with self.changed:
+            self.counts = dict(counts)
+            self._touch()
+    
+    def finish(self, state: str, error: Optional[str] = None):
+        """Mark the job as done, failed or cancelled."""
+        with self.changed:
+            self.state = state
+            self.error = error
+            self.finished_at = time.time()
+            self._touch()
+    
+    def cancel(self) -> bool:
+        """
+        Ask the job to stop.
+        
+        A queued job never starts; a running one stops after its current
+        batch. Returns False if the job had already finished.
+        """
+        with self.changed:
+            if self.state in FINISHED:
+                return False
+            self.cancel_event.set()
+            if self.state == QUEUED:
+                self.state = CANCELLED
+                self.finished_at = time.time()
+            self._touch()
+            return True
+    
+    def wait(self, version: int, timeout: float) -> int:
+        """Block until the job changes past a version (or the timeout), returning the current version."""
+        with self.changed:
+            if self.version == version and self.state not in FINISHED:
+                self.changed.wait(timeout)
+            return self.version
+    
+    @property
+    def finished(self) -> bool:
+        """Whether the job is done, failed or cancelled."""
+        return self.state in FINISHED
+    
+    def to_dict(self) -> Dict:
+        """
+        Progress snapshot.
+        
+        Rate is files scanned per second. The ETA extrapolates the total
+        from the files stored for the trees before the scan or, for new
+        trees, from files per scanned directory times directories found so
+        far (which keeps growing early in a scan).
+        """
+        with self.changed:
+            counts = dict(self.counts)
+            state = self.state
+            started_at, finished_at = self.started_at, self.finished_at
+        
+        files = counts.get('files', 0)
+        elapsed = ((finished_at or time.time()) - started_at) if started_at else 0.0
+        rate = files / elapsed if elapsed > 0 else 0.0
+        
+        eta = None
+        scanned = counts.get('scanned_dirs', 0)
+        if state == RUNNING and scanned and rate:
+            estimated = files / scanned * counts.get('found_dirs', scanned)
+            expected = max(counts.get('stored', 0), estimated, files)
+            eta = round((expected - files) / rate, 1)
+        
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'directories': self.directories,
+            'state': state,
+            'error': self.error,
+            'files': files,
+            'added': counts.get('added', 0),
+            'updated': counts.get('updated', 0),
+            'removed': counts.get('removed', 0),
+            'unchanged': counts.get('unchanged', 0),
+            'elapsed_seconds': round(elapsed, 2),
+            'files_per_second': round(rate, 1),
+            'eta_seconds': eta
+        }
+
+
+class IndexJobQueue:
+    """
+    Run indexing jobs one at a time on a worker thread.
+    
+    Jobs run in submission order so two scans never write the same rows
+    at once. Finished jobs are kept for progress queries until
+    Config.INDEX_JOB_HISTORY newer jobs have finished.
+    """
+    
+    def __init__(self, run_job: Callable[[IndexJob], None], history: int = Config.INDEX_JOB_HISTORY):
+        """
+        Initialize the queue.
+        
+        Args:
+            run_job: Runs a job, reporting through job.update() and checking
+                job.cancel_event; raising marks the job failed
+            history: Finished jobs to remember
+        """
+        self.run_job = run_job
+        self.history = history
+        self.jobs: 'OrderedDict[str, IndexJob]' = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending: queue.Queue = queue.Queue()
+        self.thread: Optional[threading.Thread] = None
+    
+    def submit(self, kind: str, directories: List[str]) -> IndexJob:
+        """Queue a job and return it (its id is the handle for progress and cancel)."""
+        job = IndexJob(kind, directories)
+        with self.lock:
+            self.jobs[job.id] = job
+            self._trim()
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, name='IndexJobs', daemon=True)
+                self.thread.start()
+        self.pending.put(job)
+        return job
+    
+    def get(self, job_id: str) -> Optional[IndexJob]:
+        """Get a job by id."""
+        with self.lock:
+            return self.jobs.get(job_id)
+    
+    def list(self) -> List[IndexJob]:
+        """Get known jobs, oldest first."""
+        with self.lock:
+            return list(self.jobs.values())
+    
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a job; False if it is unknown or already finished."""
+        job = self.get(job_id)
+        return job.cancel() if job else False
+    
+    def stop(self, timeout: float = 5.0):
+        """Cancel every job and stop the worker."""
+        for job in self.list():
+            job.cancel()
+        self.pending.put(None)
+        if self.thread:
+            self.thread.join(timeout)
+    
+    def _trim(self):
+        """Forget the oldest finished jobs beyond the history limit (caller holds lock)."""
+        finished = [job_id for job_id, job in self.jobs.items() if job.finished]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+    
+    def _run(self):
+        """Run queued jobs until stopped."""
+        while True:
+            job = self.pending.get()
+            if job is None:
+                return
+            if job.cancel_event.is_set():
+                continue
+            
+            job.start()
+            try:
+                self.run_job(job)
+            except Exception as e:
+                print(f"[Jobs] Job {job.id} failed: {e}")
+                job.finish(FAILED, str(e))
+                continue
+            job.finish(CANCELLED if job.cancel_event.is_set() else DONE)
+            
+            elapsed = job.finished_at - job.started_at
+            print(f"[Jobs] Job {job.id} ({job.kind}) {job.state} in {elapsed:.1f}s")
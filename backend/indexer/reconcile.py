@@ -0,0 +1,151 @@
+"""Incremental re-indexing by diffing a scan against the stored index."""
+import os
+import threading
+from contextlib import nullcontext
+from typing import Dict, List, Optional
+from backend.database.database import Database, FileMetadata
+from backend.indexer.indexer import FileIndexer
+from backend.config.config import Config
+
+
+class IndexReconciler:
+    """
+    Bring the stored index for a set of directories in line with disk.
+    
+    Only new, changed and vanished rows are written. With trust_dir_mtime,
+    files in a directory whose mtime matches the last reconcile reuse their
+    stored mtimes and sizes instead of being stat'ed. A directory's mtime
+    changes when entries are added, removed or renamed, but not when a file
+    is edited in place, so in-place edits are then left to the file watcher.
+    """
+    
+    def __init__(self, db: Database, indexer: FileIndexer, trust_dir_mtime: bool = False,
+                 batch_size: int = Config.BATCH_SIZE):
+        """
+        Initialize the reconciler.
+        
+        Args:
+            db: Database (or SharedDatabase) to reconcile
+            indexer: Indexer used to scan directories
+            trust_dir_mtime: Skip stat() in directories unchanged since the last reconcile
+            batch_size: Changed rows written per transaction
+        """
+        self.db = db
+        self.indexer = indexer
+        self.trust_dir_mtime = trust_dir_mtime
+        self.batch_size = batch_size
+    
+    def reconcile(self, directories: List[str], on_batch=None, on_progress=None,
+                  cancel: Optional[threading.Event] = None,
+                  write_lock: Optional[threading.Lock] = None) -> Dict[str, int]:
+        """
+        Reconcile each directory tree against the database.
+        
+        Args:
+            directories: Root directories to reconcile
+            on_batch: Optional callback(added, updated, removed) after each write
+            on_progress: Optional callback(stats) as scanned directories come in;
+                stats also carry files seen, directories scanned and found, and
+                the files stored for the trees before the scan
+            cancel: Event that stops the scan; batches already written stay,
+                and vanished files are not removed for a tree left unfinished
+            write_lock: Optional lock held around each batch's database write
+                and its on_batch call, so other writers holding it never land
+                between the two
+                
+        Returns:
+            Counts of added, updated, removed and unchanged rows, plus the
+            number of directories whose files were trusted unchanged
+        """
+        stats = {'added': 0, 'updated': 0, 'removed': 0, 'unchanged': 0, 'skipped_dirs': 0}
+        if on_progress:
+            stats.update(files=0, scanned_dirs=0, found_dirs=0, stored=0)
+        
+        for directory in directories:
+            if cancel is not None and cancel.is_set():
+                break
+            directory = os.path.abspath(directory)
+            if not os.path.isdir(directory):
+                print(f"Warning: Path is not a directory: {directory}")
+                continue
+            
+            print(f"Reconciling: {directory}")
+            self._reconcile_tree(directory, stats, on_batch, on_progress, cancel, write_lock)
+        
+        return stats
+    
+    def _reconcile_tree(self, root: str, stats: Dict[str, int], on_batch, on_progress=None,
+                        cancel: Optional[threading.Event] = None,
+                        write_lock: Optional[threading.Lock] = None):
+        """Scan one tree and write its diff in batches."""
+        stored = self.db.get_file_stats(root)
+        known_dirs = self.db.get_dir_mtimes(root) if self.trust_dir_mtime else {}
+        seen_dirs: Dict[str, int] = {}
+        lock = threading.Lock()
+        if on_progress:
+            stats['stored'] += len(stored)
+            stats['found_dirs'] += 1
+        
+        def scan_dir(dir_path: str):
+            try:
+                dir_mtime = os.stat(dir_path).st_mtime_ns
+            except OSError:
+                return [], []
+            
+            trusted = known_dirs.get(dir_path) == dir_mtime
+            with lock:
+                seen_dirs[dir_path] = dir_mtime
+                if trusted:
+                    stats['skipped_dirs'] += 1
+            files, subdirs = self.indexer.scan_single_directory(dir_path, stored if trusted else None)
+            if on_progress:
+                with lock:
+                    stats['files'] += len(files)
+                    stats['scanned_dirs'] += 1
+                    stats['found_dirs'] += len(subdirs)
+            return files, subdirs
+        
+        added: List[FileMetadata] = []
+        updated: List[FileMetadata] = []
+        
+        def flush(removed: List[str]):
+            if not (added or updated or removed):
+                return
+            with write_lock or nullcontext():
+                if self.db.apply_diff(added, updated, removed):
+                    stats['added'] += len(added)
+                    stats['updated'] += len(updated)
+                    stats['removed'] += len(removed)
+                    if on_batch:
+                        on_batch(list(added), list(updated), list(removed))
+            added.clear()
+            updated.clear()
+        
+        for files in self.indexer.scan_tree(root, scan_dir):
+            if cancel is not None and cancel.is_set():
+                # A partial scan can't tell vanished files from unscanned ones
+                flush([])
+                return
+            
+            for file in files:
+                previous = stored.pop(file.path, None)
+                if previous is None:
+                    added.append(file)
+                elif previous != (file.modified_time, file.size):
+                    updated.append(file)
+                else:
+                    stats['unchanged'] += 1
+            
+            if len(added) + len(updated) >= self.batch_size:
+                flush([])
+            if on_progress:
+                with lock:
+                    on_progress(stats)
+        
+        # Whatever is left in stored was not seen on disk
+        vanished = list(stored)
+        flush(vanished[:self.batch_size])
+        for start in range(self.batch_size, len(vanished), self.batch_size):
+            flush(vanished[start:start + self.batch_size])
+        
+        self.db.replace_dir_mtimes(root, seen_dirs)
@@ -1,44 +1,119 @@
 """In-memory cache for search results and file index."""
-from functools import lru_cache
-from typing import List, Dict, Optional
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple, Union
+import sys
+import threading
 import time
+from backend.search.columns import FileColumns
 
 
 class SearchCache:
-    """LRU cache for search queries and results."""
+    """
+    LRU cache for search queries and results, bounded by entries and bytes.
     
-    def __init__(self, cache_size: int = 1000):
+    Lookups move an entry to the most recently used end and eviction takes
+    from the other end. Each entry's size is estimated when it is stored
+    (the result list, result objects and their path strings; names and
+    extensions are shared with the index), and entries are evicted until
+    both the entry and byte budgets hold. With a TTL, expired entries are
+    dropped when looked up or when they reach the eviction end. Searches
+    and index writers run on different threads, so every operation holds
+    the cache lock.
+    """
+    
+    def __init__(self, cache_size: int = 1000, max_bytes: int = 0, ttl_seconds: float = 0):
+        """
+        Initialize the cache.
+        
+        Args:
+            cache_size: Maximum number of cached queries
+            max_bytes: Maximum estimated bytes of cached results (0 for no limit)
+            ttl_seconds: Lifetime of an entry (0 to keep entries until evicted)
+        """
         self.cache_size = cache_size
-        self.query_cache = {}
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        # Normalized query -> (results, estimated bytes, time stored), least recently used first
+        self.query_cache: 'OrderedDict[str, Tuple[List, int, float]]' = OrderedDict()
+        self.bytes = 0
         self.cache_hits = 0
         self.cache_misses = 0
+        self.evictions = 0
+        self.expirations = 0
         self.last_updated = time.time()
+        self.lock = threading.Lock()
+    
+    @staticmethod
+    def entry_size(query: str, results: List) -> int:
+        """Estimate the bytes a cached entry keeps alive."""
+        size = sys.getsizeof(query) + sys.getsizeof(results)
+        for result in results:
+            size += sys.getsizeof(result) + sys.getsizeof(getattr(result, 'path', ''))
+        return size
     
     def get(self, query: str) -> Optional[List]:
         """Get cached results for a query."""
-        normalized_query = query.lower().strip()
-        if normalized_query in self.query_cache:
+        with self.lock:
+            normalized_query = query.lower().strip()
+            entry = self.query_cache.get(normalized_query)
+            if entry is not None and self.ttl_seconds and time.time() - entry[2] >= self.ttl_seconds:
+                self._drop(normalized_query)
+                self.expirations += 1
+                entry = None
+            
+            if entry is None:
+                self.cache_misses += 1
+                return None
+            
+            self.query_cache.move_to_end(normalized_query)
             self.cache_hits += 1
-            return self.query_cache[normalized_query]
-        self.cache_misses += 1
-        return None
+            return entry[0]
     
     def set(self, query: str, results: List):
-        """Cache results for a query."""
-        normalized_query = query.lower().strip()
-        
-        # Implement simple LRU by removing oldest if cache is full
-        if len(self.query_cache) >= self.cache_size:
-            # Remove first (oldest) item
-            first_key = next(iter(self.query_cache))
-            del self.query_cache[first_key]
-        
-        self.query_cache[normalized_query] = results
+        """Cache results for a query, evicting least recently used entries as needed."""
+        with self.lock:
+            normalized_query = query.lower().strip()
+            size = self.entry_size(normalized_query, results)
+            if self.max_bytes and size > self.max_bytes:
+                return
+            
+            self._drop(normalized_query)
+            self.query_cache[normalized_query] = (results, size, time.time())
+            self.bytes += size
+            
+            while len(self.query_cache) > self.cache_size or (self.max_bytes and self.bytes > self.max_bytes):
+                oldest, (_, _, stored_at) = next(iter(self.query_cache.items()))
+                self._drop(oldest)
+                if self.ttl_seconds and time.time() - stored_at >= self.ttl_seconds:
+                    self.expirations += 1
+                else:
+                    self.evictions += 1
+    
+    def _drop(self, normalized_query: str):
+        """Remove an entry and its bytes, if present (caller holds lock)."""
+        entry = self.query_cache.pop(normalized_query, None)
+        if entry is not None:
+            self.bytes -= entry[1]
     
     def invalidate(self):
         """Clear all cached results."""
-        self.query_cache.clear()
-        self.last_updated = time.time()
+        with self.lock:
+            self.query_cache.clear()
+            self.bytes = 0
+            self.last_updated = time.time()
+    
+    def keys(self) -> List[str]:
+        """Get the cached (normalized) queries."""
+        with self.lock:
+            return list(self.query_cache)
+    
+    def invalidate_keys(self, queries):
+        """Drop cached results for specific normalized queries."""
+        with self.lock:
+            for query in queries:
+                self._drop(query)
+            if queries:
+                self.last_updated = time.time()
     
     def get_stats(self) -> Dict:
         """Get cache statistics."""
@@ -48,68 +123,111 @@ class SearchCache:
         return {
             'size': len(self.query_cache),
             'max_size': self.cache_size,
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'ttl_seconds': self.ttl_seconds,
             'hits': self.cache_hits,
             'misses': self.cache_misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
             'hit_rate': round(hit_rate, 2),
             'last_updated': self.last_updated
         }
 
 
 class IndexCache:
-    """In-memory cache for the entire file index."""
+    """
+    In-memory cache for the entire file index.
+    
+    Files are held in a FileColumns store rather than one dict per file:
+    lookups go through its per-directory slot tables, so single-file
+    changes are O(1), and dictionaries are only built for files handed
+    out. Removed files leave a tombstone that is compacted away once
+    tombstones make up a quarter of the slots.
+    """
+    
+    # Tombstones tolerated before compacting the slot array
+    COMPACT_MIN_TOMBSTONES = 1024
     
     def __init__(self):
-        self.files: List[Dict] = []
+        self.columns = FileColumns()
         self.last_updated = 0
         self.is_loaded = False
     
-    def load(self, files: List[Dict]):
-        """Load files into memory."""
-        self.files = files
+    def load(self, files: Union[List[Dict], FileColumns]):
+        """Load files (dictionaries or an existing column store) into memory."""
+        self.columns = files if isinstance(files, FileColumns) else FileColumns(files)
         self.last_updated = time.time()
         self.is_loaded = True
     
+    @property
+    def tombstones(self) -> int:
+        return self.columns.tombstones
+    
     def get_all(self) -> List[Dict]:
-        """Get all cached files."""
-        return self.files
+        """Get all cached files, in insertion order."""
+        return list(self.columns.rows())
+    
+    def get_file(self, path: str) -> Optional[Dict]:
+        """Get a cached file by path."""
+        slot = self.columns.slot_of(path)
+        return self.columns.row(slot) if slot is not None else None
     
     def add_file(self, file: Dict):
         """Add a single file to cache."""
-        # Check if file already exists (by path)
-        existing_index = next((i for i, f in enumerate(self.files) if f['path'] == file['path']), None)
+        slot = self.columns.slot_of(file['path'])
         
-        if existing_index is not None:
+        if slot is not None:
             # Update existing file
-            self.files[existing_index] = file
+            self.columns.set(slot, file)
         else:
             # Add new file
-            self.files.append(file)
+            self.columns.append(file)
         
         self.last_updated = time.time()
     
     def remove_file(self, path: str):
         """Remove a file from cache by path."""
-        self.files = [f for f in self.files if f['path'] != path]
+        columns = self.columns
+        slot = columns.slot_of(path)
+        if slot is None:
+            return
+        
+        columns.remove(slot)
         self.last_updated = time.time()
+        
+        if columns.tombstones >= self.COMPACT_MIN_TOMBSTONES and columns.tombstones * 4 >= columns.slot_count:
+            columns.compact()
     
     def update_file(self, path: str, updated_file: Dict):
         """Update a file in cache."""
-        for i, f in enumerate(self.files):
-            if f['path'] == path:
-                self.files[i] = updated_file
-                self.last_updated = time.time()
-                break
+        slot = self.columns.slot_of(path)
+        if slot is None:
+            return
+        
+        if updated_file['path'] != path:
+            # Renamed: drop any entry already at the new path first
+            self.remove_file(updated_file['path'])
+            slot = self.columns.slot_of(path)
+        
+        self.columns.set(slot, updated_file)
+        self.last_updated = time.time()
+    
+    def __len__(self) -> int:
+        return len(self.columns)
     
     def clear(self):
         """Clear the cache."""
-        self.files = []
+        self.columns = FileColumns()
         self.is_loaded = False
         self.last_updated = 0
     
     def get_stats(self) -> Dict:
         """Get cache statistics."""
         return {
-            'file_count': len(self.files),
+            'file_count': len(self.columns),
+            'directory_count': len(self.columns.directories),
+            'tombstones': self.columns.tombstones,
             'is_loaded': self.is_loaded,
             'last_updated': self.last_updated
         }
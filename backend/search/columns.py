@@ -0,0 +1,373 @@
+"""Columnar in-memory representation of the file index."""
+import sys
+from array import array
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from backend.database.database import prefix_bounds, split_path
+
+
+class FileColumns:
+    """
+    Struct-of-arrays view of indexed files, addressed by slot number.
+    
+    Paths are not stored whole: each slot holds an id into a table of
+    interned directory prefixes plus its final component, which is the
+    file name itself (the same string object) for every normal path.
+    Lookups by path go through a small tail -> slot dict per directory.
+    Directories form a trie (every ancestor prefix is interned and knows
+    its children), so a whole subtree can be found without a scan.
+    
+    Removed files leave a tombstone (None in the string columns, which
+    RapidFuzz skips) until the columns are compacted.
+    """
+    
+    def __init__(self, files: Iterable[Dict] = ()):
+        self.names: List[Optional[str]] = []
+        self.names_lower: List[Optional[str]] = []
+        self.tails: List[Optional[str]] = []
+        self.extensions: List[Optional[str]] = []
+        self.mtimes = array('q')
+        self.sizes = array('q')
+        self.dir_ids = array('i')
+        self.directories: List[str] = []
+        self.dir_index: Dict[str, int] = {}
+        self.dir_slots: List[Dict[str, int]] = []
+        self.dir_children: Dict[int, List[int]] = {}
+        self.tombstones = 0
+        for file in files:
+            self.append(file)
+    
+    @classmethod
+    def from_columns(cls, names: List[str], paths: List[str], extensions: List[str], mtimes: array,
+                     sizes: Optional[array] = None) -> 'FileColumns':
+        """
+        Build columns from parallel lists without going through per-file dicts.
+        
+        Args:
+            names: File names
+            paths: Full paths
+            extensions: Lowercased extensions
+            mtimes: Modification times as an array('q')
+            sizes: Sizes in bytes as an array('q') (zeros if omitted)
+            
+        Returns:
+            FileColumns with no tombstones
+        """
+        columns = cls()
+        intern_dir = columns._intern_directory
+        dir_ids = array('i')
+        tails = []
+        for name, path in zip(names, paths):
+            prefix, tail = split_path(path)
+            dir_ids.append(intern_dir(prefix))
+            tails.append(name if tail == name else tail)
+        if sizes is None:
+            sizes = array('q', bytes(8 * len(names)))
+        columns._fill(names, tails, extensions, mtimes, sizes, dir_ids)
+        return columns
+    
+    @classmethod
+    def from_parts(cls, names: List[str], tails: List[str], extensions: List[str], mtimes: array,
+                   sizes: array, directories: List[str], dir_ids: array) -> 'FileColumns':
+        """
+        Build columns from already split paths (e.g. a snapshot file).
+        
+        Args:
+            names: File names
+            tails: Final path components, or '' where equal to the name
+            extensions: Lowercased extensions
+            mtimes: Modification times as an array('q')
+            sizes: Sizes in bytes as an array('q')
+            directories: Directory prefix table
+            dir_ids: Index into directories for each slot
+            
+        Returns:
+            FileColumns with no tombstones
+        """
+        columns = cls()
+        columns.directories = directories
+        columns.dir_index = {directory: i for i, directory in enumerate(directories)}
+        columns.dir_slots = [{} for _ in directories]
+        for dir_id, directory in enumerate(list(directories)):
+            columns._link_parent(dir_id, directory)
+        tails = [tail or name for name, tail in zip(names, tails)]
+        columns._fill(names, tails, extensions, mtimes, sizes, dir_ids)
+        return columns
+    
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[str, str, str, int, Optional[int]]]) -> 'FileColumns':
+        """Build columns from (name, path, extension, modified_time, size) rows."""
+        if not rows:
+            return cls()
+        names, paths, extensions, mtimes, sizes = zip(*rows)
+        return cls.from_columns(
+            list(names),
+            list(paths),
+            [extension or '' for extension in extensions],
+            array('q', (mtime or 0 for mtime in mtimes)),
+            array('q', (size or 0 for size in sizes))
+        )
+    
+    def _fill(self, names: List[str], tails: List[str], extensions: List[str], mtimes: array, sizes: array,
+              dir_ids: array):
+        """Install complete columns and index every slot under its directory."""
+        lower = self._lower
+        self.names = names
+        self.names_lower = [lower(name) for name in names]
+        self.tails = tails
+        self.extensions = list(map(sys.intern, extensions))
+        self.mtimes = mtimes
+        self.sizes = sizes
+        self.dir_ids = dir_ids
+        self.tombstones = 0
+        dir_slots = self.dir_slots
+        for slot, (dir_id, tail) in enumerate(zip(dir_ids, tails)):
+            dir_slots[dir_id][tail] = slot
+    
+    def copy(self) -> 'FileColumns':
+        """
+        Copy the columns for an independent writer.
+        
+        Containers are copied; the strings in them are immutable and shared,
+        so a copy costs pointers and array storage, not string data.
+        """
+        columns = FileColumns()
+        columns.names = self.names.copy()
+        columns.names_lower = self.names_lower.copy()
+        columns.tails = self.tails.copy()
+        columns.extensions = self.extensions.copy()
+        columns.mtimes = array('q', self.mtimes)
+        columns.sizes = array('q', self.sizes)
+        columns.dir_ids = array('i', self.dir_ids)
+        columns.directories = self.directories.copy()
+        columns.dir_index = self.dir_index.copy()
+        columns.dir_slots = [slots.copy() for slots in self.dir_slots]
+        columns.dir_children = {dir_id: children.copy() for dir_id, children in self.dir_children.items()}
+        columns.tombstones = self.tombstones
+        return columns
+    
+    def __len__(self) -> int:
+        """Number of live (non-tombstoned) files."""
+        return len(self.names) - self.tombstones
+    
+    @property
+    def slot_count(self) -> int:
+        """Number of slots, including tombstones."""
+        return len(self.names)
+    
+    @staticmethod
+    def _lower(name: str) -> str:
+        """Lowercase a name, sharing the original string when unchanged."""
+        lowered = name.lower()
+        return name if lowered == name else lowered
+    
+    def _intern_directory(self, prefix: str) -> int:
+        """Get the id of a directory prefix, adding it (and its ancestors) if new."""
+        dir_id = self.dir_index.get(prefix)
+        if dir_id is None:
+            dir_id = len(self.directories)
+            self.directories.append(prefix)
+            self.dir_index[prefix] = dir_id
+            self.dir_slots.append({})
+            self._link_parent(dir_id, prefix)
+        return dir_id
+    
+    def _link_parent(self, dir_id: int, prefix: str):
+        """Register a directory as a child of its parent prefix."""
+        parent, _ = split_path(prefix[:-1])
+        if parent and parent != prefix:
+            self.dir_children.setdefault(self._intern_directory(parent), []).append(dir_id)
+    
+    def subtree_dir_ids(self, directory: str) -> List[int]:
+        """
+        Get the ids of a directory and every directory below it.
+        
+        Args:
+            directory: Directory path, with or without a trailing separator
+            
+        Returns:
+            Directory ids (empty if nothing under it is indexed)
+        """
+        root = self.dir_index.get(prefix_bounds(directory)[0])
+        if root is None:
+            return []
+        
+        found = []
+        stack = [root]
+        while stack:
+            dir_id = stack.pop()
+            found.append(dir_id)
+            stack.extend(self.dir_children.get(dir_id, ()))
+        return found
+    
+    def path(self, slot: int) -> Optional[str]:
+        """Rebuild the full path stored in a slot (None for tombstones)."""
+        tail = self.tails[slot]
+        if tail is None:
+            return None
+        return self.directories[self.dir_ids[slot]] + tail
+    
+    def iter_paths(self) -> Iterator[Optional[str]]:
+        """Yield the path of every slot in order."""
+        directories = self.directories
+        for dir_id, tail in zip(self.dir_ids, self.tails):
+            yield None if tail is None else directories[dir_id] + tail
+    
+    def tree_slots(self, directory: str) -> List[int]:
+        """Get the live slots of every file under a directory."""
+        dir_slots = self.dir_slots
+        return [slot for dir_id in self.subtree_dir_ids(directory) for slot in dir_slots[dir_id].values()]
+    
+    def slot_of(self, path: str) -> Optional[int]:
+        """Get the slot holding a path, if indexed."""
+        prefix, tail = split_path(path)
+        dir_id = self.dir_index.get(prefix)
+        if dir_id is None:
+            return None
+        return self.dir_slots[dir_id].get(tail)
+    
+    def _locate(self, path: str, name: str) -> Tuple[int, str]:
+        """Get the directory id and tail (shared with name if equal) for a path."""
+        prefix, tail = split_path(path)
+        return self._intern_directory(prefix), name if tail == name else tail
+    
+    def append(self, file: Dict) -> int:
+        """Append a file and return its slot."""
+        name = file['name']
+        dir_id, tail = self._locate(file['path'], name)
+        slot = len(self.names)
+        self.names.append(name)
+        self.names_lower.append(self._lower(name))
+        self.tails.append(tail)
+        self.extensions.append(sys.intern(file['extension'] or ''))
+        self.mtimes.append(file['modified_time'] or 0)
+        self.sizes.append(file.get('size') or 0)
+        self.dir_ids.append(dir_id)
+        self.dir_slots[dir_id][tail] = slot
+        return slot
+    
+    def set(self, slot: int, file: Dict):
+        """Overwrite the file stored in a live slot."""
+        name = file['name']
+        dir_id, tail = self._locate(file['path'], name)
+        old_dir_id, old_tail = self.dir_ids[slot], self.tails[slot]
+        if old_dir_id != dir_id or old_tail != tail:
+            del self.dir_slots[old_dir_id][old_tail]
+        self.dir_slots[dir_id][tail] = slot
+        self.names[slot] = name
+        self.names_lower[slot] = self._lower(name)
+        self.tails[slot] = tail
+        self.extensions[slot] = sys.intern(file['extension'] or '')
+        self.mtimes[slot] = file['modified_time'] or 0
+        self.sizes[slot] = file.get('size') or 0
+        self.dir_ids[slot] = dir_id
+    
+    def remove(self, slot: int):
+        """Tombstone a live slot."""
+        del self.dir_slots[self.dir_ids[slot]][self.tails[slot]]
+        self.names[slot] = None
+        self.names_lower[slot] = None
+        self.tails[slot] = None
+        self.extensions[slot] = None
+        self.mtimes[slot] = 0
+        self.sizes[slot] = 0
+        self.tombstones += 1
+    
+    def remove_slots(self, slots: List[int]):
+        """Tombstone many live slots at once (e.g. a whole subtree)."""
+        names, names_lower, tails = self.names, self.names_lower, self.tails
+        extensions, mtimes, sizes = self.extensions, self.mtimes, self.sizes
+        dir_ids, dir_slots = self.dir_ids, self.dir_slots
+        for slot in slots:
+            del dir_slots[dir_ids[slot]][tails[slot]]
+            names[slot] = names_lower[slot] = tails[slot] = extensions[slot] = None
+            mtimes[slot] = sizes[slot] = 0
+        self.tombstones += len(slots)
+    
+    def compact(self):
+        """
+        Drop tombstoned slots and directories left without files.
+        
+        Live files keep their relative order but get new slots.
+        """
+        live = [slot for slot, name in enumerate(self.names) if name is not None]
+        old_directories = self.directories
+        old_dir_ids = self.dir_ids
+        
+        self.directories = []
+        self.dir_index = {}
+        self.dir_slots = []
+        self.dir_children = {}
+        intern_dir = self._intern_directory
+        dir_ids = array('i', (intern_dir(old_directories[old_dir_ids[slot]]) for slot in live))
+        
+        self._fill(
+            [self.names[slot] for slot in live],
+            [self.tails[slot] for slot in live],
+            [self.extensions[slot] for slot in live],
+            array('q', (self.mtimes[slot] for slot in live)),
+            array('q', (self.sizes[slot] for slot in live)),
+            dir_ids
+        )
+    
+    def row(self, slot: int) -> Dict:
+        """Materialize a slot as a file dictionary."""
+        return {
+            'name': self.names[slot],
+            'path': self.path(slot),
+            'extension': self.extensions[slot],
+            'modified_time': self.mtimes[slot],
+            'size': self.sizes[slot]
+        }
+    
+    def rows(self) -> Iterator[Dict]:
+        """Materialize every live slot as a file dictionary, in slot order."""
+        for slot, name in enumerate(self.names):
+            if name is not None:
+                yield self.row(slot)
+    
+    def memory_stats(self, seen: Optional[Set[int]] = None) -> Dict:
+        """
+        Estimate memory held by the columns.
+        
+        Strings shared between columns (unchanged lowercase names, tails
+        equal to the name, interned extensions) are only counted once.
+        
+        Args:
+            seen: ids of strings already counted, e.g. by the copy this one
+                was made from; updated with the strings counted here
+                
+        Returns:
+            Total bytes, bytes per file and a per-column breakdown
+        """
+        seen = set() if seen is None else seen
+        
+        def strings_size(values: List[str]) -> int:
+            size = sys.getsizeof(values)
+            for value in values:
+                if value is not None and id(value) not in seen:
+                    seen.add(id(value))
+                    size += sys.getsizeof(value)
+            return size
+        
+        columns = {
+            'names': strings_size(self.names),
+            'names_lower': strings_size(self.names_lower),
+            'tails': strings_size(self.tails),
+            'extensions': strings_size(self.extensions),
+            'mtimes': sys.getsizeof(self.mtimes),
+            'sizes': sys.getsizeof(self.sizes),
+            'dir_ids': sys.getsizeof(self.dir_ids),
+            'directories': strings_size(self.directories) + sys.getsizeof(self.dir_index),
+            'dir_slots': sys.getsizeof(self.dir_slots) + sum(map(sys.getsizeof, self.dir_slots))
+        }
+        total = sum(columns.values())
+        count = len(self)
+        
+        return {
+            'file_count': count,
+            'directory_count': len(self.directories),
+            'tombstones': self.tombstones,
+            'total_bytes': total,
+            'bytes_per_file': round(total / count, 1) if count else 0,
+            'columns': columns
+        }
@@ -0,0 +1,267 @@
+"""Structured search filters and the posting lists that evaluate them."""
+from array import array
+from bisect import bisect_left
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set
+from backend.search.columns import FileColumns
+
+# Width of a modification-time bucket
+MTIME_BUCKET_SECONDS = 86400
+
+
+def _size_bucket(size: int) -> int:
+    """Power-of-two size class (0 for empty files)."""
+    return size.bit_length()
+
+
+def _insert(postings: Dict, key, slot: int):
+    """Add a slot to a sorted posting list."""
+    posting = postings.get(key)
+    if posting is None:
+        postings[key] = array('i', [slot])
+    elif posting[-1] < slot:
+        posting.append(slot)
+    else:
+        i = bisect_left(posting, slot)
+        if i == len(posting) or posting[i] != slot:
+            posting.insert(i, slot)
+
+
+def _discard(postings: Dict, key, slot: int):
+    """Remove a slot from a sorted posting list, if present."""
+    posting = postings.get(key)
+    if posting is None:
+        return
+    i = bisect_left(posting, slot)
+    if i < len(posting) and posting[i] == slot:
+        del posting[i]
+        if not posting:
+            del postings[key]
+
+
+class SearchFilters:
+    """Restrictions on extension, modification time, size and directory."""
+    
+    __slots__ = ('extensions', 'modified_after', 'modified_before', 'min_size', 'max_size', 'directory')
+    
+    def __init__(self,
+                 extensions: Optional[Iterable[str]] = None,
+                 modified_after: Optional[int] = None,
+                 modified_before: Optional[int] = None,
+                 min_size: Optional[int] = None,
+                 max_size: Optional[int] = None,
+                 directory: Optional[str] = None):
+        """
+        Initialize filters; None leaves a dimension unrestricted.
+        
+        Args:
+            extensions: Allowed extensions (case-insensitive, leading dot optional)
+            modified_after: Earliest modification time (Unix seconds, inclusive)
+            modified_before: Latest modification time (Unix seconds, inclusive)
+            min_size: Smallest size in bytes (inclusive)
+            max_size: Largest size in bytes (inclusive)
+            directory: Only files under this directory
+        """
+        self.extensions: Optional[FrozenSet[str]] = None
+        if extensions is not None:
+            self.extensions = frozenset(
+                ext if ext.startswith('.') or not ext else '.' + ext
+                for ext in (e.strip().lower() for e in extensions)
+            )
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.min_size = min_size
+        self.max_size = max_size
+        self.directory = directory or None
+    
+    @classmethod
+    def from_dict(cls, data: Optional[Dict]) -> Optional['SearchFilters']:
+        """
+        Parse filters from an API request body.
+        
+        Args:
+            data: Mapping with any of extensions, modified_after,
+                modified_before, min_size, max_size and directory
+                
+        Returns:
+            SearchFilters, or None if no filter is set
+            
+        Raises:
+            ValueError: If a value has the wrong type
+        """
+        if not data:
+            return None
+        if not isinstance(data, dict):
+            raise ValueError("filters must be an object")
+        
+        def number(key: str) -> Optional[int]:
+            value = data.get(key)
+            if value is None:
+                return None
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                raise ValueError(f"{key} must be a number")
+            return int(value)
+        
+        extensions = data.get('extensions')
+        if extensions is not None:
+            if not isinstance(extensions, list) or not all(isinstance(ext, str) for ext in extensions):
+                raise ValueError("extensions must be a list of strings")
+        
+        directory = data.get('directory')
+        if directory is not None and not isinstance(directory, str):
+            raise ValueError("directory must be a string")
+        
+        filters = cls(
+            extensions=extensions,
+            modified_after=number('modified_after'),
+            modified_before=number('modified_before'),
+            min_size=number('min_size'),
+            max_size=number('max_size'),
+            directory=directory
+        )
+        return None if filters.is_empty() else filters
+    
+    def is_empty(self) -> bool:
+        return (self.extensions is None and self.modified_after is None and self.modified_before is None
+                and self.min_size is None and self.max_size is None and self.directory is None)
+    
+    def matches(self, columns: FileColumns, slot: int, dir_ids: Optional[Set[int]] = None) -> bool:
+        """
+        Check a slot against the filters.
+        
+        Args:
+            columns: Columns holding the slot
+            slot: Slot to check (tombstones never match)
+            dir_ids: Directory ids under the directory filter, if one is set
+        """
+        if columns.names[slot] is None:
+            return False
+        if dir_ids is not None and columns.dir_ids[slot] not in dir_ids:
+            return False
+        if self.extensions is not None and columns.extensions[slot] not in self.extensions:
+            return False
+        mtime = columns.mtimes[slot]
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime > self.modified_before:
+            return False
+        size = columns.sizes[slot]
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        return True
+    
+    def to_dict(self) -> Dict:
+        return {
+            'extensions': sorted(self.extensions) if self.extensions is not None else None,
+            'modified_after': self.modified_after,
+            'modified_before': self.modified_before,
+            'min_size': self.min_size,
+            'max_size': self.max_size,
+            'directory': self.directory
+        }
+
+
+class FilterIndex:
+    """
+    Posting lists of slots per extension, per day of modification and per
+    power-of-two size class.
+    
+    Each active filter selects the posting lists its range overlaps; the
+    smallest selection is walked and every slot in it is verified against
+    all filters, so bucket boundaries and stale entries left by bulk
+    removals never leak into the result.
+    """
+    
+    def __init__(self):
+        self.by_extension: Dict[str, array] = {}
+        self.by_day: Dict[int, array] = {}
+        self.by_size: Dict[int, array] = {}
+    
+    def build(self, columns: FileColumns):
+        """Rebuild all posting lists from the columns, slot = position."""
+        by_extension: Dict[str, array] = {}
+        by_day: Dict[int, array] = {}
+        by_size: Dict[int, array] = {}
+        
+        for slot, (name, extension, mtime, size) in enumerate(
+                zip(columns.names, columns.extensions, columns.mtimes, columns.sizes)):
+            if name is None:
+                continue
+            for postings, key in ((by_extension, extension),
+                                  (by_day, mtime // MTIME_BUCKET_SECONDS),
+                                  (by_size, _size_bucket(size))):
+                posting = postings.get(key)
+                if posting is None:
+                    posting = postings[key] = array('i')
+                posting.append(slot)
+        
+        self.by_extension = by_extension
+        self.by_day = by_day
+        self.by_size = by_size
+    
+    def add(self, slot: int, extension: str, mtime: int, size: int):
+        """Index a slot under its extension, day and size class."""
+        _insert(self.by_extension, extension, slot)
+        _insert(self.by_day, mtime // MTIME_BUCKET_SECONDS, slot)
+        _insert(self.by_size, _size_bucket(size), slot)
+    
+    def remove(self, slot: int, extension: str, mtime: int, size: int):
+        """Drop a slot indexed under the given values."""
+        _discard(self.by_extension, extension, slot)
+        _discard(self.by_day, mtime // MTIME_BUCKET_SECONDS, slot)
+        _discard(self.by_size, _size_bucket(size), slot)
+    
+    @staticmethod
+    def _range(postings: Dict[int, array], low: Optional[int], high: Optional[int]) -> List[array]:
+        """Posting lists whose bucket key lies in [low, high]."""
+        return [
+            posting for key, posting in postings.items()
+            if (low is None or key >= low) and (high is None or key <= high)
+        ]
+    
+    def slots(self, filters: SearchFilters, columns: FileColumns) -> List[int]:
+        """
+        Find every live slot satisfying the filters.
+        
+        Args:
+            filters: Filters to apply
+            columns: Columns the posting lists were built over
+            
+        Returns:
+            Sorted list of matching slots
+        """
+        options = []
+        dir_ids = None
+        if filters.directory is not None:
+            dir_ids = set(columns.subtree_dir_ids(filters.directory))
+            options.append([columns.tree_slots(filters.directory)])
+        if filters.extensions is not None:
+            options.append([self.by_extension[ext] for ext in filters.extensions if ext in self.by_extension])
+        if filters.modified_after is not None or filters.modified_before is not None:
+            options.append(self._range(
+                self.by_day,
+                None if filters.modified_after is None else filters.modified_after // MTIME_BUCKET_SECONDS,
+                None if filters.modified_before is None else filters.modified_before // MTIME_BUCKET_SECONDS
+            ))
+        if filters.min_size is not None or filters.max_size is not None:
+            options.append(self._range(
+                self.by_size,
+                None if filters.min_size is None else _size_bucket(max(filters.min_size, 0)),
+                None if filters.max_size is None else _size_bucket(max(filters.max_size, 0))
+            ))
+        
+        # Walk the most selective dimension and verify the rest per slot
+        narrowest = min(options, key=lambda lists: sum(map(len, lists)))
+        matches = filters.matches
+        found = [slot for posting in narrowest for slot in posting if matches(columns, slot, dir_ids)]
+        found.sort()
+        return found
+    
+    def get_stats(self) -> Dict:
+        """Get index statistics."""
+        return {
+            'extensions': len(self.by_extension),
+            'day_buckets': len(self.by_day),
+            'size_buckets': len(self.by_size)
+        }
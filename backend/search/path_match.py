@@ -0,0 +1,73 @@
+"""Matching query tokens against directory names for path-aware search."""
+import os
+import threading
+from typing import Dict, List
+from rapidfuzz import process, fuzz
+from backend.search.columns import FileColumns
+
+_SEPARATORS = os.sep + (os.altsep or '')
+
+
+def directory_name(prefix: str) -> str:
+    """Get the lowercased last component of a directory prefix ('' for a root)."""
+    stripped = prefix.rstrip(_SEPARATORS)
+    return stripped[max(stripped.rfind(sep) for sep in _SEPARATORS) + 1:].lower()
+
+
+class DirectoryMatcher:
+    """
+    Fuzzy-match query tokens against directory names.
+    
+    Each interned directory is scored once per token, however many files
+    it holds, and a match carries down to every directory below it, so
+    "proj2024" matches files anywhere under a proj2024 folder.
+    """
+    
+    def __init__(self, columns: FileColumns):
+        self.columns = columns
+        self.names: List[str] = []  # Lowercased last component per directory id
+        self.lock = threading.Lock()  # Concurrent searches refresh the names
+    
+    def _refresh(self):
+        """Pick up directories interned since the last match."""
+        directories = self.columns.directories
+        with self.lock:
+            if len(self.names) < len(directories):
+                self.names.extend(directory_name(prefix) for prefix in directories[len(self.names):])
+    
+    def match(self, token: str, score_cutoff: float) -> Dict[int, float]:
+        """
+        Score a token against every directory.
+        
+        Args:
+            token: Lowercased query token
+            score_cutoff: Minimum score for a directory name to match
+            
+        Returns:
+            Directory id -> best score of the directory or any ancestor
+        """
+        self._refresh()
+        hits = [
+            (score, dir_id)
+            for _, score, dir_id in process.extract_iter(
+                token,
+                self.names,
+                scorer=fuzz.WRatio,
+                processor=None,
+                score_cutoff=score_cutoff
+            )
+        ]
+        
+        # Best matches first: a directory already reached was reached from an
+        # ancestor scoring at least as well, which also covered its subtree
+        children = self.columns.dir_children
+        best: Dict[int, float] = {}
+        for score, dir_id in sorted(hits, reverse=True):
+            stack = [dir_id]
+            while stack:
+                current = stack.pop()
+                if current in best:
+                    continue
+                best[current] = score
+                stack.extend(children.get(current, ()))
+        return best
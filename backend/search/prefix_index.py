@@ -0,0 +1,69 @@
+"""Sorted name index for exact-prefix lookups."""
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional
+
+# Sorts after any character a name can contain
+_MAX_CHAR = chr(sys.maxunicode)
+
+
+class PrefixIndex:
+    """
+    Lowercased names in sorted order with their slots.
+    
+    A prefix is two binary searches away, so exact-prefix hits come back
+    in microseconds however large the index. Equal names are kept in slot
+    order; updates insert and delete in place.
+    """
+    
+    def __init__(self):
+        self.keys: List[str] = []
+        self.slots = array('i')
+    
+    def build(self, names_lower: List[Optional[str]]):
+        """Rebuild from the lowercased name column, skipping tombstones."""
+        order = sorted(
+            (slot for slot, name in enumerate(names_lower) if name is not None),
+            key=names_lower.__getitem__
+        )
+        self.keys = [names_lower[slot] for slot in order]
+        self.slots = array('i', order)
+    
+    def _position(self, name: str, slot: int) -> int:
+        """Find where (name, slot) sits or would be inserted."""
+        i = bisect_left(self.keys, name)
+        end = bisect_right(self.keys, name, i)
+        while i < end and self.slots[i] < slot:
+            i += 1
+        return i
+    
+    def add(self, slot: int, name: str):
+        """Index a lowercased name under a slot."""
+        i = self._position(name, slot)
+        self.keys.insert(i, name)
+        self.slots.insert(i, slot)
+    
+    def remove(self, slot: int, name: str):
+        """Drop a slot previously indexed under a lowercased name."""
+        i = self._position(name, slot)
+        if i < len(self.keys) and self.keys[i] == name and self.slots[i] == slot:
+            del self.keys[i]
+            del self.slots[i]
+    
+    def matches(self, prefix: str) -> Iterator[int]:
+        """Yield the slots of names starting with a lowercased prefix, in name order."""
+        start = bisect_left(self.keys, prefix)
+        end = bisect_left(self.keys, prefix + _MAX_CHAR, start)
+        slots = self.slots
+        return (slots[i] for i in range(start, end))
+    
+    def __len__(self) -> int:
+        return len(self.keys)
+    
+    def get_stats(self) -> Dict:
+        """Get index statistics."""
+        return {
+            'names': len(self.keys),
+            'bytes': sys.getsizeof(self.keys) + sys.getsizeof(self.slots)
+        }
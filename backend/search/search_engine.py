@@ -1,19 +1,41 @@
 """Fuzzy search engine with ranking."""
-from typing import List, Dict, Optional
+import heapq
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from itertools import combinations, count
+from typing import Iterable, Iterator, List, Dict, Optional, Set, Tuple
 from rapidfuzz import process, fuzz
 from backend.config.config import Config
 from backend.search.cache import SearchCache
+from backend.search.columns import FileColumns
+from backend.search.filters import FilterIndex, SearchFilters
+from backend.search.path_match import DirectoryMatcher
+from backend.search.prefix_index import PrefixIndex
+from backend.search import sharded
+from backend.search.trigram_index import PrefixCandidates, TrigramIndex
 
 
 class SearchResult:
-    """Search result with score and metadata."""
+    """
+    Search result with score and metadata.
     
-    def __init__(self, name: str, path: str, extension: str, modified_time: int, score: float):
+    The score blends the name's match score (WRatio, 0-100) with its
+    recency. Tiered name searches list exact prefix hits, then substring
+    hits, then fuzzy matches, so a result can outscore one in an earlier
+    tier; scores are only ordered within a tier.
+    """
+    
+    __slots__ = ('name', 'path', 'extension', 'modified_time', 'score', 'size')
+    
+    def __init__(self, name: str, path: str, extension: str, modified_time: int, score: float, size: int = 0):
         self.name = name
         self.path = path
         self.extension = extension
         self.modified_time = modified_time
         self.score = score
+        self.size = size
     
     def to_dict(self) -> Dict:
         return {
@@ -21,13 +43,30 @@ class SearchResult:
             'path': self.path,
             'extension': self.extension,
             'modified_time': self.modified_time,
+            'size': self.size,
             'score': round(self.score, 2)
         }
 
 
+# 'name' matches file names; 'path' lets query tokens match directory names too
+SEARCH_MODES = ('name', 'path')
+
+# Name search tiers, in ranking order
+SEARCH_TIERS = ('prefix', 'substring', 'fuzzy')
+
+
 class SearchEngine:
     """Fuzzy search engine with intelligent ranking."""
     
+    # Tombstones tolerated before compacting the columns
+    COMPACT_MIN_TOMBSTONES = 1024
+    
+    # Larger subtree removals skip per-file posting and cache maintenance
+    BULK_REMOVE_THRESHOLD = 1000
+    
+    # Path mode tries every split of at most this many directory-matching tokens
+    PATH_MAX_DIRECTORY_TOKENS = 4
+    
     def __init__(self, files: List[Dict], use_cache: bool = True):
         """
         Initialize search engine with file index.
@@ -36,86 +75,590 @@ class SearchEngine:
             files: List of file dictionaries from database
             use_cache: Whether to enable query result caching
         """
-        self.files = files
+        self.columns = FileColumns(files)
         self.max_results = Config.MAX_RESULTS
         self.fuzzy_threshold = Config.FUZZY_THRESHOLD
         self.use_cache = use_cache
-        self.cache = SearchCache(Config.CACHE_SIZE) if use_cache else None
+        self.cache = SearchCache(Config.CACHE_SIZE, Config.CACHE_MAX_BYTES, Config.CACHE_TTL_SECONDS) if use_cache else None
+        self.trigram_index = TrigramIndex(Config.TRIGRAM_MIN_QUERY_LENGTH, Config.TRIGRAM_MIN_OVERLAP)
+        self.filter_index: Optional[FilterIndex] = None  # Built on the first filtered search
+        self.directory_matcher: Optional[DirectoryMatcher] = None  # Built on the first path search
+        self.prefix_index: Optional[PrefixIndex] = None  # Built on the first prefix lookup
+        # Deeper rankings kept for paging: list id -> (query key, layout version, depth, ranked)
+        self.pages: 'OrderedDict[str, Tuple[tuple, int, int, List[tuple]]]' = OrderedDict()
+        self.page_ids = count(1)
+        self.layout_version = 0  # Bumped whenever slots are renumbered
+        # Recency score per slot, rebuilt on the first search of each day
+        self.recency: Optional[array] = None
+        self.recency_day: Optional[int] = None
+        self.last_candidate_count: Optional[int] = None
+        # Per-session trigram counts of the last query, least recently used first
+        self.sessions: 'OrderedDict[str, PrefixCandidates]' = OrderedDict()
+        self.prefix_reuses = 0
+        # Searches run concurrently: state_lock guards the session and page
+        # lists, build_lock the lazily built filter and prefix indexes
+        self.state_lock = threading.Lock()
+        self.build_lock = threading.Lock()
+        # Searches scoring at least parallel_min_names names are sharded across threads
+        self.search_workers = Config.SEARCH_WORKERS
+        self.parallel_min_names = Config.PARALLEL_SEARCH_MIN_NAMES
+        self.sharded_scorer: Optional[sharded.ShardedScorer] = None
+        self.sharded_searches = 0
+        # While set (by IndexVersions, during a delta), cache invalidations are
+        # recorded here instead of applied; None stands for the whole cache
+        self.deferred_invalidations: Optional[List[Optional[str]]] = None
+        # Name searches try exact prefix and substring hits before fuzzy scoring
+        self.tiered = Config.TIERED_SEARCH
+        self.last_tiers: Optional[Dict[str, Dict]] = None
+        self.tier_answers = {tier: 0 for tier in SEARCH_TIERS}
+        self._build_trigram_index()
     
-    def search(self, query: str) -> List[SearchResult]:
+    @classmethod
+    def from_columns(cls, columns: FileColumns, use_cache: bool = True,
+                     trigram_index: Optional[TrigramIndex] = None) -> 'SearchEngine':
+        """
+        Create an engine over prebuilt columns (e.g. from a snapshot file).
+        
+        Args:
+            columns: Column store to search
+            use_cache: Whether to enable query result caching
+            trigram_index: Postings matching the columns' slots; built if omitted
+        """
+        engine = cls([], use_cache=use_cache)
+        engine.columns = columns
+        if trigram_index is not None:
+            engine.trigram_index = trigram_index
+        else:
+            engine._build_trigram_index()
+        return engine
+    
+    def compact(self):
+        """Drop tombstoned slots now (renumbers slots and rebuilds postings)."""
+        if self.columns.tombstones:
+            self.columns.compact()
+            self._build_trigram_index()
+    
+    def _build_trigram_index(self):
+        """Build the trigram index over the current file names (filter and recency data are rebuilt on next use)."""
+        self.trigram_index.build(self.columns.names_lower)
+        self.filter_index = None
+        self.recency = None
+        self.directory_matcher = None
+        self.prefix_index = None
+        self.layout_version += 1
+    
+    def _filter_slots(self, filters: SearchFilters) -> List[int]:
+        """Get the slots passing the filters, building the filter postings if needed."""
+        filter_index = self.filter_index
+        if filter_index is None:
+            with self.build_lock:
+                if self.filter_index is None:
+                    # Published only once built, for searches not holding the lock
+                    built = FilterIndex()
+                    built.build(self.columns)
+                    self.filter_index = built
+                filter_index = self.filter_index
+        return filter_index.slots(filters, self.columns)
+    
+    def _prefix_index(self) -> PrefixIndex:
+        """Get the sorted name index, building it if needed."""
+        prefix_index = self.prefix_index
+        if prefix_index is None:
+            with self.build_lock:
+                if self.prefix_index is None:
+                    built = PrefixIndex()
+                    built.build(self.columns.names_lower)
+                    self.prefix_index = built
+                prefix_index = self.prefix_index
+        return prefix_index
+    
+    def search(self, query: str, filters: Optional[SearchFilters] = None,
+               session: Optional[str] = None, mode: str = 'name') -> List[SearchResult]:
         """
         Search for files matching the query.
         
         Args:
             query: Search query string
-            
+            filters: Restrict results before scoring (filtered searches are not cached)
+            session: Search-as-you-type session; a query extending the session's
+                previous query narrows from its trigram counts
+            mode: 'name' to match file names, 'path' to also let query tokens
+                match directory names (path searches are not cached)
+                
         Returns:
             List of SearchResult objects, ranked by relevance
+            
+        Raises:
+            ValueError: If the mode is unknown
         """
-        if not query or not self.files:
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        
+        columns = self.columns
+        if not query or not len(columns):
             return []
         
         query = query.lower().strip()
+        if filters is not None and filters.is_empty():
+            filters = None
+        use_cache = bool(self.use_cache and self.cache) and filters is None and mode == 'name'
         
         # Check cache first
-        if self.use_cache and self.cache:
+        if use_cache:
             cached_results = self.cache.get(query)
             if cached_results is not None:
                 return cached_results
         
-        # Extract file names for fuzzy matching
-        file_names = [f['name'] for f in self.files]
+        final_results = self._results(self._ranked(query, filters, session, mode, self.max_results))
+        
+        # Cache the results
+        if use_cache:
+            self.cache.set(query, final_results)
+        
+        return final_results
+    
+    def search_page(self, query: str, filters: Optional[SearchFilters] = None, mode: str = 'name',
+                    cursor: Optional[str] = None, page_size: Optional[int] = None,
+                    session: Optional[str] = None) -> Tuple[List[SearchResult], Optional[str]]:
+        """
+        Get one page of results and a cursor for the next.
+        
+        The first page is an ordinary (cached) search. Later pages are cut
+        from a ranking RANKED_LIST_DEPTH deep, computed on the first request
+        past page one and kept per query; a cursor whose list was dropped or
+        whose slots were renumbered by compaction ranks again.
+        
+        Args:
+            query: Search query string
+            filters: Restrict results before scoring
+            mode: Search mode (see search)
+            cursor: Cursor returned with the previous page, None for the first
+            page_size: Results per page (defaults to max_results)
+            session: Search-as-you-type session (first page only)
+            
+        Returns:
+            Tuple of (results, cursor for the next page or None at the end)
+            
+        Raises:
+            ValueError: If the mode, cursor or page size is invalid
+        """
+        page_size = page_size or self.max_results
+        if page_size < 1:
+            raise ValueError("page_size must be positive")
+        
+        if cursor is None and page_size == self.max_results:
+            results = self.search(query, filters, session, mode)
+            # A full first page may have more behind it; '-' marks a list not ranked yet
+            return results, f"-:{page_size}" if len(results) == page_size else None
+        
+        list_id, offset = '-', 0
+        if cursor is not None:
+            list_id, _, offset = cursor.partition(':')
+            if not offset.isdigit():
+                raise ValueError(f"Malformed cursor: {cursor}")
+            offset = int(offset)
+        
+        if mode not in SEARCH_MODES:
+            raise ValueError(f"Unknown search mode: {mode}")
+        query = query.lower().strip()
+        if filters is not None and filters.is_empty():
+            filters = None
+        key = (query, mode, repr(filters.to_dict()) if filters is not None else None)
+        
+        end = offset + page_size
+        with self.state_lock:
+            entry = self.pages.get(list_id)
+            if entry is not None and entry[0] == key and entry[1] == self.layout_version and end <= entry[2]:
+                self.pages.move_to_end(list_id)
+            else:
+                entry = None
+        
+        if entry is not None:
+            depth, ranked = entry[2], entry[3]
+        else:
+            depth = max(Config.RANKED_LIST_DEPTH, end)
+            ranked = self._ranked(query, filters, None, mode, depth) if query and len(self.columns) else []
+            with self.state_lock:
+                list_id = str(next(self.page_ids))
+                self.pages[list_id] = (key, self.layout_version, depth, ranked)
+                while len(self.pages) > Config.RANKED_LISTS_CACHED:
+                    self.pages.popitem(last=False)
+        
+        if end < len(ranked):
+            next_cursor = f"{list_id}:{end}"
+        elif len(ranked) == depth:
+            next_cursor = f"-:{end}"  # The ranking was cut off: rank deeper on the next page
+        else:
+            next_cursor = None
+        return self._results(ranked[offset:end]), next_cursor
+    
+    def prefix_search(self, query: str, filters: Optional[SearchFilters] = None,
+                      limit: Optional[int] = None) -> List[SearchResult]:
+        """
+        Find files whose name starts with the query, for a first screenful.
+        
+        Names are looked up in a sorted index; the first few hundred hits
+        (in name order) that pass the filters are scored and ranked like a
+        normal search, so this stays fast however broad the prefix.
+        
+        Args:
+            query: Search query string
+            filters: Restrict results to files passing the filters
+            limit: Number of results (defaults to max_results)
+            
+        Returns:
+            List of SearchResult objects, ranked by relevance
+        """
+        limit = limit or self.max_results
+        query = query.lower().strip()
+        columns = self.columns
+        if not query or not len(columns):
+            return []
+        if filters is not None and filters.is_empty():
+            filters = None
+        
+        dir_ids = None
+        if filters is not None and filters.directory is not None:
+            dir_ids = set(columns.subtree_dir_ids(filters.directory))
+        
+        hits = []
+        for slot in self._prefix_index().matches(query):
+            if columns.names[slot] is None or (filters is not None and not filters.matches(columns, slot, dir_ids)):
+                continue
+            hits.append(slot)
+            if len(hits) >= limit * 4:
+                break
+        
+        recency = self._recency_scores()
+        names_lower = columns.names_lower
+        scored = ((slot, fuzz.WRatio(query, names_lower[slot], processor=None)) for slot in hits)
+        return self._results(self._top_k(scored, recency, limit))
+    
+    def _ranked(self, query: str, filters: Optional[SearchFilters], session: Optional[str], mode: str,
+                limit: int) -> List[tuple]:
+        """
+        Rank the index for a normalized query.
+        
+        Returns:
+            Up to limit (final score, match score, slot) tuples, best first
+            within each tier
+        """
+        if mode == 'name' and self.tiered:
+            return self._ranked_tiers(query, filters, session, limit)
+        return self._ranked_fuzzy(query, filters, session, mode, limit)
+    
+    def _ranked_tiers(self, query: str, filters: Optional[SearchFilters], session: Optional[str],
+                      limit: int) -> List[tuple]:
+        """
+        Rank name matches tier by tier: exact prefixes, substrings, then fuzzy matches.
+        
+        Prefix hits are a range of the sorted name index. Substring hits
+        are the names in the query's rarest trigram posting that contain
+        the query (less the prefix hits). Each tier's hits are scored and
+        ranked like a fuzzy search, by match score and recency, dropping
+        those below the fuzzy threshold, and listed after the tiers before
+        it. The fuzzy scan only runs when the exact
+        tiers fill fewer than limit places; its matches fill the rest.
+        """
+        names_lower = self.columns.names_lower
+        allowed = set(self._filter_slots(filters)) if filters is not None else None
+        recency = self._recency_scores()
+        tiers = {}
+        
+        start = time.perf_counter()
+        # Bulk tree removals leave dead slots (names None) in the postings until compaction
+        hits = [
+            slot for slot in self._prefix_index().matches(query)
+            if names_lower[slot] is not None and (allowed is None or slot in allowed)
+        ]
+        ranked = self._top_k(self._exact_scores(query, hits), recency, limit)
+        tiers['prefix'] = {'hits': len(hits), 'ms': (time.perf_counter() - start) * 1000}
+        scored = len(hits)
+        
+        if len(ranked) < limit:
+            start = time.perf_counter()
+            hits = []
+            posting = self.trigram_index.substring_candidates(query)
+            if posting is not None:
+                for slot in posting:
+                    name = names_lower[slot]
+                    if name is None or query not in name or name.startswith(query):
+                        continue
+                    if allowed is None or slot in allowed:
+                        hits.append(slot)
+                ranked += self._top_k(self._exact_scores(query, hits), recency, limit - len(ranked))
+            tiers['substring'] = {'hits': len(hits), 'ms': (time.perf_counter() - start) * 1000}
+            scored += len(hits)
+        
+        if len(ranked) < limit:
+            start = time.perf_counter()
+            seen = {slot for _, _, slot in ranked}
+            fuzzy = [entry for entry in self._ranked_fuzzy(query, filters, session, 'name', limit) if entry[2] not in seen]
+            ranked += fuzzy[:limit - len(ranked)]
+            tiers['fuzzy'] = {'hits': len(fuzzy), 'ms': (time.perf_counter() - start) * 1000}
+        else:
+            self.last_candidate_count = scored
+        
+        self.last_tiers = tiers
+        with self.state_lock:
+            self.tier_answers[list(tiers)[-1]] += 1
+        return ranked
+    
+    def _exact_scores(self, query: str, hits: List[int]) -> Iterator[Tuple[int, float]]:
+        """
+        Score names containing the query, yielding (slot, match score) pairs
+        for those scoring at least the fuzzy threshold.
+        
+        Once a name is at least 1.5 times the query's length, WRatio of a
+        name containing the query is its full partial-ratio score scaled
+        by the length ratio, so it is computed once per name length.
+        """
+        names_lower = self.columns.names_lower
+        threshold = self.fuzzy_threshold
+        long_name = len(query) * 1.5
+        by_length = {}
+        for slot in hits:
+            name = names_lower[slot]
+            length = len(name)
+            if length < long_name:
+                score = fuzz.WRatio(query, name, processor=None)
+            else:
+                score = by_length.get(length)
+                if score is None:
+                    score = by_length[length] = fuzz.WRatio(query, name, processor=None)
+            if score >= threshold:
+                yield slot, score
+    
+    def _ranked_fuzzy(self, query: str, filters: Optional[SearchFilters], session: Optional[str], mode: str,
+                      limit: int) -> List[tuple]:
+        """Rank the index by fuzzy match score and recency alone."""
+        columns = self.columns
+        
+        # Narrow the candidate set with the trigram index; short queries scan everything
+        if session is not None:
+            candidates = self._session_candidates(session, query)
+        else:
+            candidates = self.trigram_index.candidates(query)
+        slots = candidates
+        allowed = None
+        if filters is not None:
+            # Filters are applied before scoring, so nothing outside the top results is lost
+            allowed = slots = self._filter_slots(filters)
+            if candidates is not None:
+                candidate_set = set(candidates)
+                slots = [slot for slot in slots if slot in candidate_set]
+        self.last_candidate_count = len(columns.names_lower) if slots is None else len(slots)
+        
+        # Rank by the final score (70% match score + 30% recency), keeping only the best few
+        recency = self._recency_scores()
+        scorer = self._scorer_for(self.last_candidate_count) if mode == 'name' else None
+        if mode == 'path':
+            ranked = self._rank_paths(query, slots, None if allowed is None else set(allowed), recency, limit)
+        elif scorer is not None:
+            names = columns.names_lower if slots is None else [columns.names_lower[slot] for slot in slots]
+            ranked = scorer.top_k(query, names, slots, recency, limit, self.fuzzy_threshold)
+            with self.state_lock:
+                self.sharded_searches += 1
+        else:
+            choices = columns.names_lower if slots is None else {slot: columns.names_lower[slot] for slot in slots}
+            ranked = self._rank(query, choices, recency, limit)
+        
+        return ranked
+    
+    def _results(self, ranked: Iterable[tuple]) -> List[SearchResult]:
+        """Build result objects for ranked slots, skipping files removed since ranking."""
+        columns = self.columns
+        return [
+            SearchResult(
+                name=columns.names[slot],
+                path=columns.path(slot),
+                extension=columns.extensions[slot],
+                modified_time=columns.mtimes[slot],
+                score=final_score,
+                size=columns.sizes[slot]
+            )
+            for final_score, _, slot in ranked
+            if columns.names[slot] is not None
+        ]
+    
+    def _rank(self, query: str, choices, recency: array, limit: int) -> List[tuple]:
+        """
+        Score choices in one pass, keeping the best limit in a heap.
         
-        # Perform fuzzy matching using RapidFuzz
-        matches = process.extract(
+        Returns:
+            (final score, match score, slot) tuples, best first; ties go to
+            the better match, then the lower slot
+        """
+        heap = []
+        push, replace = heapq.heappush, heapq.heapreplace
+        for _, match_score, slot in process.extract_iter(
             query,
-            file_names,
+            choices,
             scorer=fuzz.WRatio,  # Weighted ratio for better results
-            limit=self.max_results * 2,  # Get more results for re-ranking
+            processor=None,
             score_cutoff=self.fuzzy_threshold
-        )
+        ):
+            final_score = match_score * 0.7 + recency[slot] * 0.3
+            if len(heap) < limit:
+                push(heap, (final_score, match_score, -slot))
+            elif final_score >= heap[0][0]:
+                entry = (final_score, match_score, -slot)
+                if entry > heap[0]:
+                    replace(heap, entry)
         
-        # Convert to SearchResult objects with enhanced ranking
-        results = []
-        for match_name, match_score, match_index in matches:
-            file = self.files[match_index]
-            
-            # Calculate final score (70% match score + 30% recency)
-            recency_score = self._calculate_recency_score(file['modified_time'])
-            final_score = (match_score * 0.7) + (recency_score * 0.3)
-            
-            results.append(SearchResult(
-                name=file['name'],
-                path=file['path'],
-                extension=file['extension'],
-                modified_time=file['modified_time'],
-                score=final_score
-            ))
-        
-        # Sort by final score and limit results
-        results.sort(key=lambda x: x.score, reverse=True)
-        final_results = results[:self.max_results]
+        return [(final_score, match_score, -slot) for final_score, match_score, slot in sorted(heap, reverse=True)]
+    
+    def _rank_paths(self, query: str, slots: Optional[List[int]], allowed: Optional[Set[int]],
+                    recency: array, limit: int) -> List[tuple]:
+        """
+        Rank files letting query tokens match either the file name or a directory above it.
         
-        # Cache the results
-        if self.use_cache and self.cache:
-            self.cache.set(query, final_results)
+        Tokens are scored against directory names once per directory. Every
+        split of the directory-matching tokens between path and name is then
+        tried: files under directories matching all of the path tokens have
+        the remaining tokens scored against their name, and the match score
+        is the length-weighted mean of the token scores. The split with no
+        path tokens is the plain name search. Each file keeps its best split.
         
-        return final_results
+        Args:
+            query: Lowercased query
+            slots: Candidates for the plain name search (None for every slot)
+            allowed: Slots passing the filters, if any
+            recency: Recency score per slot
+            limit: Number of files to return
+        """
+        columns = self.columns
+        tokens = list(dict.fromkeys(query.split()))
+        if self.directory_matcher is None or self.directory_matcher.columns is not columns:
+            self.directory_matcher = DirectoryMatcher(columns)
+        
+        dir_matches = {}
+        for token in tokens:
+            if len(token) >= 2 and len(dir_matches) < self.PATH_MAX_DIRECTORY_TOKENS:
+                matches = self.directory_matcher.match(token, self.fuzzy_threshold)
+                if matches:
+                    dir_matches[token] = matches
+        
+        names_lower = columns.names_lower
+        choices = names_lower if slots is None else {slot: names_lower[slot] for slot in slots}
+        ranked = self._rank(query, choices, recency, limit)
+        
+        total_length = sum(map(len, tokens))
+        for size in range(1, len(dir_matches) + 1):
+            for path_tokens in combinations(dir_matches, size):
+                # Directories matching every path token, with their weighted scores
+                first, *rest = (dir_matches[token] for token in path_tokens)
+                dir_scores = {
+                    dir_id: sum(len(token) * dir_matches[token][dir_id] for token in path_tokens)
+                    for dir_id in first
+                    if all(dir_id in other for other in rest)
+                }
+                if not dir_scores:
+                    continue
+                
+                dir_slots, dir_ids = columns.dir_slots, columns.dir_ids
+                hits = [slot for dir_id in dir_scores for slot in dir_slots[dir_id].values()]
+                if allowed is not None:
+                    hits = [slot for slot in hits if slot in allowed]
+                
+                name_tokens = [token for token in tokens if token not in path_tokens]
+                name_length = sum(map(len, name_tokens))
+                if name_tokens:
+                    scored = (
+                        (slot, (name_length * score + dir_scores[dir_ids[slot]]) / total_length)
+                        for _, score, slot in process.extract_iter(
+                            ' '.join(name_tokens),
+                            {slot: names_lower[slot] for slot in hits},
+                            scorer=fuzz.WRatio,
+                            processor=None,
+                            score_cutoff=self.fuzzy_threshold
+                        )
+                    )
+                else:
+                    scored = ((slot, dir_scores[dir_ids[slot]] / total_length) for slot in hits)
+                ranked.extend(self._top_k(scored, recency, limit))
+        
+        # Keep each file's best split, then the overall best
+        best = {}
+        for entry in ranked:
+            slot = entry[2]
+            if slot not in best or entry > best[slot]:
+                best[slot] = entry
+        return sorted(best.values(), key=lambda r: (-r[0], -r[1], r[2]))[:limit]
+    
+    def _top_k(self, scored: Iterable[Tuple[int, float]], recency: array, limit: int) -> List[tuple]:
+        """Keep the best limit (slot, match score) pairs by final score, best first."""
+        heap = []
+        for slot, match_score in scored:
+            entry = (match_score * 0.7 + recency[slot] * 0.3, match_score, -slot)
+            if len(heap) < limit:
+                heapq.heappush(heap, entry)
+            elif entry > heap[0]:
+                heapq.heapreplace(heap, entry)
+        return [(final_score, match_score, -slot) for final_score, match_score, slot in sorted(heap, reverse=True)]
+    
+    def _scorer_for(self, names: int) -> Optional[sharded.ShardedScorer]:
+        """Get the sharded scorer if a search over this many names should use it."""
+        if self.search_workers < 2 or names < self.parallel_min_names or not sharded.available():
+            return None
+        if self.sharded_scorer is None or self.sharded_scorer.workers != self.search_workers:
+            self.sharded_scorer = sharded.shared_scorer(self.search_workers)
+        return self.sharded_scorer
+    
+    def _session_candidates(self, session: str, query: str) -> Optional[List[int]]:
+        """Get trigram candidates, reusing the counts of the session's previous query."""
+        with self.state_lock:
+            previous = self.sessions.pop(session, None)
+        state = self.trigram_index.count_prefix(query, previous)
+        if state is None:
+            return None
+        
+        with self.state_lock:
+            if state.reused:
+                self.prefix_reuses += 1
+            self.sessions[session] = state
+            while len(self.sessions) > Config.SEARCH_SESSIONS:
+                self.sessions.popitem(last=False)
+        return self.trigram_index.prefix_candidates(state)
+    
+    def _recency_scores(self) -> array:
+        """
+        Get the recency score of every slot, rebuilding them once per day.
+        
+        Scores are bucketed by age, so computing them at the first search
+        of each day is at most a day out of date.
+        """
+        day = int(time.time() // 86400)
+        if self.recency is None or self.recency_day != day or len(self.recency) != self.columns.slot_count:
+            current_time = int(time.time())
+            score = self._calculate_recency_score
+            self.recency = array('b', (score(mtime, current_time) for mtime in self.columns.mtimes))
+            self.recency_day = day
+        return self.recency
+    
+    def _index_recency(self, slot: int):
+        """Score a new or changed slot's recency, if scores are built."""
+        if self.recency is not None:
+            score = self._calculate_recency_score(self.columns.mtimes[slot])
+            if slot == len(self.recency):
+                self.recency.append(score)
+            else:
+                self.recency[slot] = score
     
-    def _calculate_recency_score(self, modified_time: int) -> float:
+    def _calculate_recency_score(self, modified_time: int, current_time: Optional[int] = None) -> int:
         """
         Calculate recency score (0-100) based on modified time.
         More recent files get higher scores.
         
         Args:
             modified_time: Unix timestamp of file modification
+            current_time: Time to measure age from (defaults to now)
             
         Returns:
             Score from 0 to 100
         """
-        import time
-        
-        current_time = int(time.time())
+        if current_time is None:
+            current_time = int(time.time())
         age_seconds = current_time - modified_time
         
         # Files modified in last day: 100
@@ -137,19 +680,263 @@ class SearchEngine:
     
     def reload_index(self, files: List[Dict]):
         """Reload the file index (for cache updates)."""
-        self.files = files
+        self.columns = FileColumns(files)
+        self._build_trigram_index()
         # Invalidate cache when index is reloaded
         if self.use_cache and self.cache:
             self.cache.invalidate()
     
+    def add_file(self, file: Dict):
+        """
+        Add a file to the index without a full reload.
+        
+        Args:
+            file: File dictionary; an already indexed path is updated instead
+        """
+        self._invalidate_matching(self._add(file))
+    
+    def remove_file(self, path: str) -> bool:
+        """
+        Remove a file from the index without a full reload.
+        
+        Args:
+            path: Path of the file to remove
+            
+        Returns:
+            True if the file was indexed
+        """
+        changed = self._remove(path)
+        self._invalidate_matching(changed)
+        self._maybe_compact()
+        return bool(changed)
+    
+    def update_file(self, path: str, file: Dict):
+        """
+        Update a file in place (rename or metadata change).
+        
+        Args:
+            path: Currently indexed path of the file
+            file: New file dictionary
+        """
+        self._invalidate_matching(self._update(path, file))
+        self._maybe_compact()
+    
+    def remove_tree(self, directory: str) -> int:
+        """
+        Remove every file under a directory without a full reload.
+        
+        Small subtrees are removed file by file. Large ones are only
+        tombstoned: their trigram and prefix postings are left pointing at
+        the dead slots (which are never reused and score as None, and which
+        searches skip) until the next compaction rebuilds the index, and the
+        query cache is cleared instead of being checked name by name.
+        
+        Args:
+            directory: Root of the tree to remove
+            
+        Returns:
+            Number of files removed
+        """
+        columns = self.columns
+        slots = columns.tree_slots(directory)
+        if not slots:
+            return 0
+        
+        if len(slots) <= self.BULK_REMOVE_THRESHOLD:
+            names = [columns.names_lower[slot] for slot in slots]
+            for slot, name in zip(slots, names):
+                self.trigram_index.remove(slot, name)
+                if self.prefix_index is not None:
+                    self.prefix_index.remove(slot, name)
+                self._unindex_filters(slot)
+            self._invalidate_matching(list(dict.fromkeys(names)))
+        else:
+            self.invalidate_cache()
+        
+        columns.remove_slots(slots)
+        return len(slots)
+    
+    def apply_changes(self, upserts: List[Dict], removed_paths: List[str]):
+        """
+        Apply a batch of changes as one delta.
+        
+        The query cache is checked once against every changed name and the
+        columns are compacted at most once, however large the batch.
+        
+        Args:
+            upserts: Files to add or update (matched by path)
+            removed_paths: Paths to remove
+        """
+        changed = []
+        for path in removed_paths:
+            changed.extend(self._remove(path))
+        for file in upserts:
+            changed.extend(self._add(file))
+        
+        self._invalidate_matching(list(dict.fromkeys(changed)))
+        self._maybe_compact()
+    
+    def _add(self, file: Dict) -> List[str]:
+        """Add or update a file; returns the lowercased names touched."""
+        if self.columns.slot_of(file['path']) is not None:
+            return self._update(file['path'], file)
+        
+        slot = self.columns.append(file)
+        self.trigram_index.add(slot, self.columns.names_lower[slot])
+        if self.prefix_index is not None:
+            self.prefix_index.add(slot, self.columns.names_lower[slot])
+        self._index_filters(slot)
+        self._index_recency(slot)
+        return [self.columns.names_lower[slot]]
+    
+    def _remove(self, path: str) -> List[str]:
+        """Tombstone a file; returns the lowercased names touched."""
+        slot = self.columns.slot_of(path)
+        if slot is None:
+            return []
+        
+        name_lower = self.columns.names_lower[slot]
+        self.trigram_index.remove(slot, name_lower)
+        if self.prefix_index is not None:
+            self.prefix_index.remove(slot, name_lower)
+        self._unindex_filters(slot)
+        self.columns.remove(slot)
+        return [name_lower]
+    
+    def _update(self, path: str, file: Dict) -> List[str]:
+        """Update a file in its slot; returns the lowercased names touched."""
+        slot = self.columns.slot_of(path)
+        if slot is None:
+            return self._add(file)
+        
+        changed = []
+        if file['path'] != path:
+            # Renamed onto a path that is already indexed: drop the stale entry
+            changed.extend(self._remove(file['path']))
+        
+        old_name = self.columns.names_lower[slot]
+        self._unindex_filters(slot)
+        self.columns.set(slot, file)
+        self._index_filters(slot)
+        self._index_recency(slot)
+        new_name = self.columns.names_lower[slot]
+        if new_name != old_name:
+            self.trigram_index.remove(slot, old_name)
+            self.trigram_index.add(slot, new_name)
+            if self.prefix_index is not None:
+                self.prefix_index.remove(slot, old_name)
+                self.prefix_index.add(slot, new_name)
+            changed.append(old_name)
+        changed.append(new_name)
+        return changed
+    
+    def _index_filters(self, slot: int):
+        """Add a slot's current values to the filter postings, if built."""
+        if self.filter_index is not None:
+            columns = self.columns
+            self.filter_index.add(slot, columns.extensions[slot], columns.mtimes[slot], columns.sizes[slot])
+    
+    def _unindex_filters(self, slot: int):
+        """Remove a slot's current values from the filter postings, if built."""
+        if self.filter_index is not None:
+            columns = self.columns
+            self.filter_index.remove(slot, columns.extensions[slot], columns.mtimes[slot], columns.sizes[slot])
+    
+    def _maybe_compact(self):
+        """Compact tombstoned slots once they make up a quarter of the columns."""
+        columns = self.columns
+        if columns.tombstones >= self.COMPACT_MIN_TOMBSTONES and columns.tombstones * 4 >= columns.slot_count:
+            columns.compact()
+            self._build_trigram_index()
+    
+    def _invalidate_matching(self, names: List[str]):
+        """
+        Drop cached queries whose results a changed file name could affect.
+        
+        A name can only appear in (or vanish from) a query's results if it
+        scores at least the fuzzy threshold against that query, or, in a
+        tiered search, if it contains the query.
+        """
+        if not names or not (self.use_cache and self.cache):
+            return
+        if self.deferred_invalidations is not None:
+            self.deferred_invalidations.extend(names)
+            return
+        
+        queries = self.cache.keys()
+        if not queries:
+            return
+        
+        stale = set()
+        for name in names:
+            for query, _, _ in process.extract(
+                name,
+                queries,
+                scorer=fuzz.WRatio,
+                processor=None,
+                limit=None,
+                score_cutoff=self.fuzzy_threshold
+            ):
+                stale.add(query)
+            if self.tiered:
+                stale.update(query for query in queries if query in name)
+        self.cache.invalidate_keys(stale)
+    
     def invalidate_cache(self):
         """Invalidate the query cache."""
-        if self.use_cache and self.cache:
+        if self.deferred_invalidations is not None:
+            self.deferred_invalidations.append(None)
+        elif self.use_cache and self.cache:
             self.cache.invalidate()
     
+    def flush_invalidations(self, recorded: List[Optional[str]]):
+        """Apply cache invalidations recorded while they were deferred."""
+        if None in recorded:
+            self.invalidate_cache()
+        elif recorded:
+            self._invalidate_matching(list(dict.fromkeys(recorded)))
+    
     def get_cache_stats(self) -> Optional[Dict]:
         """Get cache statistics."""
         if self.use_cache and self.cache:
             return self.cache.get_stats()
         return None
+    
+    def get_stats(self) -> Dict:
+        """Get search engine statistics."""
+        return {
+            'file_count': len(self.columns),
+            'last_candidate_count': self.last_candidate_count,
+            'sessions': len(self.sessions),
+            'prefix_reuses': self.prefix_reuses,
+            'parallel': {
+                'available': sharded.available(),
+                'workers': self.search_workers,
+                'min_names': self.parallel_min_names,
+                'searches': self.sharded_searches
+            },
+            'trigram_index': self.trigram_index.get_stats(),
+            'filter_index': self.filter_index.get_stats() if self.filter_index else None,
+            'prefix_index': self.prefix_index.get_stats() if self.prefix_index else None,
+            'tiers': {
+                'enabled': self.tiered,
+                'answered_by': dict(self.tier_answers),
+                'last': self.last_tiers
+            },
+            'ranked_lists': len(self.pages)
+        }
+    
+    def get_memory_stats(self, seen: Optional[Set[int]] = None) -> Dict:
+        """
+        Get memory usage of the columnar and trigram indexes (walks every string).
+        
+        Args:
+            seen: ids of strings already counted elsewhere (see FileColumns.memory_stats)
+        """
+        stats = self.columns.memory_stats(seen)
+        trigram_bytes = self.trigram_index.get_stats()['bytes']
+        stats['trigram_bytes'] = trigram_bytes
+        if stats['file_count']:
+            stats['trigram_bytes_per_file'] = round(trigram_bytes / stats['file_count'], 1)
+        return stats
 
@@ -1,11 +1,21 @@
 """Search service with integrated caching and file watching."""
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional
+import threading
 import time
-from backend.database.database import Database, FileMetadata
+from backend.database.database import FileMetadata, file_extension
+from backend.database.shared import SharedDatabase
 from backend.search.search_engine import SearchEngine
-from backend.search.cache import IndexCache
+from backend.search.versions import IndexVersions
+from backend.search.columns import FileColumns
+from backend.search.filters import SearchFilters
+from backend.search.snapshot_file import SnapshotFile
+from backend.search.trigram_index import TrigramIndex
 from backend.indexer.file_watcher import FileWatcher
+from backend.indexer.event_queue import EventQueue, DELETED
+from backend.indexer.indexer import FileIndexer
+from backend.indexer.jobs import IndexJob, IndexJobQueue
+from backend.indexer.reconcile import IndexReconciler
 from backend.config.config import Config
 
 
@@ -19,126 +29,223 @@ class SearchService:
         Args:
             enable_watcher: Whether to enable file system watching
         """
-        self.db = Database()
-        self.index_cache = IndexCache()
-        self.search_engine: Optional[SearchEngine] = None
+        # One writer thread and a pool of readers, shared by every thread in the
+        # process; index updates hold write_lock so database and memory change in step
+        self.db = SharedDatabase()
+        self.write_lock = threading.Lock()
+        # Searches run concurrently on a pinned engine version and never wait
+        # for writers; the engine guards its own sessions, page lists and cache
+        self.index_updated = 0.0  # When the in-memory index last changed
+        self.versions: Optional[IndexVersions] = None
         self.file_watcher: Optional[FileWatcher] = None
+        self.event_queue: Optional[EventQueue] = None
         self.enable_watcher = enable_watcher
         self.watched_directories: List[str] = []
+        self.snapshot = SnapshotFile(Config.SNAPSHOT_PATH)
+        self.last_load_ms = 0.0
+        self.loaded_from_snapshot = False
+        self.jobs = IndexJobQueue(self._run_index_job)
         
         # Load index into memory
-        self._load_index()
+        self._load_index(prefer_snapshot=True)
     
-    def _load_index(self):
-        """Load file index from database into memory."""
+    def _load_index(self, prefer_snapshot: bool = False):
+        """
+        Load file index into memory.
+        
+        Args:
+            prefer_snapshot: Start from the snapshot file if one exists, then
+                check it against the database in the background
+        """
+        start = time.perf_counter()
+        
+        if prefer_snapshot:
+            snapshot = self.snapshot.load(Config.TRIGRAM_MIN_QUERY_LENGTH, Config.TRIGRAM_MIN_OVERLAP)
+            if snapshot is not None:
+                columns, trigram_index, info = snapshot
+                with self.write_lock:
+                    self._install_columns(columns, trigram_index)
+                self.last_load_ms = (time.perf_counter() - start) * 1000
+                self.loaded_from_snapshot = True
+                print(f"[Service] Warm start: {len(columns)} files from snapshot in {self.last_load_ms:.1f}ms")
+                
+                threading.Thread(
+                    target=self._verify_snapshot,
+                    args=(info['fingerprint'],),
+                    name='SnapshotVerify',
+                    daemon=True
+                ).start()
+                return
+        
         print("[Service] Loading index from database...")
-        files = self.db.get_all_files()
-        self.index_cache.load(files)
-        self.search_engine = SearchEngine(files, use_cache=True)
-        print(f"[Service] Loaded {len(files)} files into memory")
+        with self.write_lock:
+            columns = FileColumns.from_rows(self.db.get_all_file_rows())
+            self._install_columns(columns)
+        self.last_load_ms = (time.perf_counter() - start) * 1000
+        self.loaded_from_snapshot = False
+        print(f"[Service] Cold start: loaded {len(columns)} files into memory in {self.last_load_ms:.1f}ms")
+        
+        self.save_snapshot()
     
-    def _on_file_created(self, path: str):
-        """Handle file creation event."""
+    @property
+    def search_engine(self) -> Optional[SearchEngine]:
+        """The published search engine (searches pin it through self.versions.read())."""
+        return self.versions.current if self.versions else None
+    
+    def _install_columns(self, columns: FileColumns, trigram_index: Optional[TrigramIndex] = None):
+        """
+        Publish a search engine over new columns (caller holds write_lock).
+        
+        Searches still running on the previous engines finish on them.
+        """
+        engine = SearchEngine.from_columns(columns, use_cache=True, trigram_index=trigram_index)
+        self.versions = IndexVersions(engine, self.versions.version + 1 if self.versions else 1)
+        self.index_updated = time.time()
+    
+    def _apply_delta(self, change):
+        """Apply a change to the in-memory index and publish it (caller holds write_lock)."""
+        if not self.versions:
+            return None
+        result = self.versions.write(change)
+        self.index_updated = time.time()
+        return result
+    
+    def _verify_snapshot(self, fingerprint: Dict[str, int]):
+        """
+        Compare the snapshot with the database.
+        
+        Runs on a background thread after a warm start; if the database
+        changed since the snapshot was written, the search engine is
+        rebuilt from it and a fresh snapshot is saved.
+        """
         try:
-            file_path = Path(path)
-            if not file_path.exists():
-                return
-            
-            stat = file_path.stat()
-            metadata = FileMetadata(
-                name=file_path.name,
-                path=str(file_path),
-                extension=file_path.suffix.lower() if file_path.suffix else '',
-                modified_time=int(stat.st_mtime)
-            )
-            
-            # Update database
-            self.db.insert_files([metadata])
-            
-            # Update cache
-            self.index_cache.add_file(metadata.to_dict())
-            
-            # Reload search engine and invalidate query cache
-            if self.search_engine:
-                self.search_engine.reload_index(self.index_cache.get_all())
-            
-            print(f"[Service] Added: {file_path.name}")
+            with self.write_lock:
+                stale = self.db.get_fingerprint() != fingerprint
+                if stale:
+                    self._install_columns(FileColumns.from_rows(self.db.get_all_file_rows()))
+                    count = len(self.search_engine.columns)
         except Exception as e:
-            print(f"[Service] Error adding file {path}: {e}")
+            print(f"[Service] Snapshot verification failed: {e}")
+            return
+        
+        if stale:
+            print(f"[Service] Snapshot was stale; reloaded {count} files from database")
+            self.save_snapshot()
     
-    def _on_file_modified(self, path: str):
-        """Handle file modification event."""
+    def save_snapshot(self):
+        """Write the in-memory index (columns and trigram postings) to the snapshot file."""
+        if not self.versions:
+            return
+        
+        start = time.perf_counter()
         try:
-            file_path = Path(path)
-            if not file_path.exists():
-                return
+            with self.write_lock:
+                if self.search_engine.columns.tombstones:
+                    self._apply_delta(SearchEngine.compact)
+                engine = self.search_engine
+                self.snapshot.write(engine.columns, self.db.get_fingerprint(), engine.trigram_index)
+                count = len(engine.columns)
+        except OSError as e:
+            print(f"[Service] Could not write snapshot: {e}")
+            return
+        print(f"[Service] Saved snapshot of {count} files in {(time.perf_counter() - start) * 1000:.1f}ms")
+    
+    def _apply_batch(self, batch: Dict[str, str]):
+        """
+        Apply a coalesced batch of file system events.
+        
+        Runs on the event queue thread: one SQLite transaction and one search
+        engine delta for the whole batch.
+        
+        Args:
+            batch: Mapping of path -> net operation (created/modified/deleted)
+        """
+        upserts: List[FileMetadata] = []
+        deleted: List[str] = []
+        
+        for path, op in batch.items():
+            if op == DELETED:
+                deleted.append(path)
+                continue
+            
+            try:
+                file_path = Path(path)
+                stat = file_path.stat()
+            except OSError:
+                # Gone again before we got to it
+                deleted.append(path)
+                continue
             
-            stat = file_path.stat()
-            metadata = FileMetadata(
+            upserts.append(FileMetadata(
                 name=file_path.name,
                 path=str(file_path),
-                extension=file_path.suffix.lower() if file_path.suffix else '',
-                modified_time=int(stat.st_mtime)
-            )
-            
+                extension=file_extension(file_path.name),
+                modified_time=int(stat.st_mtime),
+                size=stat.st_size
+            ))
+        
+        with self.write_lock:
             # Update database
-            self.db.update_file(str(file_path), metadata)
+            self.db.apply_changes(upserts, deleted)
             
-            # Update cache
-            self.index_cache.update_file(str(file_path), metadata.to_dict())
-            
-            # Reload search engine
-            if self.search_engine:
-                self.search_engine.reload_index(self.index_cache.get_all())
-            
-            print(f"[Service] Updated: {file_path.name}")
-        except Exception as e:
-            print(f"[Service] Error updating file {path}: {e}")
+            # Patch and publish the search engine; only affected cached
+            # queries are invalidated
+            upsert_dicts = [metadata.to_dict() for metadata in upserts]
+            self._apply_delta(lambda engine: engine.apply_changes(upsert_dicts, deleted))
+        
+        print(f"[Service] Applied {len(batch)} changes ({len(upserts)} upserted, {len(deleted)} deleted)")
     
-    def _on_file_deleted(self, path: str):
-        """Handle file deletion event."""
-        try:
-            # Update database
-            self.db.delete_file(path)
-            
-            # Update cache
-            self.index_cache.remove_file(path)
-            
-            # Reload search engine
-            if self.search_engine:
-                self.search_engine.reload_index(self.index_cache.get_all())
+    def submit_index_job(self, directories: List[str], kind: str = 'add') -> IndexJob:
+        """
+        Queue a background scan of directory trees.
+        
+        Args:
+            directories: Trees to bring in line with disk
+            kind: Label for the job ('add' or 'reindex')
             
-            print(f"[Service] Deleted: {Path(path).name}")
-        except Exception as e:
-            print(f"[Service] Error deleting file {path}: {e}")
+        Returns:
+            The queued job (poll job.to_dict() or cancel through self.jobs)
+        """
+        return self.jobs.submit(kind, directories)
     
-    def _on_file_moved(self, src_path: str, dest_path: str):
-        """Handle file move/rename event."""
-        try:
-            # Delete old path
-            self.db.delete_file(src_path)
-            self.index_cache.remove_file(src_path)
-            
-            # Add new path
-            dest_file = Path(dest_path)
-            if dest_file.exists():
-                stat = dest_file.stat()
-                metadata = FileMetadata(
-                    name=dest_file.name,
-                    path=str(dest_file),
-                    extension=dest_file.suffix.lower() if dest_file.suffix else '',
-                    modified_time=int(stat.st_mtime)
-                )
-                self.db.insert_files([metadata])
-                self.index_cache.add_file(metadata.to_dict())
-            
-            # Reload search engine
-            if self.search_engine:
-                self.search_engine.reload_index(self.index_cache.get_all())
+    def _run_index_job(self, job: IndexJob):
+        """
+        Reconcile a job's directories, merging each written batch into the live index.
+        
+        Runs on the job thread; the diff is written through the shared
+        writer, and every batch is published to the search engine as a
+        delta, so searches see new files as the scan goes and no full
+        reload is needed. Each batch's database write and delta happen
+        under one write_lock hold, so watcher batches can't interleave.
+        """
+        def merge(added: List[FileMetadata], updated: List[FileMetadata], removed: List[str]):
+            upserts = [m.to_dict() for m in added + updated]
+            self._apply_delta(lambda engine: engine.apply_changes(upserts, removed))
+        
+        counts = IndexReconciler(self.db, FileIndexer()).reconcile(
+            job.directories, on_batch=merge, on_progress=job.update, cancel=job.cancel_event,
+            write_lock=self.write_lock
+        )
+        job.update(counts)
+    
+    def remove_directory(self, directory: str) -> Dict:
+        """
+        Drop a directory tree from the database and the in-memory index.
+        
+        Args:
+            directory: Root of the tree to remove
             
-            print(f"[Service] Moved: {Path(src_path).name} -> {dest_file.name}")
-        except Exception as e:
-            print(f"[Service] Error moving file {src_path} -> {dest_path}: {e}")
+        Returns:
+            Files deleted from the database and from memory, and the time taken
+        """
+        start = time.perf_counter()
+        with self.write_lock:
+            deleted = self.db.delete_tree(directory)
+            removed = self._apply_delta(lambda engine: engine.remove_tree(directory)) or 0
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        
+        print(f"[Service] Removed {directory}: {deleted} files in {elapsed_ms:.1f}ms")
+        return {'deleted': deleted, 'removed_from_memory': removed, 'elapsed_ms': round(elapsed_ms, 2)}
     
     def start_watching(self, directories: List[str]):
         """Start watching directories for changes."""
@@ -151,17 +258,19 @@ class SearchService:
             return
         
         self.watched_directories = directories
+        self.event_queue = EventQueue(self._apply_batch)
         self.file_watcher = FileWatcher(
-            on_created=self._on_file_created,
-            on_modified=self._on_file_modified,
-            on_deleted=self._on_file_deleted,
-            on_moved=self._on_file_moved,
+            on_created=self.event_queue.created,
+            on_modified=self.event_queue.modified,
+            on_deleted=self.event_queue.deleted,
+            on_moved=self.event_queue.moved,
             excluded_dirs=Config.EXCLUDED_DIRS
         )
         
         for directory in directories:
             self.file_watcher.add_directory(directory)
         
+        self.event_queue.start()
         self.file_watcher.start()
     
     def stop_watching(self):
@@ -169,26 +278,65 @@ class SearchService:
         if self.file_watcher and self.file_watcher.is_alive():
             self.file_watcher.stop()
             print("[Service] Stopped file watching")
+        if self.event_queue:
+            self.event_queue.stop()
     
-    def search(self, query: str):
-        """Search for files."""
-        if not self.search_engine:
+    def search(self, query: str, filters: Optional[SearchFilters] = None, session: Optional[str] = None,
+               mode: str = 'name'):
+        """Search for files, optionally restricted by filters and tied to a typing session."""
+        versions = self.versions
+        if not versions:
             return []
-        return self.search_engine.search(query)
+        with versions.read() as engine:
+            return engine.search(query, filters, session, mode)
+    
+    def search_page(self, query: str, filters: Optional[SearchFilters] = None, mode: str = 'name',
+                    cursor: Optional[str] = None, page_size: Optional[int] = None,
+                    session: Optional[str] = None):
+        """Get one page of results and the cursor for the next (see SearchEngine.search_page)."""
+        versions = self.versions
+        if not versions:
+            return [], None
+        with versions.read() as engine:
+            return engine.search_page(query, filters, mode, cursor, page_size, session)
+    
+    def prefix_search(self, query: str, filters: Optional[SearchFilters] = None):
+        """Find files whose name starts with the query (the fast first tier of a streamed search)."""
+        versions = self.versions
+        if not versions:
+            return []
+        with versions.read() as engine:
+            return engine.prefix_search(query, filters)
     
     def get_stats(self):
         """Get service statistics."""
         cache_stats = self.search_engine.get_cache_stats() if self.search_engine else None
-        index_stats = self.index_cache.get_stats()
+        columns = self.search_engine.columns if self.search_engine else None
+        index_stats = {
+            'file_count': len(columns) if columns is not None else 0,
+            'directory_count': len(columns.directories) if columns is not None else 0,
+            'tombstones': columns.tombstones if columns is not None else 0,
+            'is_loaded': columns is not None,
+            'last_updated': self.index_updated
+        }
         
         return {
             'index': index_stats,
             'query_cache': cache_stats,
+            'event_queue': self.event_queue.get_stats() if self.event_queue else None,
+            'database': self.db.get_stats(),
+            'index_version': self.versions.get_stats() if self.versions else None,
+            'load': {
+                'from_snapshot': self.loaded_from_snapshot,
+                'load_ms': round(self.last_load_ms, 2)
+            },
             'watching': self.file_watcher.is_alive() if self.file_watcher else False,
             'watched_directories': self.watched_directories
         }
     
     def close(self):
         """Clean up resources."""
+        self.jobs.stop()
         self.stop_watching()
+        self.save_snapshot()
         self.db.close()
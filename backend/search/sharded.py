@@ -0,0 +1,131 @@
+"""Parallel fuzzy scoring over shards of the name column."""
+import heapq
+import threading
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, List, Optional, Sequence, Tuple
+from rapidfuzz import process, fuzz
+
+try:
+    import numpy as np
+except ImportError:  # rapidfuzz's cdist (the only scorer that releases the GIL) needs numpy
+    np = None
+
+# (final score, match score, slot)
+Ranked = Tuple[float, float, int]
+
+
+def available() -> bool:
+    """Check whether sharded scoring can run (numpy is installed)."""
+    return np is not None
+
+
+_shared: Dict[int, 'ShardedScorer'] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_scorer(workers: int) -> 'ShardedScorer':
+    """
+    Get the process-wide scorer for a worker count.
+    
+    Engines come and go (every index version keeps two, and a reload
+    replaces both), so they share pools instead of each starting its own
+    threads that nothing would shut down.
+    """
+    with _shared_lock:
+        scorer = _shared.get(workers)
+        if scorer is None:
+            scorer = _shared[workers] = ShardedScorer(workers)
+        return scorer
+
+
+class ShardedScorer:
+    """
+    Score names on a thread pool, one contiguous shard per task.
+    
+    Each shard is scored with process.cdist, which releases the GIL while
+    scoring, and reduced to its own top-k by final score (70% match + 30%
+    recency) with numpy. The per-shard lists are then k-way merged.
+    Ordering matches the sequential ranking: final score, then match
+    score, then lowest slot.
+    """
+    
+    def __init__(self, workers: int):
+        """
+        Initialize the scorer.
+        
+        Args:
+            workers: Threads (and shards) per search
+        """
+        if np is None:
+            raise RuntimeError("Sharded search requires numpy")
+        self.workers = max(1, workers)
+        self.pool = ThreadPoolExecutor(self.workers, thread_name_prefix='SearchShard')
+    
+    def top_k(self, query: str, names: Sequence[Optional[str]], slots: Optional[Sequence[int]],
+              recency: array, k: int, score_cutoff: float) -> List[Ranked]:
+        """
+        Find the k best names by final score.
+        
+        Args:
+            query: Lowercased query
+            names: Names to score (None entries never match)
+            slots: Slot of each name, or None if names is the whole column
+            recency: Recency score per slot
+            k: Number of results
+            score_cutoff: Minimum match score (must be positive)
+            
+        Returns:
+            Up to k (final score, match score, slot) tuples, best first
+        """
+        count = len(names)
+        if not count:
+            return []
+        
+        recency = np.array(recency, dtype=np.int8)
+        slots = np.asarray(slots, dtype=np.int64) if slots is not None else None
+        step = -(-count // self.workers)
+        futures = [
+            self.pool.submit(self._score_shard, query, names, start, min(start + step, count),
+                             slots, recency, k, score_cutoff)
+            for start in range(0, count, step)
+        ]
+        shards = [future.result() for future in futures]
+        return list(islice(heapq.merge(*shards, key=lambda r: (-r[0], -r[1], r[2])), k))
+    
+    @staticmethod
+    def _score_shard(query: str, names: Sequence[Optional[str]], start: int, stop: int,
+                     slots, recency, k: int, score_cutoff: float) -> List[Ranked]:
+        """Score one shard and return its top-k, best first."""
+        scores = process.cdist(
+            [query],
+            names[start:stop],
+            scorer=fuzz.WRatio,
+            processor=None,
+            score_cutoff=score_cutoff,
+            dtype=np.float64,
+            workers=1
+        )[0]
+        
+        # Scores under the cutoff (and None names) come back as 0
+        hits = np.flatnonzero(scores >= score_cutoff)
+        if not len(hits):
+            return []
+        
+        matched = scores[hits]
+        hit_slots = slots[start + hits] if slots is not None else hits + start
+        final = matched * 0.7 + recency[hit_slots] * 0.3
+        
+        if len(hits) > k:
+            # Keep everything tied with the k-th best so tie-breaking stays exact
+            kth = np.partition(final, len(final) - k)[len(final) - k]
+            keep = np.flatnonzero(final >= kth)
+            matched, hit_slots, final = matched[keep], hit_slots[keep], final[keep]
+        
+        order = np.lexsort((hit_slots, -matched, -final))[:k]
+        return list(zip(final[order].tolist(), matched[order].tolist(), hit_slots[order].tolist()))
+    
+    def shutdown(self):
+        """Stop the worker threads."""
+        self.pool.shutdown(wait=False)
@@ -0,0 +1,185 @@
+"""Compact binary snapshot of the in-memory index for fast startup."""
+import mmap
+import os
+import struct
+import time
+from array import array
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from backend.search.columns import FileColumns
+from backend.search.trigram_index import TrigramIndex
+
+MAGIC = b'FSSNAP04'
+
+# magic, file count, fingerprint (count, mtime sum, max id, write counter), written at, has trigrams
+HEADER = struct.Struct('<8sQqqqqdB')
+SECTION = struct.Struct('<Q')
+
+# Strings are stored NUL-separated; surrogatepass round-trips any str a path can hold
+ENCODING = 'utf-8'
+ERRORS = 'surrogatepass'
+
+
+def _join(values: List[str]) -> bytes:
+    return '\0'.join(values).encode(ENCODING, ERRORS)
+
+
+def _split(blob, count: int) -> List[str]:
+    if not count:
+        return []
+    return bytes(blob).decode(ENCODING, ERRORS).split('\0')
+
+
+class SnapshotFile:
+    """
+    Read and write index snapshots.
+    
+    Layout: a fixed header followed by length-prefixed sections for the
+    mtime and size arrays, the name and extension columns, the directory table with
+    per-file directory ids and path tails, and (optionally) the trigram
+    postings, so loading is a handful of bulk decodes instead of a
+    Python object per SQLite row.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+    
+    def exists(self) -> bool:
+        return self.path.exists()
+    
+    def write(self, columns: FileColumns, fingerprint: Dict[str, int],
+              trigram_index: Optional[TrigramIndex] = None):
+        """
+        Atomically write a snapshot of compacted columns.
+        
+        Args:
+            columns: Columns to persist (must have no tombstones)
+            fingerprint: Database fingerprint the columns correspond to
+            trigram_index: Postings for the same slots, if available
+        """
+        if columns.tombstones:
+            raise ValueError("Compact the columns before writing a snapshot")
+        
+        # Tails equal to the name (nearly all of them) are stored empty
+        tails = ['' if tail is name else tail for name, tail in zip(columns.names, columns.tails)]
+        sections = [
+            columns.mtimes.tobytes(),
+            columns.sizes.tobytes(),
+            _join(columns.names),
+            _join(columns.extensions),
+            _join(columns.directories),
+            columns.dir_ids.tobytes(),
+            _join(tails),
+        ]
+        
+        if trigram_index is not None:
+            grams = list(trigram_index.postings)
+            offsets = array('q', [0])
+            postings = array('i')
+            for gram in grams:
+                postings.extend(trigram_index.postings[gram])
+                offsets.append(len(postings))
+            sections += [_join(grams), offsets.tobytes(), postings.tobytes()]
+        
+        header = HEADER.pack(
+            MAGIC,
+            len(columns),
+            fingerprint['count'],
+            fingerprint['mtime_sum'],
+            fingerprint['max_id'],
+            fingerprint['changes'],
+            time.time(),
+            1 if trigram_index is not None else 0
+        )
+        
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + '.tmp')
+        with open(tmp_path, 'wb') as f:
+            f.write(header)
+            for section in sections:
+                f.write(SECTION.pack(len(section)))
+                f.write(section)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+    
+    def load(self, min_query_length: int, min_overlap: float
+             ) -> Optional[Tuple[FileColumns, Optional[TrigramIndex], Dict]]:
+        """
+        Memory-map and decode a snapshot.
+        
+        Args:
+            min_query_length: Settings for the restored trigram index
+            min_overlap: Settings for the restored trigram index
+            
+        Returns:
+            Tuple of (columns, trigram index or None, header info), or None
+            if there is no usable snapshot
+        """
+        if not self.path.exists():
+            return None
+        
+        try:
+            with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    return self._decode(view, min_query_length, min_overlap)
+                finally:
+                    view.release()
+        except (OSError, ValueError, struct.error, UnicodeDecodeError) as e:
+            print(f"[Snapshot] Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+    
+    def _decode(self, view: memoryview, min_query_length: int, min_overlap: float):
+        magic, count, fp_count, fp_mtime_sum, fp_max_id, fp_changes, written_at, has_trigrams = HEADER.unpack_from(view, 0)
+        if magic != MAGIC:
+            raise ValueError("bad magic")
+        
+        offset = HEADER.size
+        sections = []
+        while offset < len(view):
+            (length,) = SECTION.unpack_from(view, offset)
+            offset += SECTION.size
+            sections.append(view[offset:offset + length])
+            offset += length
+        
+        expected = 10 if has_trigrams else 7
+        if len(sections) != expected:
+            raise ValueError(f"expected {expected} sections, found {len(sections)}")
+        
+        mtimes = array('q')
+        mtimes.frombytes(sections[0])
+        sizes = array('q')
+        sizes.frombytes(sections[1])
+        names = _split(sections[2], count)
+        extensions = _split(sections[3], count)
+        directories = _split(sections[4], 1) if count else []
+        dir_ids = array('i')
+        dir_ids.frombytes(sections[5])
+        tails = _split(sections[6], count)
+        if not (len(mtimes) == len(sizes) == len(names) == len(extensions) == len(dir_ids) == len(tails) == count):
+            raise ValueError("column lengths do not match")
+        if count and max(dir_ids) >= len(directories):
+            raise ValueError("directory id out of range")
+        
+        columns = FileColumns.from_parts(names, tails, extensions, mtimes, sizes, directories, dir_ids)
+        
+        trigram_index = None
+        if has_trigrams:
+            grams = _split(sections[7], 1) if len(sections[7]) else []
+            offsets = array('q')
+            offsets.frombytes(sections[8])
+            postings = array('i')
+            postings.frombytes(sections[9])
+            trigram_index = TrigramIndex(min_query_length, min_overlap)
+            trigram_index.postings = {
+                gram: postings[offsets[i]:offsets[i + 1]]
+                for i, gram in enumerate(grams)
+            }
+        
+        info = {
+            'file_count': count,
+            'fingerprint': {'count': fp_count, 'mtime_sum': fp_mtime_sum, 'max_id': fp_max_id, 'changes': fp_changes},
+            'written_at': written_at
+        }
+        return columns, trigram_index, info
@@ -0,0 +1,209 @@
+"""Trigram inverted index for narrowing fuzzy search candidates."""
+import math
+import sys
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+
+def trigrams(text: str) -> Set[str]:
+    """
+    Split text into its set of character trigrams.
+    
+    Whitespace separates tokens, so trigrams never span two words.
+    
+    Args:
+        text: Lowercased text
+        
+    Returns:
+        Set of 3-character substrings
+    """
+    grams = set()
+    for token in text.split():
+        for i in range(len(token) - 2):
+            grams.add(token[i:i + 3])
+    return grams
+
+
+class PrefixCandidates:
+    """
+    Trigram overlap counts behind one query's candidate set.
+    
+    Typing more characters at the end of a query only adds trigrams, so
+    the counts for the longer query are these counts plus the postings of
+    the new trigrams; postings already counted are not walked again.
+    """
+    
+    __slots__ = ('query', 'grams', 'counts', 'version', 'reused')
+    
+    def __init__(self, query: str, grams: Set[str], counts: Counter, version: int, reused: bool):
+        self.query = query
+        self.grams = grams
+        self.counts = counts
+        self.version = version  # TrigramIndex.version the counts were taken at
+        self.reused = reused  # Built by extending a previous query's counts
+
+
+class TrigramIndex:
+    """In-memory trigram -> slot posting lists, kept sorted for cheap updates."""
+    
+    def __init__(self, min_query_length: int = 4, min_overlap: float = 0.25):
+        """
+        Initialize an empty trigram index.
+        
+        Args:
+            min_query_length: Queries shorter than this are not narrowed
+            min_overlap: Fraction of query trigrams a candidate must share
+        """
+        self.min_query_length = min_query_length
+        self.min_overlap = min_overlap
+        self.postings: Dict[str, array] = {}
+        self.version = 0  # Bumped on every change, so saved counts can be checked
+    
+    def build(self, names: Iterable[str]):
+        """Rebuild the index from lowercased names, slot = position."""
+        postings: Dict[str, array] = {}
+        for slot, name in enumerate(names):
+            if name is None:
+                continue
+            for gram in trigrams(name):
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('i')
+                posting.append(slot)
+        self.postings = postings
+        self.version += 1
+    
+    def copy(self) -> 'TrigramIndex':
+        """Copy the postings for an independent writer."""
+        index = TrigramIndex(self.min_query_length, self.min_overlap)
+        index.postings = {gram: array('i', posting) for gram, posting in self.postings.items()}
+        index.version = self.version
+        return index
+    
+    def add(self, slot: int, name: str):
+        """Index a lowercased name under the given slot."""
+        self.version += 1
+        for gram in trigrams(name):
+            posting = self.postings.get(gram)
+            if posting is None:
+                self.postings[gram] = array('i', [slot])
+            elif not posting or posting[-1] < slot:
+                posting.append(slot)
+            else:
+                i = bisect_left(posting, slot)
+                if i == len(posting) or posting[i] != slot:
+                    posting.insert(i, slot)
+    
+    def remove(self, slot: int, name: str):
+        """Drop a slot previously indexed under the given lowercased name."""
+        self.version += 1
+        for gram in trigrams(name):
+            posting = self.postings.get(gram)
+            if posting is None:
+                continue
+            i = bisect_left(posting, slot)
+            if i < len(posting) and posting[i] == slot:
+                del posting[i]
+                if not posting:
+                    del self.postings[gram]
+    
+    def candidates(self, query: str) -> Optional[List[int]]:
+        """
+        Find slots sharing enough trigrams with the query.
+        
+        Args:
+            query: Lowercased query string
+            
+        Returns:
+            Sorted list of candidate slots, or None if the query is too
+            short to narrow and the caller should scan everything
+        """
+        grams = self._query_grams(query)
+        if grams is None:
+            return None
+        
+        required = self._required(grams)
+        lists = [self.postings.get(gram, ()) for gram in grams]
+        
+        if required == 1:
+            return sorted(set(chain.from_iterable(lists)))
+        
+        counts = Counter(chain.from_iterable(lists))
+        return sorted(slot for slot, count in counts.items() if count >= required)
+    
+    def substring_candidates(self, query: str) -> Optional[Sequence[int]]:
+        """
+        Get slots that may contain the query as a substring.
+        
+        Any name containing the query contains every query trigram, so the
+        shortest posting among them is a superset of the substring matches;
+        callers verify each slot with a substring test.
+        
+        Args:
+            query: Lowercased query string
+            
+        Returns:
+            Sorted posting of the query's rarest trigram, or None if the
+            query has no trigram (every token is under three characters)
+        """
+        grams = trigrams(query)
+        if not grams:
+            return None
+        return min((self.postings.get(gram, ()) for gram in grams), key=len)
+    
+    def count_prefix(self, query: str, previous: Optional[PrefixCandidates] = None) -> Optional[PrefixCandidates]:
+        """
+        Count trigram overlaps for a query, extending a previous query's counts.
+        
+        The previous counts are reused (and updated in place) when the query
+        extends the previous query and the index has not changed since;
+        any other edit counts from scratch.
+        
+        Args:
+            query: Lowercased query string
+            previous: Counts from the previous query of the same session
+            
+        Returns:
+            Counts to pass to prefix_candidates (and to the next call), or
+            None if the query is too short to narrow
+        """
+        grams = self._query_grams(query)
+        if grams is None:
+            return None
+        
+        if (previous is not None and previous.version == self.version
+                and query.startswith(previous.query) and previous.grams <= grams):
+            counts = previous.counts
+            counts.update(chain.from_iterable(self.postings.get(gram, ()) for gram in grams - previous.grams))
+            return PrefixCandidates(query, grams, counts, self.version, True)
+        
+        counts = Counter(chain.from_iterable(self.postings.get(gram, ()) for gram in grams))
+        return PrefixCandidates(query, grams, counts, self.version, False)
+    
+    def prefix_candidates(self, state: PrefixCandidates) -> List[int]:
+        """Get the sorted candidate slots for a counted query (the same set candidates() returns)."""
+        required = self._required(state.grams)
+        if required == 1:
+            return sorted(state.counts)
+        return sorted(slot for slot, count in state.counts.items() if count >= required)
+    
+    def _query_grams(self, query: str) -> Optional[Set[str]]:
+        """Get a query's trigrams, or None if it is too short to narrow."""
+        if len(query.replace(' ', '')) < self.min_query_length:
+            return None
+        return trigrams(query) or None
+    
+    def _required(self, grams: Set[str]) -> int:
+        """Number of query trigrams a candidate must share."""
+        return max(1, math.ceil(len(grams) * self.min_overlap))
+    
+    def get_stats(self) -> Dict:
+        """Get index statistics."""
+        return {
+            'trigrams': len(self.postings),
+            'postings': sum(len(p) for p in self.postings.values()),
+            'bytes': sys.getsizeof(self.postings) + sum(sys.getsizeof(p) for p in self.postings.values())
+        }
@@ -0,0 +1,193 @@
+"""Versioned search engine snapshots: readers never wait for writers."""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, TypeVar
+from backend.search.search_engine import SearchEngine
+
+T = TypeVar('T')
+
+
+class IndexVersions:
+    """
+    Read-copy-update over a left-right pair of search engines.
+    
+    Searches pin the published engine for their whole run. A writer
+    applies its delta to the other (unpublished) engine, publishes it by
+    swapping one index, waits for searches still pinned to the old engine
+    to finish, then replays the delta on the old engine so the pair is
+    identical again and the old copy is recycled as the next write side.
+    The only lock readers touch guards a pin counter and is never held
+    while a delta is applied, so a search never waits on a write.
+    
+    Writers must be serialized by the caller. A full rebuild is not a
+    delta: it gets a new IndexVersions, and the old pair is freed once the
+    last search pinned to it returns.
+    
+    The two engines share one query cache, one set of typing sessions and
+    one list of ranked pages (with one lock and one page id counter), so
+    publishing never leaves searches with cold caches or dangling cursors.
+    A write applies its cache invalidations once, after the grace period,
+    when no search can still store results computed on the old engine.
+    
+    The price is a second copy of the index: the column containers and
+    trigram postings are duplicated (the strings in them are shared), and
+    making the copy adds to every load. get_stats reports the copy time
+    and get_memory_stats the size of the second copy.
+    """
+    
+    def __init__(self, engine: SearchEngine, version: int = 1):
+        """
+        Initialize the pair from an engine (the second side is a copy).
+        
+        Args:
+            engine: Engine to publish
+            version: Version number of the published engine
+        """
+        start = time.perf_counter()
+        self.sides = [engine, self._clone(engine)]
+        self.clone_ms = (time.perf_counter() - start) * 1000
+        self.published = 0
+        self.version = version
+        self.readers = [0, 0]
+        self.lock = threading.Lock()
+        self.drained = threading.Condition(self.lock)
+        self.published_at = time.time()
+        
+        # Statistics
+        self.publishes = 0
+        self.last_publish_ms = 0.0
+        self.max_publish_ms = 0.0
+        self.total_publish_ms = 0.0
+        self.last_grace_ms = 0.0
+        self.max_grace_ms = 0.0
+    
+    @staticmethod
+    def _clone(engine: SearchEngine) -> SearchEngine:
+        """
+        Copy an engine's index (columns and postings) into a new engine with
+        the same settings, sharing its cache, sessions and ranked pages.
+        """
+        clone = SearchEngine.from_columns(engine.columns.copy(), engine.use_cache, engine.trigram_index.copy())
+        clone.search_workers = engine.search_workers
+        clone.parallel_min_names = engine.parallel_min_names
+        clone.layout_version = engine.layout_version
+        clone.cache = engine.cache
+        clone.sessions = engine.sessions
+        clone.pages = engine.pages
+        clone.page_ids = engine.page_ids
+        clone.state_lock = engine.state_lock
+        return clone
+    
+    @property
+    def current(self) -> SearchEngine:
+        """The published engine (unpinned: use read() to search it)."""
+        return self.sides[self.published]
+    
+    @contextmanager
+    def read(self) -> Iterator[SearchEngine]:
+        """Pin the published engine until the block exits."""
+        with self.lock:
+            side = self.published
+            self.readers[side] += 1
+        try:
+            yield self.sides[side]
+        finally:
+            with self.lock:
+                self.readers[side] -= 1
+                if not self.readers[side]:
+                    self.drained.notify_all()
+    
+    def write(self, change: Callable[[SearchEngine], T]) -> T:
+        """
+        Apply a delta to both engines, publishing the updated one first.
+        
+        Args:
+            change: Mutates an engine; called once per side and must be
+                deterministic so both sides end up identical
+                
+        Returns:
+            What change returned on the first (published) side
+        """
+        start = time.perf_counter()
+        standby = 1 - self.published
+        engine = self.sides[standby]
+        engine.deferred_invalidations = invalidations = []
+        try:
+            result = change(engine)
+        except Exception:
+            # The unpublished side may be half-updated; rebuild it from the published one
+            self.sides[standby] = self._clone(self.sides[self.published])
+            raise
+        finally:
+            engine.deferred_invalidations = None
+        
+        with self.lock:
+            retired = self.published
+            self.published = standby
+            self.version += 1
+        self.published_at = time.time()
+        publish_ms = (time.perf_counter() - start) * 1000
+        
+        # Grace period: searches that started on the old engine finish on it
+        grace_start = time.perf_counter()
+        with self.lock:
+            while self.readers[retired]:
+                self.drained.wait()
+        grace_ms = (time.perf_counter() - grace_start) * 1000
+        
+        # The replay's invalidations repeat the first side's; they are dropped
+        old = self.sides[retired]
+        old.deferred_invalidations = []
+        try:
+            change(old)
+        except Exception:
+            self.sides[retired] = self._clone(self.sides[standby])
+            raise
+        finally:
+            old.deferred_invalidations = None
+            self.sides[standby].flush_invalidations(invalidations)
+            self.publishes += 1
+            self.last_publish_ms = publish_ms
+            self.max_publish_ms = max(self.max_publish_ms, publish_ms)
+            self.total_publish_ms += publish_ms
+            self.last_grace_ms = grace_ms
+            self.max_grace_ms = max(self.max_grace_ms, grace_ms)
+        return result
+    
+    def get_stats(self) -> Dict:
+        """Get version and publish statistics."""
+        with self.lock:
+            readers = sum(self.readers)
+        return {
+            'version': self.version,
+            'published_at': self.published_at,
+            'clone_ms': round(self.clone_ms, 2),
+            'publishes': self.publishes,
+            'last_publish_ms': round(self.last_publish_ms, 2),
+            'avg_publish_ms': round(self.total_publish_ms / self.publishes, 2) if self.publishes else 0,
+            'max_publish_ms': round(self.max_publish_ms, 2),
+            'last_grace_ms': round(self.last_grace_ms, 2),
+            'max_grace_ms': round(self.max_grace_ms, 2),
+            'active_searches': readers
+        }
+    
+    def get_memory_stats(self) -> Dict:
+        """
+        Get memory usage of both engines (walks every string; call with writers stopped).
+        
+        Returns:
+            The published engine's memory stats, the bytes its standby copy
+            adds (containers and postings, not the shared strings) and the
+            total for the pair
+        """
+        seen = set()
+        published = self.current.get_memory_stats(seen)
+        standby = self.sides[1 - self.published].get_memory_stats(seen)
+        published_bytes = published['total_bytes'] + published['trigram_bytes']
+        standby_bytes = standby['total_bytes'] + standby['trigram_bytes']
+        return {
+            'published': published,
+            'standby_bytes': standby_bytes,
+            'total_bytes': published_bytes + standby_bytes
+        }
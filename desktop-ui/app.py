@@ -1,15 +1,21 @@
 """Flask API server for desktop UI."""
 import sys
 import os
+import atexit
+import json
+import time
 
 # Add parent directory to path to find backend module
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from flask import Flask, jsonify, request, render_template
+from flask import Flask, Response, jsonify, request, render_template, stream_with_context
 from flask_cors import CORS
 import subprocess
 import platform
+from backend.config.config import Config
 from backend.search.search_service import SearchService
+from backend.search.filters import SearchFilters
+from backend.search.search_engine import SEARCH_MODES
 
 app = Flask(__name__)
 CORS(app)
@@ -17,6 +23,20 @@ CORS(app)
 # Initialize search service
 search_service = SearchService(enable_watcher=False)
 
+# Persist the in-memory index so the next start can skip the database load
+atexit.register(search_service.close)
+
+
+def _launch(command):
+    """Start a desktop helper (file opener, explorer) without waiting for it to exit."""
+    subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=platform.system() != 'Windows'
+    )
+
 
 @app.route('/')
 def index():
@@ -24,30 +44,112 @@ def index():
     return render_template('index.html')
 
 
-@app.route('/api/search', methods=['POST'])
-def search():
-    """Search for files."""
-    data = request.json
-    query = data.get('query', '')
-    
-    if not query:
-        return jsonify({'results': []})
-    
-    results = search_service.search(query)
-    
-    # Convert SearchResult objects to dictionaries
-    results_dict = [
+def _result_dicts(results):
+    """Convert SearchResult objects to dictionaries."""
+    return [
         {
             'name': r.name,
             'path': r.path,
             'extension': r.extension,
             'modified_time': r.modified_time,
+            'size': r.size,
             'score': r.score
         }
         for r in results
     ]
+
+
+def _search_params(data):
+    """
+    Parse the shared search request fields.
+    
+    Returns:
+        Tuple of (filters, session, mode, page_size)
+        
+    Raises:
+        ValueError: If a field is invalid
+    """
+    # Structured filters are applied by the engine before scoring
+    filters = SearchFilters.from_dict(data.get('filters'))
+    
+    # Keystrokes from one search box share a session so longer queries narrow from shorter ones
+    session = data.get('session')
+    if not isinstance(session, str):
+        session = None
+    
+    # 'path' mode lets query tokens match directory names as well as file names
+    mode = data.get('mode', 'name')
+    if mode not in SEARCH_MODES:
+        raise ValueError(f"Unknown search mode: {mode}")
+    
+    page_size = data.get('page_size')
+    if page_size is not None and (isinstance(page_size, bool) or not isinstance(page_size, int) or page_size < 1):
+        raise ValueError("page_size must be a positive integer")
     
-    return jsonify({'results': results_dict})
+    return filters, session, mode, page_size
+
+
+@app.route('/api/search', methods=['POST'])
+def search():
+    """Search for files, one page at a time (pass back 'cursor' for the next page)."""
+    data = request.json
+    query = data.get('query', '')
+    
+    if not query:
+        return jsonify({'results': [], 'cursor': None})
+    
+    cursor = data.get('cursor')
+    try:
+        filters, session, mode, page_size = _search_params(data)
+        if cursor is not None and not isinstance(cursor, str):
+            raise ValueError("cursor must be a string")
+        results, next_cursor = search_service.search_page(query, filters, mode, cursor, page_size, session)
+    except ValueError as e:
+        return jsonify({'results': [], 'error': str(e)}), 400
+    
+    return jsonify({'results': _result_dicts(results), 'cursor': next_cursor})
+
+
+@app.route('/api/search/stream', methods=['POST'])
+def search_stream():
+    """
+    Stream search results as NDJSON, fastest tier first.
+    
+    The first line holds exact name-prefix matches (a sorted-index lookup,
+    so the UI can paint at once); the second holds the full fuzzy ranking
+    and the cursor for the next page.
+    """
+    data = request.json
+    query = data.get('query', '')
+    
+    try:
+        filters, session, mode, page_size = _search_params(data)
+    except ValueError as e:
+        return jsonify({'results': [], 'error': str(e)}), 400
+    
+    def generate():
+        start = time.perf_counter()
+        if not query:
+            yield json.dumps({'tier': 'fuzzy', 'results': [], 'cursor': None, 'done': True}) + '\n'
+            return
+        
+        prefix = search_service.prefix_search(query, filters)
+        yield json.dumps({
+            'tier': 'prefix',
+            'results': _result_dicts(prefix),
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2)
+        }) + '\n'
+        
+        results, next_cursor = search_service.search_page(query, filters, mode, None, page_size, session)
+        yield json.dumps({
+            'tier': 'fuzzy',
+            'results': _result_dicts(results),
+            'cursor': next_cursor,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+            'done': True
+        }) + '\n'
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
 
 @app.route('/api/stats', methods=['GET'])
@@ -70,9 +172,9 @@ def open_file():
         if platform.system() == 'Windows':
             os.startfile(file_path)
         elif platform.system() == 'Darwin':  # macOS
-            subprocess.run(['open', file_path])
+            _launch(['open', file_path])
         else:  # Linux
-            subprocess.run(['xdg-open', file_path])
+            _launch(['xdg-open', file_path])
         
         return jsonify({'success': True})
     except Exception as e:
@@ -92,11 +194,11 @@ def open_folder():
         folder_path = os.path.dirname(file_path)
         
         if platform.system() == 'Windows':
-            subprocess.run(['explorer', '/select,', file_path])
+            _launch(['explorer', '/select,', file_path])
         elif platform.system() == 'Darwin':  # macOS
-            subprocess.run(['open', '-R', file_path])
+            _launch(['open', '-R', file_path])
         else:  # Linux
-            subprocess.run(['xdg-open', folder_path])
+            _launch(['xdg-open', folder_path])
         
         return jsonify({'success': True})
     except Exception as e:
@@ -126,10 +228,8 @@ def get_excluded():
 
 @app.route('/api/settings/directories/add', methods=['POST'])
 def add_directory():
-    """Add a directory to index."""
+    """Add a directory and queue a job to index it."""
     from backend.config.user_settings import UserSettings
-    from backend.indexer.indexer import FileIndexer
-    from backend.database.database import Database
     
     data = request.json
     directory = data.get('directory', '')
@@ -149,31 +249,15 @@ def add_directory():
     if not settings.add_directory(directory):
         return jsonify({'success': False, 'error': 'Failed to add directory'})
     
-    # Index the directory
-    try:
-        indexer = FileIndexer()
-        db = Database()
-        
-        total_indexed = 0
-        for batch in indexer.index_directories([directory]):
-            inserted = db.insert_files(batch)
-            total_indexed += inserted
-        
-        db.close()
-        
-        # Reload search service
-        search_service._load_index()
-        
-        return jsonify({'success': True, 'count': total_indexed})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    # Index in the background; batches merge into the live index as they land
+    job = search_service.submit_index_job([directory], 'add')
+    return jsonify({'success': True, 'pending': True, 'job': job.to_dict()}), 202
 
 
 @app.route('/api/settings/directories/remove', methods=['POST'])
 def remove_directory():
     """Remove a directory from index."""
     from backend.config.user_settings import UserSettings
-    from backend.database.database import Database
     
     data = request.json
     directory = data.get('directory', '')
@@ -186,30 +270,18 @@ def remove_directory():
     if not settings.remove_directory(directory):
         return jsonify({'success': False, 'error': 'Directory not in index'})
     
-    # Remove files from database
+    # Remove files from the database and drop the subtree from memory (no reload)
     try:
-        db = Database()
-        # Delete all files from this directory
-        cursor = db.conn.cursor()
-        cursor.execute("DELETE FROM files WHERE path LIKE ?", (f"{directory}%",))
-        db.conn.commit()
-        deleted = cursor.rowcount
-        db.close()
-        
-        # Reload search service
-        search_service._load_index()
-        
-        return jsonify({'success': True, 'count': deleted})
+        result = search_service.remove_directory(directory)
+        return jsonify({'success': True, 'count': result['deleted']})
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)})
 
 
 @app.route('/api/settings/reindex', methods=['POST'])
 def reindex_all():
-    """Reindex all configured directories."""
+    """Rescan all configured directories in the background."""
     from backend.config.user_settings import UserSettings
-    from backend.indexer.indexer import FileIndexer
-    from backend.database.database import Database
     
     settings = UserSettings()
     directories = settings.get_indexed_directories()
@@ -217,27 +289,54 @@ def reindex_all():
     if not directories:
         return jsonify({'success': False, 'error': 'No directories configured'})
     
-    try:
-        indexer = FileIndexer()
-        db = Database()
-        
-        # Clear existing index
-        db.clear_index()
-        
-        # Reindex all directories
-        total_indexed = 0
-        for batch in indexer.index_directories(directories):
-            inserted = db.insert_files(batch)
-            total_indexed += inserted
-        
-        db.close()
-        
-        # Reload search service
-        search_service._load_index()
-        
-        return jsonify({'success': True, 'count': total_indexed})
-    except Exception as e:
-        return jsonify({'success': False, 'error': str(e)})
+    job = search_service.submit_index_job(directories, 'reindex')
+    return jsonify({'success': True, 'pending': True, 'job': job.to_dict()}), 202
+
+
+@app.route('/api/jobs', methods=['GET'])
+def list_jobs():
+    """List recent indexing jobs."""
+    return jsonify({'jobs': [job.to_dict() for job in search_service.jobs.list()]})
+
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def job_status(job_id):
+    """Get an indexing job's progress."""
+    job = search_service.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(job.to_dict())
+
+
+@app.route('/api/jobs/<job_id>/stream', methods=['GET'])
+def job_stream(job_id):
+    """Stream an indexing job's progress as NDJSON until it finishes."""
+    job = search_service.jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job'}), 404
+    
+    def generate():
+        version = -1
+        while True:
+            version = job.wait(version, Config.JOB_PROGRESS_INTERVAL)
+            yield json.dumps(job.to_dict()) + '\n'
+            if job.finished:
+                return
+            # Rate-limit updates; a busy scan changes on every directory
+            time.sleep(Config.JOB_PROGRESS_INTERVAL)
+    
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+@app.route('/api/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    """Cancel a queued or running indexing job."""
+    job = search_service.jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'error': 'Unknown job'}), 404
+    if not job.cancel():
+        return jsonify({'success': False, 'error': f'Job already {job.state}'})
+    return jsonify({'success': True, 'job': job.to_dict()})
 
 
 @app.route('/api/settings/autostart/status', methods=['GET'])
@@ -339,8 +438,29 @@ def reset_hotkey():
 
 
 def run_server(port=5000, debug=False):
-    """Run the Flask server."""
-    app.run(host='127.0.0.1', port=port, debug=debug)
+    """
+    Run the API server.
+    
+    Uses waitress (a pool of Config.SERVER_THREADS request threads) when it
+    is installed, otherwise werkzeug's threaded server. Debug mode runs
+    Flask's reloading development server.
+    """
+    if debug:
+        app.run(host=Config.SERVER_HOST, port=port, debug=True, threaded=True)
+        return
+    
+    try:
+        from waitress import serve
+    except ImportError:
+        serve = None
+    
+    if serve is not None:
+        print(f"[Server] waitress on http://{Config.SERVER_HOST}:{port} ({Config.SERVER_THREADS} threads)")
+        serve(app, host=Config.SERVER_HOST, port=port, threads=Config.SERVER_THREADS)
+    else:
+        from werkzeug.serving import make_server
+        print(f"[Server] threaded werkzeug on http://{Config.SERVER_HOST}:{port} (install waitress for production)")
+        make_server(Config.SERVER_HOST, port, app, threaded=True).serve_forever()
 
 
 if __name__ == '__main__':
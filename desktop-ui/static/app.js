@@ -4,6 +4,13 @@ let searchResults = [];
 let selectedIndex = -1;
 let searchTimeout = null;
 let lastSearchTime = 0;
+let nextCursor = null;
+let currentQuery = '';
+let searchSeq = 0;
+
+// Identifies this search box to the server, which narrows each keystroke's
+// query from the previous one's candidates
+const searchSession = Math.random().toString(36).slice(2) + Date.now().toString(36);
 
 // Initialize Search History
 const searchHistory = new SearchHistory();
@@ -88,46 +95,116 @@ function timeAgo(timestamp) {
 }
 
 // Search files
+// Results stream as NDJSON: exact-prefix matches paint first, the full
+// fuzzy ranking replaces them when it lands
 async function searchFiles(query) {
+    const seq = ++searchSeq;
     if (!query.trim()) {
+        nextCursor = null;
         showEmptyState();
         return;
     }
     
     const startTime = performance.now();
+    let fuzzyShown = false;
     
     try {
-        const response = await fetch('/api/search', {
+        const response = await fetch('/api/search/stream', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
             },
-            body: JSON.stringify({ query })
+            // Active filters are applied server-side, before ranking
+            body: JSON.stringify({ query, filters: filterManager.toRequestFilters(), session: searchSession })
         });
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
         
-        const data = await response.json();
-        const elapsed = (performance.now() - startTime).toFixed(1);
-        lastSearchTime = elapsed;
-        
-        searchResults = data.results;
-        
-        // Apply active filters
-        const filteredResults = filterManager.applyFilters(searchResults);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
         
-        displayResults(filteredResults, elapsed, searchResults.length);
+        const handleLine = (line) => {
+            if (!line.trim() || seq !== searchSeq) return;
+            const data = JSON.parse(line);
+            const elapsed = (performance.now() - startTime).toFixed(1);
+            
+            if (data.tier === 'prefix') {
+                // A fast partial answer; never overwrite the full ranking
+                if (fuzzyShown || !data.results.length) return;
+                searchResults = data.results;
+                nextCursor = null;
+                displayResults(searchResults, elapsed);
+                return;
+            }
+            
+            fuzzyShown = true;
+            lastSearchTime = elapsed;
+            currentQuery = query;
+            searchResults = data.results || [];
+            nextCursor = data.cursor || null;
+            displayResults(searchResults, elapsed);
+            
+            // Add to search history
+            searchHistory.addSearch(query.trim(), searchResults.length);
+        };
         
-        // Add to search history
-        if (query.trim()) {
-            searchHistory.addSearch(query.trim(), filteredResults.length);
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            lines.forEach(handleLine);
         }
+        handleLine(buffered + decoder.decode());
     } catch (error) {
+        if (seq !== searchSeq) return;
         console.error('Search error:', error);
         showError('Search failed. Please try again.');
     }
 }
 
+// Fetch the next page of the current query and append it
+async function loadMoreResults() {
+    if (!nextCursor) return;
+    const seq = searchSeq;
+    const startTime = performance.now();
+    
+    try {
+        const response = await fetch('/api/search', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json'
+            },
+            body: JSON.stringify({
+                query: currentQuery,
+                filters: filterManager.toRequestFilters(),
+                cursor: nextCursor
+            })
+        });
+        const data = await response.json();
+        if (seq !== searchSeq) return;
+        if (!response.ok) {
+            throw new Error(data.error || `HTTP ${response.status}`);
+        }
+        
+        const elapsed = (performance.now() - startTime).toFixed(1);
+        const previousSelection = selectedIndex;
+        searchResults = searchResults.concat(data.results || []);
+        nextCursor = data.cursor || null;
+        displayResults(searchResults, elapsed);
+        selectedIndex = previousSelection;
+        updateSelection();
+    } catch (error) {
+        console.error('Load more error:', error);
+        showError('Could not load more results.');
+    }
+}
+
 // Display results
-function displayResults(results, elapsed, totalCount = null) {
+function displayResults(results, elapsed) {
     if (results.length === 0) {
         showNoResults();
         return;
@@ -147,11 +224,13 @@ function displayResults(results, elapsed, totalCount = null) {
             </div>
             <div class="result-score">${result.score.toFixed(0)}%</div>
         </div>
-    `).join('');
+    `).join('') + (nextCursor ? `
+        <button class="load-more-btn" onclick="loadMoreResults()">Load more results</button>
+    ` : '');
     
     // Show filter info if filters are active
-    if (totalCount && totalCount !== results.length) {
-        searchStats.textContent = `${results.length} of ${totalCount} results in ${elapsed}ms`;
+    if (filterManager.hasActiveFilters()) {
+        searchStats.textContent = `${results.length} filtered results in ${elapsed}ms`;
     } else {
         searchStats.textContent = `${results.length} results in ${elapsed}ms`;
     }
@@ -404,18 +483,18 @@ function handleFilterChange(filterType, value) {
             break;
     }
     
-    // Re-apply filters to current results
+    // Re-run the search with the new filters
     applyCurrentFilters();
 }
 
-// Apply filters to current results
+// Re-run the current search with the active filters
 function applyCurrentFilters() {
-    if (searchResults.length === 0) return;
-    
-    const filtered = filterManager.applyFilters(searchResults);
-    displayResults(filtered, lastSearchTime, searchResults.length);
     displayActiveFilters();
     updateFilterCount();
+    
+    if (searchInput.value.trim()) {
+        searchFiles(searchInput.value);
+    }
 }
 
 // Display active filter chips
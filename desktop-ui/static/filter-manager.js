@@ -39,137 +39,54 @@ class FilterManager {
     }
 
     /**
-     * Apply all active filters to results
-     * @param {Array} results - Array of search result objects
-     * @returns {Array} Filtered results
-     */
-    applyFilters(results) {
-        if (!results || results.length === 0) {
-            return results;
+     * Build the filters object sent with /api/search
+     * Filtering happens on the server before ranking, so matches outside
+     * the top results are not lost.
+     * @returns {Object|null} Server-side filters, or null if none are active
+     */
+    toRequestFilters() {
+        const filters = {};
+        const { fileType, dateRange, sizeRange, directory } = this.activeFilters;
+
+        // File type: a category expands to its extensions
+        if (fileType) {
+            filters.extensions = this.fileTypeCategories[fileType] || [fileType.toLowerCase()];
         }
 
-        let filtered = [...results];
-
-        // Apply file type filter
-        if (this.activeFilters.fileType) {
-            filtered = this.filterByType(filtered);
+        // Date modified (seconds)
+        let startTime = dateRange.start;
+        let endTime = dateRange.end;
+        if (dateRange.preset && this.datePresets[dateRange.preset]) {
+            startTime = Math.floor((Date.now() - this.datePresets[dateRange.preset]) / 1000);
+            endTime = null;
         }
-
-        // Apply date filter
-        if (this.activeFilters.dateRange.start || this.activeFilters.dateRange.end || this.activeFilters.dateRange.preset) {
-            filtered = this.filterByDate(filtered);
+        if (startTime) {
+            filters.modified_after = Math.floor(startTime);
         }
-
-        // Apply size filter
-        if (this.activeFilters.sizeRange.min !== null || this.activeFilters.sizeRange.max !== null || this.activeFilters.sizeRange.preset) {
-            filtered = this.filterBySize(filtered);
+        if (endTime) {
+            filters.modified_before = Math.floor(endTime);
         }
 
-        // Apply directory filter
-        if (this.activeFilters.directory) {
-            filtered = this.filterByDirectory(filtered);
+        // File size (bytes)
+        let minSize = sizeRange.min;
+        let maxSize = sizeRange.max;
+        if (sizeRange.preset && this.sizePresets[sizeRange.preset]) {
+            minSize = this.sizePresets[sizeRange.preset].min;
+            maxSize = this.sizePresets[sizeRange.preset].max;
         }
-
-        return filtered;
-    }
-
-    /**
-     * Filter by file type
-     * @param {Array} results - Results to filter
-     * @returns {Array} Filtered results
-     */
-    filterByType(results) {
-        const filterValue = this.activeFilters.fileType;
-        
-        // Check if it's a category or specific extension
-        if (this.fileTypeCategories[filterValue]) {
-            // It's a category
-            const extensions = this.fileTypeCategories[filterValue];
-            return results.filter(result => 
-                extensions.includes(result.extension.toLowerCase())
-            );
-        } else {
-            // It's a specific extension
-            return results.filter(result => 
-                result.extension.toLowerCase() === filterValue.toLowerCase()
-            );
+        if (minSize !== null && minSize > 0) {
+            filters.min_size = minSize;
         }
-    }
-
-    /**
-     * Filter by date modified
-     * @param {Array} results - Results to filter
-     * @returns {Array} Filtered results
-     */
-    filterByDate(results) {
-        const now = Date.now() / 1000; // Current time in seconds
-        let startTime = this.activeFilters.dateRange.start;
-        let endTime = this.activeFilters.dateRange.end;
-
-        // If using a preset, calculate the time range
-        if (this.activeFilters.dateRange.preset) {
-            const preset = this.activeFilters.dateRange.preset;
-            const milliseconds = this.datePresets[preset];
-            if (milliseconds) {
-                startTime = now - (milliseconds / 1000);
-                endTime = now;
-            }
+        if (maxSize !== null && maxSize !== Infinity) {
+            filters.max_size = maxSize;
         }
 
-        return results.filter(result => {
-            const fileTime = result.modified_time || result.modifiedTime || 0;
-            
-            if (startTime && fileTime < startTime) {
-                return false;
-            }
-            if (endTime && fileTime > endTime) {
-                return false;
-            }
-            return true;
-        });
-    }
-
-    /**
-     * Filter by file size
-     * @param {Array} results - Results to filter
-     * @returns {Array} Filtered results
-     */
-    filterBySize(results) {
-        let minSize = this.activeFilters.sizeRange.min;
-        let maxSize = this.activeFilters.sizeRange.max;
-
-        // If using a preset, use preset values
-        if (this.activeFilters.sizeRange.preset) {
-            const preset = this.sizePresets[this.activeFilters.sizeRange.preset];
-            if (preset) {
-                minSize = preset.min;
-                maxSize = preset.max;
-            }
+        // Directory subtree
+        if (directory) {
+            filters.directory = directory;
         }
 
-        return results.filter(result => {
-            const fileSize = result.size || 0;
-            
-            if (minSize !== null && fileSize < minSize) {
-                return false;
-            }
-            if (maxSize !== null && maxSize !== Infinity && fileSize > maxSize) {
-                return false;
-            }
-            return true;
-        });
-    }
-
-    /**
-     * Filter by directory
-     * @param {Array} results - Results to filter
-     * @returns {Array} Filtered results
-     */
-    filterByDirectory(results) {
-        const directory = this.activeFilters.directory.toLowerCase();
-        return results.filter(result => 
-            result.path.toLowerCase().includes(directory)
-        );
+        return Object.keys(filters).length > 0 ? filters : null;
     }
 
     /**
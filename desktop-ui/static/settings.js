@@ -82,6 +82,7 @@ async function addDirectory() {
             showStatus(`Added and indexing: ${directory}`, 'success');
             input.value = '';
             loadSettings();
+            if (data.job) watchJob(data.job);
         } else {
             showStatus(data.error || 'Failed to add directory', 'error');
         }
@@ -133,7 +134,9 @@ async function reindexAll() {
         
         const data = await response.json();
         
-        if (data.success) {
+        if (data.success && data.job) {
+            watchJob(data.job);
+        } else if (data.success) {
             showStatus(`Reindexed ${data.count} files successfully!`, 'success');
         } else {
             showStatus(data.error || 'Failed to reindex', 'error');
@@ -143,6 +146,77 @@ async function reindexAll() {
     }
 }
 
+// Describe an indexing job's progress
+function describeJob(job) {
+    const label = job.kind === 'reindex' ? 'Reindexing' : `Indexing ${job.directories.join(', ')}`;
+    if (job.state === 'queued') return `${label}: waiting for the current job`;
+    
+    const rate = job.files_per_second.toFixed(0);
+    const eta = job.eta_seconds !== null ? `, about ${Math.ceil(job.eta_seconds)}s left` : '';
+    return `${label}: ${job.files.toLocaleString()} files scanned (${rate}/s${eta}), ` +
+        `${(job.added + job.updated).toLocaleString()} new or changed`;
+}
+
+// Follow a background indexing job until it finishes
+async function watchJob(job) {
+    const panel = document.getElementById('jobProgress');
+    const text = document.getElementById('jobProgressText');
+    const cancelBtn = document.getElementById('cancelJobBtn');
+    
+    panel.style.display = 'flex';
+    text.textContent = describeJob(job);
+    cancelBtn.disabled = false;
+    cancelBtn.onclick = async () => {
+        cancelBtn.disabled = true;
+        await fetch(`/api/jobs/${job.id}/cancel`, { method: 'POST' });
+    };
+    
+    try {
+        // Progress arrives as NDJSON, one job snapshot per line
+        const response = await fetch(`/api/jobs/${job.id}/stream`);
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffered = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffered += decoder.decode(value, { stream: true });
+            const lines = buffered.split('\n');
+            buffered = lines.pop();
+            for (const line of lines) {
+                if (!line.trim()) continue;
+                job = JSON.parse(line);
+                text.textContent = describeJob(job);
+            }
+        }
+    } catch (error) {
+        console.error('Job progress error:', error);
+    }
+    
+    panel.style.display = 'none';
+    if (job.state === 'done') {
+        showStatus(`Indexed ${job.files.toLocaleString()} files (${job.added.toLocaleString()} added, ` +
+            `${job.updated.toLocaleString()} updated, ${job.removed.toLocaleString()} removed)`, 'success');
+    } else if (job.state === 'cancelled') {
+        showStatus('Indexing cancelled. Files found so far stay searchable.', 'success');
+    } else if (job.state === 'failed') {
+        showStatus(`Indexing failed: ${job.error}`, 'error');
+    }
+}
+
+// Pick up a job still running from before the page was opened
+async function resumeJobs() {
+    try {
+        const response = await fetch('/api/jobs');
+        const data = await response.json();
+        const active = (data.jobs || []).filter(job => job.state === 'running' || job.state === 'queued');
+        if (active.length) watchJob(active[0]);
+    } catch (error) {
+        console.error('Failed to load jobs:', error);
+    }
+}
+
 // Show status message
 function showStatus(message, type) {
     const statusEl = document.getElementById('statusMessage');
@@ -388,3 +462,4 @@ async function resetHotkey() {
 loadSettings();
 loadAutoStartStatus();
 loadCurrentHotkey();
+resumeJobs();
@@ -0,0 +1,140 @@
+"""Tests for the index database."""
+import os
+import shutil
+import tempfile
+import unittest
+from concurrent.futures import Future
+from pathlib import Path
+from backend.database.database import Database, FileMetadata
+from backend.database.shared import SharedDatabase
+
+
+def _metadata(path: str) -> FileMetadata:
+    name = os.path.basename(path)
+    return FileMetadata(name=name, path=path, extension=os.path.splitext(name)[1], modified_time=1700000000, size=100)
+
+
+class DeleteTreeTest(unittest.TestCase):
+    """Range deletes over the directories path index."""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = Database(Path(self.tmp) / 'index.db')
+        self.root = os.path.join(self.tmp, 'data')
+        self.db.insert_files([
+            _metadata(os.path.join(self.root, 'a.txt')),
+            _metadata(os.path.join(self.root, 'sub', 'b.txt')),
+            _metadata(os.path.join(self.root, 'sub', 'deep', 'c.txt')),
+            _metadata(os.path.join(self.root + '_sibling', 'd.txt')),
+        ])
+    
+    def tearDown(self):
+        self.db.conn.close()
+        shutil.rmtree(self.tmp)
+    
+    def test_removes_files_and_directory_rows(self):
+        self.assertEqual(self.db.delete_tree(self.root), 3)
+        self.assertEqual(self.db.get_file_count(), 1)
+        self.assertEqual(self.db.get_directory_count(), 1)
+    
+    def test_removes_orphaned_directory_rows(self):
+        # The files of sub/deep are deleted one by one, leaving its directory row behind
+        self.db.apply_changes([], [os.path.join(self.root, 'sub', 'deep', 'c.txt')])
+        self.assertEqual(self.db.get_directory_count(), 4)
+        
+        self.assertEqual(self.db.delete_tree(os.path.join(self.root, 'sub')), 1)
+        self.assertEqual(self.db.get_directory_count(), 2)
+    
+    def test_range_is_case_sensitive(self):
+        self.assertEqual(self.db.delete_tree(self.root.upper()), 0)
+        self.assertEqual(self.db.get_file_count(), 4)
+
+
+
+class FingerprintTest(unittest.TestCase):
+    """The fingerprint a snapshot is checked against."""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = Database(Path(self.tmp) / 'index.db')
+        self.path = os.path.join(self.tmp, 'data', 'a.txt')
+        self.db.insert_files([_metadata(self.path)])
+    
+    def tearDown(self):
+        self.db.conn.close()
+        shutil.rmtree(self.tmp)
+    
+    def test_size_only_update_moves_fingerprint(self):
+        before = self.db.get_fingerprint()
+        metadata = _metadata(self.path)
+        metadata.size = 200
+        self.assertTrue(self.db.update_file(self.path, metadata))
+        self.assertNotEqual(self.db.get_fingerprint(), before)
+    
+    def test_extension_only_update_moves_fingerprint(self):
+        before = self.db.get_fingerprint()
+        metadata = _metadata(self.path)
+        metadata.extension = ''
+        self.assertTrue(self.db.apply_diff([], [metadata], []))
+        self.assertNotEqual(self.db.get_fingerprint(), before)
+    
+    def test_directory_mtimes_leave_fingerprint(self):
+        before = self.db.get_fingerprint()
+        self.db.replace_dir_mtimes(os.path.join(self.tmp, 'data'), {os.path.join(self.tmp, 'data'): 1})
+        self.assertEqual(self.db.get_fingerprint(), before)
+
+
+
+class SharedDatabaseTest(unittest.TestCase):
+    """Batched writes on the SharedDatabase writer."""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.db = SharedDatabase(Path(self.tmp) / 'index.db', readers=2)
+        self.root = os.path.join(self.tmp, 'data')
+    
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmp)
+    
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, name)
+    
+    def test_failed_call_rolls_back_to_its_savepoint(self):
+        batch = [
+            ('insert_files', ([_metadata(self._path('a.txt'))],), Future()),
+            # Adds b.txt, then fails on the bad removed path
+            ('apply_diff', ([_metadata(self._path('b.txt'))], [], [None]), Future()),
+            ('insert_files', ([_metadata(self._path('c.txt'))],), Future()),
+        ]
+        self.db._apply(batch)
+        
+        self.assertEqual(batch[0][2].result(), 1)
+        self.assertIsInstance(batch[1][2].exception(), Exception)
+        self.assertEqual(batch[2][2].result(), 1)
+        self.assertEqual(self.db.transactions, 1)
+        self.assertEqual(set(self.db.get_file_mtimes(self.root)), {self._path('a.txt'), self._path('c.txt')})
+    
+    def test_failed_call_leaves_write_counter(self):
+        self.db.insert_files([_metadata(self._path('a.txt'))])
+        before = self.db.get_fingerprint()
+        
+        batch = [
+            ('delete_tree', (self.root,), Future()),
+            ('apply_diff', ([_metadata(self._path('b.txt'))], [], [None]), Future()),
+        ]
+        self.db._apply(batch)
+        
+        self.assertEqual(batch[0][2].result(), 1)
+        self.assertIsNotNone(batch[1][2].exception())
+        self.assertEqual(self.db.get_file_count(), 0)
+        self.assertEqual(self.db.get_fingerprint()['changes'], before['changes'] + 1)
+    
+    def test_writes_through_the_queue_are_visible_to_readers(self):
+        self.assertEqual(self.db.insert_files([_metadata(self._path('a.txt'))]), 1)
+        self.assertTrue(self.db.delete_file(self._path('a.txt')))
+        self.assertEqual(self.db.get_file_count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+"""Tests for watcher event coalescing."""
+import unittest
+from backend.indexer.event_queue import EventQueue, CREATED, MODIFIED, DELETED
+
+
+class EventQueueTest(unittest.TestCase):
+    """Coalescing and failure handling, driven through flush() without the worker thread."""
+    
+    def setUp(self):
+        self.batches = []
+        self.queue = EventQueue(self.batches.append, window_seconds=0.01)
+    
+    def test_repeated_modifies_collapse(self):
+        self.queue.modified('/data/a.txt')
+        self.queue.modified('/data/a.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': MODIFIED}])
+    
+    def test_create_then_modify_stays_create(self):
+        self.queue.created('/data/a.txt')
+        self.queue.modified('/data/a.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': CREATED}])
+    
+    def test_create_then_delete_deletes(self):
+        self.queue.created('/data/a.txt')
+        self.queue.deleted('/data/a.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': DELETED}])
+    
+    def test_delete_then_create_modifies(self):
+        self.queue.deleted('/data/a.txt')
+        self.queue.created('/data/a.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': MODIFIED}])
+    
+    def test_move_deletes_source_and_creates_destination(self):
+        self.queue.moved('/data/a.txt', '/data/b.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': DELETED, '/data/b.txt': CREATED}])
+    
+    def test_move_back_and_forth(self):
+        self.queue.moved('/data/a.txt', '/data/b.txt')
+        self.queue.moved('/data/b.txt', '/data/a.txt')
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': MODIFIED, '/data/b.txt': DELETED}])
+    
+    def test_failed_batch_is_requeued_under_newer_events(self):
+        def fail(batch):
+            raise RuntimeError('database is locked')
+        
+        self.queue.apply_batch = fail
+        self.queue.created('/data/a.txt')
+        self.queue.modified('/data/b.txt')
+        self.queue.flush()
+        self.assertEqual(self.queue.events_applied, 0)
+        
+        # Events that arrive after the failure are merged on top of it
+        self.queue.deleted('/data/a.txt')
+        self.queue.apply_batch = self.batches.append
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': DELETED, '/data/b.txt': MODIFIED}])
+        self.assertEqual(self.queue.events_applied, 2)
+    
+    def test_events_after_failure_win_over_requeued_batch(self):
+        def fail(batch):
+            # A delete arrives while the failing batch is being applied
+            self.queue.deleted('/data/a.txt')
+            raise RuntimeError('database is locked')
+        
+        self.queue.apply_batch = fail
+        self.queue.created('/data/a.txt')
+        self.queue.flush()
+        
+        self.queue.apply_batch = self.batches.append
+        self.queue.flush()
+        self.assertEqual(self.batches, [{'/data/a.txt': DELETED}])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,108 @@
+"""Tests for the parallel directory scanner."""
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+from backend.database.database import FileMetadata
+from backend.indexer.indexer import FileIndexer
+
+
+def _tree(depth: int, fanout: int, files: int):
+    """Build a virtual tree: directory -> (file names, subdirectories)."""
+    tree = {}
+    
+    def add(directory: str, level: int):
+        subdirs = [f"{directory}/d{i}" for i in range(fanout)] if level < depth else []
+        tree[directory] = ([f"f{i}.txt" for i in range(files)], subdirs)
+        for subdir in subdirs:
+            add(subdir, level + 1)
+    
+    add('/root', 0)
+    return tree
+
+
+class WorkStealingScanTest(unittest.TestCase):
+    """Scans on several workers, driven by a virtual directory lister."""
+    
+    def setUp(self):
+        self.tree = _tree(depth=4, fanout=3, files=2)
+        self.indexer = FileIndexer(workers=4)
+    
+    def _scan_dir(self, directory: str):
+        names, subdirs = self.tree[directory]
+        files = [FileMetadata(name, f"{directory}/{name}", '.txt', 0, 0) for name in names]
+        return files, subdirs
+    
+    def _collect(self, scan_dir):
+        """Drain scan_tree on a thread so a hung scan fails the test instead of blocking it."""
+        outcome = {}
+        
+        def consume():
+            try:
+                outcome['paths'] = [f.path for files in self.indexer.scan_tree('/root', scan_dir) for f in files]
+            except Exception as e:
+                outcome['error'] = e
+        
+        thread = threading.Thread(target=consume, daemon=True)
+        thread.start()
+        thread.join(10)
+        self.assertFalse(thread.is_alive(), "scan did not finish")
+        return outcome
+    
+    def test_yields_every_file_once(self):
+        paths = self._collect(self._scan_dir)['paths']
+        expected = [f"{directory}/{name}" for directory, (names, _) in self.tree.items() for name in names]
+        self.assertEqual(sorted(paths), sorted(expected))
+    
+    def test_lister_error_is_raised_to_the_consumer(self):
+        def failing(directory: str):
+            if directory == '/root/d1/d2':
+                raise PermissionError(directory)
+            return self._scan_dir(directory)
+        
+        for _ in range(20):
+            outcome = self._collect(failing)
+            self.assertIsInstance(outcome.get('error'), PermissionError)
+    
+    def test_error_on_root_is_raised(self):
+        def failing(directory: str):
+            raise OSError('unreadable')
+        
+        self.assertIsInstance(self._collect(failing).get('error'), OSError)
+
+
+class ScanDirectoryTest(unittest.TestCase):
+    """Scans of a real tree."""
+    
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        for directory in ('a', 'a/b', 'c', '.hidden'):
+            os.makedirs(os.path.join(self.tmp, directory), exist_ok=True)
+        for path in ('top.txt', 'a/one.py', 'a/b/two.md', 'c/three', 'c/dotted.', '.hidden/skip.txt'):
+            with open(os.path.join(self.tmp, path), 'w') as f:
+                f.write('x')
+        os.symlink(os.path.join(self.tmp, 'a'), os.path.join(self.tmp, 'link_to_a'))
+    
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+    
+    def test_parallel_scan_matches_sequential_scan(self):
+        sequential = {f.path: f.extension for f in FileIndexer(workers=1).scan_directory(self.tmp)}
+        parallel = {f.path: f.extension for f in FileIndexer(workers=4).scan_directory(self.tmp)}
+        self.assertEqual(parallel, sequential)
+    
+    def test_skips_hidden_directories_and_directory_links(self):
+        paths = {os.path.relpath(f.path, self.tmp) for f in FileIndexer(workers=4).scan_directory(self.tmp)}
+        expected = {os.path.normpath(p) for p in ('top.txt', 'a/one.py', 'a/b/two.md', 'c/three', 'c/dotted.')}
+        self.assertEqual(paths, expected)
+    
+    def test_extensions_follow_path_suffix(self):
+        extensions = {f.name: f.extension for f in FileIndexer(workers=4).scan_directory(self.tmp)}
+        self.assertEqual(extensions['one.py'], '.py')
+        self.assertEqual(extensions['three'], '')
+        self.assertEqual(extensions['dotted.'], '')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""Regression tests for the search engine."""
+import unittest
+from backend.search.search_engine import SearchEngine
+
+
+def _file(directory: str, name: str) -> dict:
+    return {
+        'name': name,
+        'path': f"{directory}/{name}",
+        'extension': '.' + name.rsplit('.', 1)[-1],
+        'modified_time': 1700000000,
+        'size': 100
+    }
+
+
+class BulkRemoveTreeTest(unittest.TestCase):
+    """Searches after a tree removal large enough to leave dead slots in the postings."""
+    
+    def setUp(self):
+        big = [_file('/tmp/svc/data/big', f"report_{i}.txt") for i in range(SearchEngine.BULK_REMOVE_THRESHOLD + 200)]
+        kept = [_file('/tmp/svc/data/kept', f"report_kept_{i}.txt") for i in range(3)]
+        kept.append(_file('/tmp/svc/data/kept', 'export_notes.txt'))
+        kept.append(_file('/tmp/svc/data/kept', 'quarterly.md'))
+        self.engine = SearchEngine(big + kept, use_cache=False)
+        
+        # Build the lazily built prefix index before the removal
+        self.engine.search('report')
+        self.engine.remove_tree('/tmp/svc/data/big')
+    
+    def _paths(self, results) -> set:
+        return {result.path for result in results}
+    
+    def test_prefix_tier_skips_dead_slots(self):
+        results = self.engine.search('report')
+        # Prefix hits rank first; fuzzy matches fill the rest
+        self.assertEqual(self._paths(results[:3]), {f"/tmp/svc/data/kept/report_kept_{i}.txt" for i in range(3)})
+        self.assertTrue(all(path.startswith('/tmp/svc/data/kept/') for path in self._paths(results)))
+    
+    def test_substring_tier_skips_dead_slots(self):
+        paths = self._paths(self.engine.search('port_'))
+        self.assertIn('/tmp/svc/data/kept/export_notes.txt', paths)
+        self.assertTrue(all(path.startswith('/tmp/svc/data/kept/') for path in paths))
+    
+    def test_prefix_search_skips_dead_slots(self):
+        paths = self._paths(self.engine.prefix_search('report'))
+        self.assertTrue(paths)
+        self.assertTrue(all(path.startswith('/tmp/svc/data/kept/') for path in paths))
+
+
+
+class TieredCacheTest(unittest.TestCase):
+    """Cached tiered searches and the fuzzy threshold."""
+    
+    def setUp(self):
+        files = [_file('/tmp/svc/docs', f"notes_{i}.txt") for i in range(20)]
+        self.engine = SearchEngine(files, use_cache=True)
+    
+    def test_tier_hits_respect_fuzzy_threshold(self):
+        # WRatio scales a short query inside a long name down to 60
+        engine = SearchEngine([_file('/tmp/svc/docs', 'a_very_long_file_name_that_mentions_cat_somewhere.txt')],
+                              use_cache=False)
+        self.assertEqual(len(engine.search('cat')), 1)
+        engine.fuzzy_threshold = 61
+        self.assertEqual(engine.search('cat'), [])
+    
+    def test_new_substring_hit_invalidates_cached_query(self):
+        self.assertEqual(self.engine.search('budget'), [])
+        self.engine.add_file(_file('/tmp/svc/docs', 'q3_budget_review_for_the_finance_team_final.xlsx'))
+        paths = {result.path for result in self.engine.search('budget')}
+        self.assertIn('/tmp/svc/docs/q3_budget_review_for_the_finance_team_final.xlsx', paths)
+
+
+if __name__ == '__main__':
+    unittest.main()
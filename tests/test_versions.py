@@ -0,0 +1,118 @@
+"""Tests for the left-right pair of search engines."""
+import unittest
+from backend.search.search_engine import SearchEngine
+from backend.search.versions import IndexVersions
+
+
+def _file(directory: str, name: str, mtime: int = 1700000000, size: int = 100) -> dict:
+    return {
+        'name': name,
+        'path': f"{directory}/{name}",
+        'extension': '.' + name.rsplit('.', 1)[-1],
+        'modified_time': mtime,
+        'size': size
+    }
+
+
+def _state(engine: SearchEngine) -> dict:
+    """Everything a search reads from an engine's index."""
+    columns = engine.columns
+    return {
+        'names': list(columns.names),
+        'tails': list(columns.tails),
+        'extensions': list(columns.extensions),
+        'mtimes': list(columns.mtimes),
+        'sizes': list(columns.sizes),
+        'dir_ids': list(columns.dir_ids),
+        'directories': list(columns.directories),
+        'tombstones': columns.tombstones,
+        'postings': {gram: list(posting) for gram, posting in engine.trigram_index.postings.items()},
+    }
+
+
+class IndexVersionsTest(unittest.TestCase):
+    """Both sides of the pair stay identical through writes and failed writes."""
+    
+    def setUp(self):
+        files = [_file('/tmp/svc/docs', f"report_{i}.txt") for i in range(50)]
+        files += [_file('/tmp/svc/src', f"module_{i}.py") for i in range(50)]
+        self.versions = IndexVersions(SearchEngine(files, use_cache=True))
+    
+    def assertSidesIdentical(self):
+        first, second = self.versions.sides
+        self.assertIsNot(first.columns, second.columns)
+        self.assertEqual(_state(first), _state(second))
+    
+    def test_sides_identical_after_writes(self):
+        self.versions.write(lambda engine: engine.add_file(_file('/tmp/svc/docs', 'summary.md')))
+        self.versions.write(lambda engine: engine.remove_file('/tmp/svc/docs/report_3.txt'))
+        self.versions.write(lambda engine: engine.update_file(
+            '/tmp/svc/src/module_1.py', _file('/tmp/svc/src', 'module_1.py', mtime=1800000000, size=5)))
+        self.versions.write(lambda engine: engine.apply_changes(
+            [_file('/tmp/svc/new', 'notes.txt')], ['/tmp/svc/src/module_2.py']))
+        self.versions.write(lambda engine: engine.remove_tree('/tmp/svc/src'))
+        self.versions.write(SearchEngine.compact)
+        
+        self.assertEqual(self.versions.version, 7)
+        self.assertSidesIdentical()
+        paths = {result.path for result in self.versions.current.search('notes')}
+        self.assertIn('/tmp/svc/new/notes.txt', paths)
+    
+    def test_sides_share_query_state(self):
+        first, second = self.versions.sides
+        self.assertIs(first.cache, second.cache)
+        self.assertIs(first.sessions, second.sessions)
+        self.assertIs(first.pages, second.pages)
+        self.assertIs(first.state_lock, second.state_lock)
+    
+    def test_write_invalidates_affected_queries_once_published(self):
+        with self.versions.read() as engine:
+            engine.search('report')
+            engine.search('module')
+        self.versions.write(lambda engine: engine.add_file(_file('/tmp/svc/docs', 'report_final.txt')))
+        
+        cache = self.versions.current.cache
+        self.assertIsNone(cache.get('report'))
+        self.assertIsNotNone(cache.get('module'))
+    
+    def test_failure_on_first_side_rebuilds_it(self):
+        published = self.versions.current
+        version = self.versions.version
+        
+        def change(engine):
+            engine.add_file(_file('/tmp/svc/docs', 'half_done.txt'))
+            raise RuntimeError('failed halfway')
+        
+        with self.assertRaises(RuntimeError):
+            self.versions.write(change)
+        
+        self.assertIs(self.versions.current, published)
+        self.assertEqual(self.versions.version, version)
+        self.assertSidesIdentical()
+        self.assertIs(self.versions.sides[1].cache, published.cache)
+        
+        # The rebuilt side takes the next write like any other
+        self.versions.write(lambda engine: engine.add_file(_file('/tmp/svc/docs', 'after.txt')))
+        self.assertSidesIdentical()
+    
+    def test_failure_on_replay_rebuilds_the_old_side(self):
+        calls = []
+        
+        def change(engine):
+            calls.append(engine)
+            engine.add_file(_file('/tmp/svc/docs', 'replayed.txt'))
+            if len(calls) == 2:
+                raise RuntimeError('replay failed')
+        
+        with self.assertRaises(RuntimeError):
+            self.versions.write(change)
+        
+        # The update was published; the old side was rebuilt from it
+        self.assertIs(self.versions.current, calls[0])
+        self.assertEqual(self.versions.version, 2)
+        self.assertSidesIdentical()
+        self.assertIsNot(self.versions.sides[1 - self.versions.published], calls[1])
+
+
+if __name__ == '__main__':
+    unittest.main()